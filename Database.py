@@ -1,47 +1,360 @@
 """Database connection helper.
 
-Provides a thin wrapper around mysql.connector for connecting, cursor
-access, commit and close operations.
+Provides a thin wrapper around a backend driver (MySQL by default, or an
+embedded SQLite database) for connecting, cursor access, commit and close
+operations. A Database can also run in pooled mode, handing out
+connections to several threads through `borrow()`.
+
+With read replicas, `borrow(readonly=True)` hands out a replica connection
+instead (round-robin or least-latency). Replicas are health-checked
+periodically and skipped while they lag more than `max_replica_lag`
+seconds. A thread that has just borrowed the primary for writing keeps
+reading from the primary until the replicas have caught up with it
+(read-your-writes).
 """
 
-import mysql.connector
-from mysql.connector import Error
+import itertools
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from backends import BACKENDS
+import profiling
+from schema import SchemaCatalog
+
+
+REPLICA_POLICIES = ("round-robin", "least-latency")
+
+
+class PoolExhausted(ConnectionError):
+    pass
+
+
+class ConnectionPool:
+    # Fixed-size, thread-safe pool. Connections are opened lazily up to
+    # `size` and health-checked every time they are borrowed.
+    def __init__(self, factory, health_check, size=5, timeout=None):
+        self.factory = factory
+        self.health_check = health_check
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    # Check out a live connection, waiting up to `timeout` when all are in use
+    def acquire(self):
+        conn = self._take()
+        if self._is_healthy(conn):
+            return conn
+
+        # Dead connection (server restart, idle timeout...): replace it
+        self._discard(conn)
+        return self._take()
+
+    # Return a connection; any uncommitted work is rolled back first
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    # Close every idle connection
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def _take(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._opened < self.size
+            if can_open:
+                self._opened += 1
+
+        if can_open:
+            try:
+                return self.factory()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolExhausted("No database connection available.")
+
+    def _is_healthy(self, conn):
+        try:
+            return self.health_check(conn)
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        with self._lock:
+            self._opened -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+class Replica:
+    # One read replica: its own backend and pool, plus what the last health
+    # check measured
+    def __init__(self, name, backend, pool):
+        self.name = name
+        self.backend = backend
+        self.pool = pool
+        self.lag = None         # seconds behind the primary
+        self.latency = None     # smoothed health-check round trip, seconds
+        self.healthy = False
+        self.checked_at = None
+        self.reads = 0
+
+    def status(self):
+        return {
+            "replica": self.name,
+            "healthy": self.healthy,
+            "lag_s": self.lag,
+            "latency_ms": round(self.latency * 1000, 2) if self.latency is not None else None,
+            "reads": self.reads,
+        }
 
 
 class Database:
-    def __init__(self, host="localhost", database="vetclinic", user="root", password="Panthers1!"):
+    # backend: "mysql" (host/user/password apply) or "sqlite" (database is
+    # a file path, or ":memory:")
+    # schema_snapshot: optional JSON file used to cache schema metadata
+    # profiler: where cursor timings go (defaults to the shared profiling.profiler)
+    # replicas: read replica hosts (MySQL) or database files (SQLite)
+    # replica_policy: "round-robin" or "least-latency"
+    # max_replica_lag: replicas further behind than this (seconds) are skipped
+    # replica_check_interval: seconds between replica health checks
+    def __init__(self, host="localhost", database="vetclinic", user="root", password="Panthers1!",
+                 pool_size=None, pool_timeout=None, backend="mysql", schema_snapshot=None,
+                 profiler=None, replicas=(), replica_policy="round-robin", max_replica_lag=5.0,
+                 replica_check_interval=5.0):
         self.host = host
         self.database = database
         self.user = user
         self.password = password
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self.backend_name = backend
+        self.backend = None
         self.connection = None
+        self.pool = None
+        self.catalog = SchemaCatalog(schema_snapshot)
+        self.profiler = profiler or profiling.profiler
+        self._lock = threading.RLock()
+
+        if replica_policy not in REPLICA_POLICIES:
+            raise ValueError(f"Unknown replica policy: {replica_policy}")
+        self.replica_hosts = list(replicas)
+        self.replica_policy = replica_policy
+        self.max_replica_lag = max_replica_lag
+        self.replica_check_interval = replica_check_interval
+        self.replicas = []
+        self._replica_lock = threading.Lock()
+        self._round_robin = itertools.count()
+        self._writes = threading.local()
+
+    def _make_backend(self, host=None, replica=False):
+        if self.backend_name not in BACKENDS:
+            raise ValueError(f"Unknown database backend: {self.backend_name}")
+        if self.backend_name == "sqlite":
+            if replica:
+                # A replica file is kept up to date from outside; never write to it
+                return BACKENDS["sqlite"](host, create_schema=False, read_only=True)
+            return BACKENDS["sqlite"](self.database)
+        return BACKENDS[self.backend_name](host or self.host, self.database, self.user, self.password)
 
     # Try to connect and return True/False
     def connect(self):
         try:
-            self.connection = mysql.connector.connect(
-                host=self.host,
-                database=self.database,
-                user=self.user,
-                password=self.password
-            )
-            return self.connection.is_connected()
-        except Error as e:
+            self.backend = self._make_backend()
+        except (ImportError, ValueError) as e:
             print(f"[DB ERROR] {e}")
             return False
 
+        try:
+            if self.pool_size:
+                self.pool = ConnectionPool(self.backend.connect, self.backend.is_alive,
+                                           self.pool_size, self.pool_timeout)
+                # Open one connection up front so bad credentials fail here
+                self.pool.release(self.pool.acquire())
+            else:
+                self.connection = self.backend.connect()
+                if not self.backend.is_alive(self.connection):
+                    return False
+        except self.backend.errors as e:
+            print(f"[DB ERROR] {e}")
+            return False
+
+        self._connect_replicas()
+        return True
+
+    # A replica that is down does not stop the program: reads fall back to
+    # the primary until a later health check finds it back
+    def _connect_replicas(self):
+        for host in self.replica_hosts:
+            backend = self._make_backend(host, replica=True)
+            pool = ConnectionPool(backend.connect, backend.is_alive, self.pool_size or 1, self.pool_timeout)
+            replica = Replica(host, backend, pool)
+            self.replicas.append(replica)
+            self._check_replica(replica)
+            if not replica.healthy:
+                print(f"[DB WARNING] Replica {host} unavailable or lagging; reading from the primary.")
+
     # Return a buffered cursor or raise if not connected
     def get_cursor(self):
         if self.connection:
-            return self.connection.cursor(buffered=True)
+            return self._cursor(self.connection, buffered=True)
         raise ConnectionError("Database connection not established.")
 
+    # Yield (cursor, connection) for one unit of work.
+    # Pooled: checks a connection out of the pool and returns it afterwards.
+    # Single connection: serialises callers so threads never share a cursor.
+    # The cursor is closed and uncommitted changes are rolled back on exit.
+    # readonly: the caller only reads, so a replica may serve it
+    @contextmanager
+    def borrow(self, buffered=True, readonly=False):
+        replica, conn = self._replica_connection() if readonly else (None, None)
+        if replica:
+            cursor = self._cursor(conn, buffered, replica.backend)
+            cursor.staleness = self.max_replica_lag
+            try:
+                yield cursor, conn
+            finally:
+                cursor.close()
+                replica.pool.release(conn)
+            return
+
+        if self.pool:
+            conn = self.pool.acquire()
+            cursor = self._cursor(conn, buffered)
+            try:
+                yield cursor, conn
+            finally:
+                cursor.close()
+                self.pool.release(conn)
+                if not readonly:
+                    self._writes.at = time.monotonic()
+            return
+
+        if not self.connection:
+            raise ConnectionError("Database connection not established.")
+
+        with self._lock:
+            cursor = self._cursor(self.connection, buffered)
+            try:
+                yield cursor, self.connection
+            finally:
+                cursor.close()
+                if self.connection.in_transaction:
+                    self.connection.rollback()
+                if not readonly:
+                    self._writes.at = time.monotonic()
+
+    def _cursor(self, conn, buffered, backend=None):
+        backend = backend or self.backend
+        return profiling.InstrumentedCursor(backend.cursor(conn, buffered=buffered), self.profiler)
+
+    # ==================================================
+    #                  READ REPLICAS
+    # ==================================================
+
+    # Pick a replica for a read and check out one of its connections.
+    # Returns (None, None) when the read should go to the primary.
+    def _replica_connection(self):
+        while True:
+            replica = self._choose_replica()
+            if replica is None:
+                return None, None
+            try:
+                conn = replica.pool.acquire()
+            except (PoolExhausted, *replica.backend.errors):
+                replica.healthy = False
+                continue
+            replica.reads += 1
+            return replica, conn
+
+    def _choose_replica(self):
+        if not self.replicas:
+            return None
+        now = time.monotonic()
+
+        with self._replica_lock:
+            due = [r for r in self.replicas
+                   if r.checked_at is None or now - r.checked_at >= self.replica_check_interval]
+            for replica in due:
+                replica.checked_at = now
+        for replica in due:
+            self._check_replica(replica)
+
+        # Read-your-writes: a replica only qualifies once it can have
+        # replayed this thread's last write (lag is measured in whole
+        # seconds, hence the extra one)
+        last_write = getattr(self._writes, "at", None)
+        since_write = now - last_write if last_write is not None else float("inf")
+        candidates = [r for r in self.replicas if r.healthy and r.lag + 1 < since_write]
+        if not candidates:
+            return None
+
+        if self.replica_policy == "least-latency":
+            return min(candidates, key=lambda r: r.latency or 0.0)
+        return candidates[next(self._round_robin) % len(candidates)]
+
+    def _check_replica(self, replica):
+        started = time.perf_counter()
+        try:
+            conn = replica.pool.acquire()
+            try:
+                lag = replica.backend.replica_lag(conn)
+            finally:
+                replica.pool.release(conn)
+        except (PoolExhausted, *replica.backend.errors):
+            replica.healthy = False
+            replica.checked_at = time.monotonic()
+            return
+
+        rtt = time.perf_counter() - started
+        replica.latency = rtt if replica.latency is None else 0.8 * replica.latency + 0.2 * rtt
+        replica.lag = lag
+        replica.healthy = lag is not None and lag <= self.max_replica_lag
+        replica.checked_at = time.monotonic()
+
+    # Health and traffic of each replica, for stats screens
+    def replica_status(self):
+        return [r.status() for r in self.replicas]
+
     # Commit current transaction
     def commit(self):
         if self.connection:
             self.connection.commit()
 
-    # Close connection if open
+    # Close connection (or every pooled connection) if open
     def close(self):
-        if self.connection and self.connection.is_connected():
+        if self.pool:
+            self.pool.close()
+        if self.connection and self.backend.is_alive(self.connection):
             self.connection.close()
+        if self.backend:
+            self.backend.close()
+        for replica in self.replicas:
+            replica.pool.close()
+            replica.backend.close()
+        self.replicas = []
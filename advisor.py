@@ -0,0 +1,76 @@
+"""Index advisor
+
+Runs EXPLAIN on the statements behind each registered `query` helper and
+flags any plan that reads a whole table (or a whole index) instead of
+seeking to the rows it needs. Statements are captured by calling the
+helper on a recording cursor, so the SQL checked is exactly what runs.
+"""
+
+import query
+
+
+# (helper, sample arguments) for the lookups that run on every booking,
+# summary, cancel and pet listing
+REGISTERED = [
+    (query.get_booking_context, (1, 1, 1)),
+    (query.get_appointment_summary, (1,)),
+    (query.get_appt_animal, (1,)),
+    (query.delete_treatments_by_appt, (1,)),
+    (query.delete_appointment, (1,)),
+    (query.get_animals_by_owner, (1,)),
+    (query.get_owner_of_animal, (1,)),
+    (query.get_owner, (1,)),
+    (query.get_vet_name, (1,)),
+]
+
+
+class _CaptureCursor:
+    # Records statements instead of running them
+    def __init__(self, dialect):
+        self.dialect = dialect
+        self.statements = []
+        self.lastrowid = None
+        self.rowcount = 0
+        self.description = None
+
+    def execute(self, sql, params=()):
+        self.statements.append((sql, params))
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        return []
+
+
+def capture(helper, args, dialect="mysql"):
+    cur = _CaptureCursor(dialect)
+    helper(cur, *args)
+    return cur.statements
+
+
+def full_scans(cursor, plan):
+    # Tables read end to end according to an EXPLAIN result
+    if query.dialect(cursor) == "sqlite":
+        # detail column: "SCAN Treatment", "SEARCH Animal USING INDEX ..."
+        return [row[3].split()[1] for row in plan
+                if row[3].startswith("SCAN ") and not row[3].startswith("SCAN CONSTANT")]
+
+    cols = [d[0].lower() for d in cursor.description]
+    table_i, type_i = cols.index("table"), cols.index("type")
+    return [row[table_i] for row in plan if row[type_i] in ("ALL", "index")]
+
+
+def advise(cursor, registered=None):
+    # [{"query", "sql", "plan", "full_scans"}] for every registered statement
+    report = []
+    for helper, args in registered or REGISTERED:
+        for sql, params in capture(helper, args, query.dialect(cursor)):
+            plan = query.explain(cursor, sql, params)
+            report.append({
+                "query": helper.__name__,
+                "sql": " ".join(sql.split()),
+                "plan": plan,
+                "full_scans": full_scans(cursor, plan),
+            })
+    return report
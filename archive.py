@@ -0,0 +1,103 @@
+"""Appointment archival
+
+Moves appointments dated before a horizon, with their treatments, out of
+the hot Appointment / Treatment tables into per-year archive tables
+(AppointmentArchive_YYYY / TreatmentArchive_YYYY). Bookings, summaries
+and reports then work on recent history only, and the hot indexes stay
+small.
+
+Each batch is copied and deleted in one transaction. A run can be stopped
+at any point (Ctrl+C, `max_batches`) and started again later: it picks up
+whatever is still older than the horizon.
+
+Archived rows are only read when asked for:
+`services.get_appointment_summary(..., include_archive=True)` and
+`reports.run_report(..., include_archive=True)`.
+
+    success, result = archive.archive_before(cursor, connection, "2023-01-01", catalog=db.catalog)
+"""
+
+from datetime import date, datetime, timedelta
+
+import query
+import reports
+import services
+
+
+def horizon(days):
+    # The date `days` days ago, as YYYY-MM-DD
+    return (date.today() - timedelta(days=days)).isoformat()
+
+
+def archive_before(cursor, connection, before, batch_size=1000, max_batches=None, catalog=None,
+                   progress=None):
+    # Archive appointments dated before `before` (YYYY-MM-DD[ HH:MM]).
+    # Returns (success, {"appointments", "treatments", "batches", "years"})
+    # or (False, message). `progress(result)` is called after each batch.
+    try:
+        cutoff = datetime.fromisoformat(before)
+    except (TypeError, ValueError):
+        return False, "Horizon must be YYYY-MM-DD."
+    if cutoff > datetime.now():
+        # Deleting future appointments would log them as cancellations
+        return False, "The archive horizon must be in the past."
+    before = cutoff.strftime("%Y-%m-%d %H:%M:%S")
+
+    result = {"appointments": 0, "treatments": 0, "batches": 0, "years": []}
+    ready = set(query.get_archive_years(cursor))
+    try:
+        while max_batches is None or result["batches"] < max_batches:
+            rows = query.get_archivable_appointments(cursor, before, batch_size)
+            if not rows:
+                break
+
+            by_year = {}
+            for appt_id, when in rows:
+                by_year.setdefault(_year(when), []).append(appt_id)
+
+            # DDL commits implicitly on MySQL, so new year tables are
+            # created before the batch's transaction starts
+            new_years = sorted(set(by_year) - ready)
+            for year in new_years:
+                query.create_archive_tables(cursor, year)
+            if new_years:
+                connection.commit()
+                ready.update(new_years)
+                if catalog:
+                    catalog.invalidate()
+
+            if not connection.in_transaction:
+                query.begin_transaction(cursor)
+            for year, appt_ids in sorted(by_year.items()):
+                result["treatments"] += query.archive_appointments(cursor, year, appt_ids)
+            services.treatment_catalog.rows_deleted(cursor)
+            connection.commit()
+
+            result["appointments"] += len(rows)
+            result["batches"] += 1
+            result["years"] = sorted(set(result["years"]) | set(by_year))
+            if progress:
+                progress(result)
+
+    except Exception as e:
+        connection.rollback()
+        return False, f"Archiving stopped after {result['batches']} batches: {e}"
+
+    finally:
+        if result["batches"]:
+            _forget_moved_rows()
+
+    return True, result
+
+
+def _forget_moved_rows():
+    # In-memory state built from the rows that just moved. The treatment
+    # catalog reads the archive tables too, so archived types stay bookable.
+    services.vet_calendar.reset()
+    reports.report_cache.clear()
+
+
+def _year(value):
+    if isinstance(value, (date, datetime)):
+        return value.year
+    return int(str(value)[:4])
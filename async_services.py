@@ -0,0 +1,209 @@
+"""Asyncio services
+
+An async front for the `services` API. Every call borrows a connection
+from the Database (use pooled mode) and runs the synchronous service
+function on a bounded thread pool, so one event loop can serve many
+concurrent clients without blocking. Results are exactly what the
+`services` function returns, e.g. (success, payload) tuples.
+
+    db = Database(..., pool_size=16)
+    db.connect()
+    svc = AsyncServices(db, timeout=5)
+    success, result = await svc.get_appointment_summary(owner_id, animal_id)
+
+Backpressure: at most `max_pending` calls may be queued or running; any
+more are refused straight away with (False, "Server busy.").
+Timeouts: a call that has not finished within `timeout` seconds returns
+(False, "Request timed out."). A call that times out before a worker
+picks it up never runs. One already running on a worker (e.g. a
+booking) finishes or rolls back on its own, and keeps counting towards
+`max_pending` until it does.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import services
+
+
+BUSY = (False, "Server busy.")
+TIMED_OUT = (False, "Request timed out.")
+
+_DONE = object()
+
+
+class AsyncServices:
+    def __init__(self, db, max_workers=None, max_pending=None, timeout=None):
+        self.db = db
+        self.max_workers = max_workers or db.pool_size or 1
+        self.max_pending = max_pending if max_pending is not None else self.max_workers * 8
+        self.timeout = timeout
+        self.pending = 0
+        self._pending_lock = threading.Lock()
+        self._streams = set()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="vetclinic-db")
+
+    # Run a `services` function on a borrowed connection. Functions taking
+    # (cursor, connection, ...) get both; read-only ones just the cursor.
+    async def call(self, fn, *args, timeout=None, **kwargs):
+        if self.pending >= self.max_pending:
+            return BUSY
+
+        timeout = timeout if timeout is not None else self.timeout
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        loop = asyncio.get_running_loop()
+
+        job = self._submit(self._run, fn, args, kwargs, deadline)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(job, loop=loop), timeout)
+        except asyncio.TimeoutError:
+            return TIMED_OUT
+
+    # Queue `fn` on the worker pool. Its slot in `pending` is released
+    # when the worker is done with it (or it is cancelled before it
+    # starts), not when the caller stops waiting.
+    def _submit(self, fn, *args):
+        with self._pending_lock:
+            self.pending += 1
+        job = self._executor.submit(fn, *args)
+        job.add_done_callback(self._release)
+        return job
+
+    def _release(self, job):
+        with self._pending_lock:
+            self.pending -= 1
+
+    def _run(self, fn, args, kwargs, deadline):
+        # Waited too long in the queue: the caller has already given up
+        if deadline is not None and time.monotonic() > deadline:
+            return TIMED_OUT
+
+        with self.db.borrow(readonly=fn in services.READ_ONLY_CALLS) as (cursor, connection):
+            if services.takes_connection(fn):
+                return fn(cursor, connection, *args, **kwargs)
+            return fn(cursor, *args, **kwargs)
+
+    # Stop open view_table streams and wait for running calls to finish
+    def close(self):
+        for stop in list(self._streams):
+            stop.set()
+        self._executor.shutdown(wait=True)
+
+    # ==================================================
+    #             GENERIC TABLE OPERATIONS
+    # ==================================================
+
+    async def view_table(self, table_name, page_size=500):
+        # (True, async generator of row pages), or BUSY. One worker streams
+        # the table and stays at most two pages ahead of the consumer. Wrap
+        # the pages in contextlib.aclosing() when you may stop early, so the
+        # worker and its connection are freed straight away.
+        if self.pending >= self.max_pending:
+            return BUSY
+        return True, self._stream_table(table_name, page_size)
+
+    async def _stream_table(self, table_name, page_size):
+        loop = asyncio.get_running_loop()
+        pages = asyncio.Queue(maxsize=2)
+        stop = threading.Event()
+
+        def produce():
+            def put(item):
+                done = asyncio.run_coroutine_threadsafe(pages.put(item), loop)
+                while not stop.is_set():
+                    try:
+                        return done.result(timeout=0.1)
+                    except concurrent.futures.TimeoutError:
+                        pass
+                done.cancel()
+
+            try:
+                with self.db.borrow(buffered=False, readonly=True) as (cursor, connection):
+                    for page in services.view_table(cursor, table_name, page_size, self.db.catalog):
+                        if stop.is_set():
+                            return
+                        put(page)
+            except Exception as e:
+                if not stop.is_set():
+                    put(e)
+            finally:
+                if not stop.is_set():
+                    put(_DONE)
+
+        self._streams.add(stop)
+        producer = self._submit(produce)
+        try:
+            while True:
+                item = await asyncio.wait_for(pages.get(), self.timeout)
+                if item is _DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Unblock the producer if the consumer stopped early
+            stop.set()
+            while not producer.done():
+                try:
+                    pages.get_nowait()
+                except asyncio.QueueEmpty:
+                    await asyncio.sleep(0.01)
+            self._streams.discard(stop)
+
+    async def list_tables(self):
+        return await self.call(services.list_tables, self.db.catalog)
+
+    async def insert_row(self, table_name, columns, values):
+        return await self.call(services.insert_row, table_name, columns, values)
+
+    async def update_row(self, table_name, pk_column, pk_value, update_dict):
+        return await self.call(services.update_row, table_name, pk_column, pk_value, update_dict)
+
+    async def update_rows(self, table_name, changes, **kwargs):
+        return await self.call(services.update_rows, table_name, changes, catalog=self.db.catalog, **kwargs)
+
+    async def bulk_insert(self, table_name, columns, rows, **kwargs):
+        return await self.call(services.bulk_insert, table_name, columns, rows, **kwargs)
+
+    # ==================================================
+    #             OWNER / ANIMAL OPERATIONS
+    # ==================================================
+
+    async def list_pets_by_owner(self, owner_id):
+        return await self.call(services.list_pets_by_owner, owner_id)
+
+    async def verify_owner_of_animal(self, owner_id, animal_id):
+        return await self.call(services.verify_owner_of_animal, owner_id, animal_id)
+
+    async def get_owner_dashboard(self, owner_id):
+        return await self.call(services.get_owner_dashboard, owner_id, self.db.catalog)
+
+    # ==================================================
+    #        APPOINTMENT & TREATMENT OPERATIONS
+    # ==================================================
+
+    async def get_existing_treatments(self):
+        return await self.call(services.get_existing_treatments)
+
+    async def schedule_appointment_and_treatment(self, owner_id, animal_id, vet_id, date_time,
+                                                 treatment_choice, new_treatment_type=None):
+        return await self.call(services.schedule_appointment_and_treatment,
+                               owner_id, animal_id, vet_id, date_time,
+                               treatment_choice, new_treatment_type)
+
+    async def schedule_batch(self, items):
+        return await self.call(services.schedule_batch, items)
+
+    async def get_appointment_summary(self, owner_id, animal_id, include_archive=False):
+        return await self.call(services.get_appointment_summary, owner_id, animal_id, include_archive)
+
+    async def cancel_appointment(self, appt_id, animal_id):
+        return await self.call(services.cancel_appointment, appt_id, animal_id)
+
+    async def cancel_appointments(self, **criteria):
+        return await self.call(services.cancel_appointments, **criteria)
+
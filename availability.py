@@ -0,0 +1,151 @@
+"""Vet availability
+
+An in-memory index of booked appointment slots per vet, used to reject
+double bookings and to find free slots without scanning Appointment.
+
+Each vet's bookings are a sorted list of start times. Every appointment
+is treated as one `slot_minutes` slot (the schema stores no duration), so
+two bookings conflict when their starts are less than a slot apart. A
+conflict check is one bisect, O(log n).
+
+A vet's bookings are loaded from the database the first time that vet is
+needed. After that, the services layer keeps the index current through
+`reserve` (booking) and `release` (cancelling or a failed booking). The
+index only sees writes made by this process. Call `reset()` after bulk
+changes (imports, archiving, direct updates) to reload lazily, and
+`forget_vets()` when Veterinarian rows change.
+"""
+
+import bisect
+import threading
+from datetime import datetime, time, timedelta
+
+import query
+
+
+class VetCalendar:
+    def __init__(self, slot_minutes=30, day_start=time(8, 0), day_end=time(18, 0)):
+        self.slot = timedelta(minutes=slot_minutes)
+        self.day_start = day_start
+        self.day_end = day_end
+        self._starts = {}      # str(VetID) -> sorted [datetime]
+        self._vets = None      # [(VetID, Vname)], loaded on first use
+        self._lock = threading.Lock()
+
+    # Forget everything; vets are reloaded on next use
+    def reset(self):
+        with self._lock:
+            self._starts = {}
+            self._vets = None
+
+    # Reload the vet list on next use, keeping the booked slots
+    def forget_vets(self):
+        with self._lock:
+            self._vets = None
+
+    # Book `when` for the vet if the slot is free; returns True on success
+    def reserve(self, cursor, vet_id, when):
+        when = to_datetime(when)
+        starts = self._load(cursor, vet_id)
+        with self._lock:
+            if self._conflicts(starts, when):
+                return False
+            bisect.insort(starts, when)
+            return True
+
+    # Drop one booking at `when` (no-op if it is not indexed)
+    def release(self, vet_id, when):
+        when = to_datetime(when)
+        with self._lock:
+            starts = self._starts.get(str(vet_id))
+            if starts is None:
+                return
+            i = bisect.bisect_left(starts, when)
+            if i < len(starts) and starts[i] == when:
+                del starts[i]
+
+    def is_free(self, cursor, vet_id, when):
+        when = to_datetime(when)
+        starts = self._load(cursor, vet_id)
+        with self._lock:
+            return not self._conflicts(starts, when)
+
+    # The next `count` free slot starts for a vet at or after `after`,
+    # on the slot grid and within working hours
+    def next_free(self, cursor, vet_id, after, count=5, horizon_days=365):
+        when = self._align(to_datetime(after), up=True)
+        limit = when + timedelta(days=horizon_days)
+        starts = self._load(cursor, vet_id)
+        free = []
+        with self._lock:
+            while len(free) < count and when < limit:
+                if not self._in_hours(when):
+                    when = self._next_opening(when)
+                    continue
+                i = bisect.bisect_left(starts, when)
+                if i < len(starts) and starts[i] < when + self.slot:
+                    # Skip straight past the booking that is in the way
+                    when = self._align(starts[i] + self.slot, up=True)
+                    continue
+                if i > 0 and starts[i - 1] > when - self.slot:
+                    when = self._align(starts[i - 1] + self.slot, up=True)
+                    continue
+                free.append(when)
+                when += self.slot
+        return free
+
+    # [(VetID, Vname)] of every vet with no booking overlapping `when`
+    def free_vets(self, cursor, when):
+        when = to_datetime(when)
+        if self._vets is None:
+            vets = query.get_all_vets(cursor)
+            with self._lock:
+                self._vets = vets
+        return [(vet_id, name) for vet_id, name in self._vets if self.is_free(cursor, vet_id, when)]
+
+    # ==================================================
+    #                    INTERNALS
+    # ==================================================
+
+    def _load(self, cursor, vet_id):
+        key = str(vet_id)
+        starts = self._starts.get(key)
+        if starts is not None:
+            return starts
+
+        loaded = sorted(to_datetime(t) for t in query.get_vet_appointment_times(cursor, vet_id))
+        with self._lock:
+            # Another thread may have loaded it meanwhile; keep theirs
+            return self._starts.setdefault(key, loaded)
+
+    def _conflicts(self, starts, when):
+        i = bisect.bisect_left(starts, when)
+        if i < len(starts) and starts[i] < when + self.slot:
+            return True
+        return i > 0 and starts[i - 1] > when - self.slot
+
+    def _align(self, when, up=False):
+        # Snap to the slot grid, counted from midnight
+        midnight = datetime.combine(when.date(), time())
+        offset = (when - midnight) % self.slot
+        if not offset:
+            return when
+        return when - offset + (self.slot if up else timedelta(0))
+
+    def _in_hours(self, when):
+        return self.day_start <= when.time() and when + self.slot <= datetime.combine(when.date(), self.day_end)
+
+    def _next_opening(self, when):
+        opening = datetime.combine(when.date(), self.day_start)
+        if when >= opening:
+            opening += timedelta(days=1)
+        return self._align(opening, up=True)
+
+
+def to_datetime(value):
+    # Accepts datetimes, dates and ISO strings ("YYYY-MM-DD[ HH:MM[:SS]]")
+    if isinstance(value, datetime):
+        return value
+    if hasattr(value, "year"):
+        return datetime.combine(value, time())
+    return datetime.fromisoformat(str(value).strip())
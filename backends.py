@@ -0,0 +1,191 @@
+"""Database backends
+
+A backend knows how to open a connection, build cursors and check that a
+connection is still alive. `Database` delegates to one of these so the
+rest of the program never imports a driver directly.
+
+- MySQLBackend: the production vetclinic server (mysql.connector).
+- SQLiteBackend: an in-process database carrying the same schema, for
+  single-clinic installs, CI runs and local benchmarking.
+"""
+
+import itertools
+import sqlite3
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Owner (
+    OwnerID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Oname VARCHAR(100) NOT NULL,
+    Phone VARCHAR(20),
+    Email VARCHAR(100),
+    Address VARCHAR(200)
+);
+
+CREATE TABLE IF NOT EXISTS Veterinarian (
+    VetID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Vname VARCHAR(100) NOT NULL,
+    Specialty VARCHAR(100),
+    Phone VARCHAR(20)
+);
+
+CREATE TABLE IF NOT EXISTS Animal (
+    AnimalID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Aname VARCHAR(100) NOT NULL,
+    Species VARCHAR(50),
+    Breed VARCHAR(50),
+    DOB DATE,
+    Animal_OwnerID INTEGER NOT NULL REFERENCES Owner(OwnerID)
+);
+
+CREATE TABLE IF NOT EXISTS Appointment (
+    ApptID INTEGER PRIMARY KEY AUTOINCREMENT,
+    DateTime DATETIME NOT NULL,
+    Scheduled_AnimalID INTEGER NOT NULL REFERENCES Animal(AnimalID),
+    Treating_VetID INTEGER REFERENCES Veterinarian(VetID)
+);
+
+CREATE TABLE IF NOT EXISTS Treatment (
+    TreatmentID INTEGER PRIMARY KEY AUTOINCREMENT,
+    AppointmentID INTEGER NOT NULL REFERENCES Appointment(ApptID),
+    TreatmentType VARCHAR(100) NOT NULL
+);
+"""
+
+
+class MySQLBackend:
+    dialect = "mysql"
+
+    # isolation_level: applied to every session this backend opens. READ
+    # COMMITTED keeps long-lived connections from reading a stale snapshot
+    # and avoids gap locks on the booking inserts.
+    def __init__(self, host, database, user, password, isolation_level="READ COMMITTED"):
+        import mysql.connector
+        self.driver = mysql.connector
+        self.errors = (mysql.connector.Error,)
+        self.host = host
+        self.database = database
+        self.user = user
+        self.password = password
+        self.isolation_level = isolation_level
+
+    def connect(self):
+        # consume_results: a cursor closed with rows still unread (a table
+        # view stopped early) discards them in the driver instead of failing
+        conn = self.driver.connect(
+            host=self.host,
+            database=self.database,
+            user=self.user,
+            password=self.password,
+            consume_results=True
+        )
+        if self.isolation_level:
+            cur = conn.cursor()
+            cur.execute(f"SET SESSION TRANSACTION ISOLATION LEVEL {self.isolation_level}")
+            cur.close()
+        return conn
+
+    def cursor(self, conn, buffered=True):
+        return conn.cursor(buffered=buffered)
+
+    def is_alive(self, conn):
+        return conn.is_connected()
+
+    # Seconds this server's replication is behind its source: 0.0 when it
+    # is not a replica, None when replication is stopped or broken
+    def replica_lag(self, conn):
+        cur = conn.cursor(buffered=True, dictionary=True)
+        try:
+            try:
+                cur.execute("SHOW REPLICA STATUS")
+            except self.driver.Error:
+                cur.execute("SHOW SLAVE STATUS")  # before MySQL 8.0.22
+            row = cur.fetchone()
+        finally:
+            cur.close()
+        if row is None:
+            return 0.0
+        lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+        return float(lag) if lag is not None else None
+
+    def close(self):
+        pass
+
+
+class SQLiteCursor:
+    # Adapts a sqlite3 cursor to the mysql.connector conventions used by
+    # `query`: %s placeholders and a `dialect` tag for dialect-specific SQL.
+    dialect = "sqlite"
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(sql.replace("%s", "?"), tuple(params or ()))
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(sql.replace("%s", "?"), seq_of_params)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class SQLiteBackend:
+    dialect = "sqlite"
+    errors = (sqlite3.Error,)
+    _memory_ids = itertools.count(1)
+
+    # database: path to the .db file, or ":memory:" for a throwaway database
+    # that is still shared by every connection this backend opens.
+    # read_only: open an existing file read-only (used for read replicas)
+    def __init__(self, database="vetclinic.db", create_schema=True, read_only=False):
+        self.database = database
+        self._anchor = None
+
+        if database == ":memory:":
+            self.uri = f"file:vetclinic-{next(self._memory_ids)}?mode=memory&cache=shared"
+            # A shared in-memory database lives as long as one connection to it
+            self._anchor = self.connect()
+        else:
+            self.uri = f"file:{database}?mode=ro" if read_only else f"file:{database}"
+
+        if create_schema:
+            conn = self._anchor or self.connect()
+            conn.executescript(SQLITE_SCHEMA)
+            if conn is not self._anchor:
+                conn.close()
+
+    def connect(self):
+        conn = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def cursor(self, conn, buffered=True):
+        # sqlite3 steps through results lazily; there is nothing to buffer
+        return SQLiteCursor(conn.cursor())
+
+    def is_alive(self, conn):
+        try:
+            conn.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def replica_lag(self, conn):
+        # A SQLite replica is a file copied or streamed from outside the
+        # program; there is no replication status to read
+        return 0.0
+
+    def close(self):
+        if self._anchor:
+            self._anchor.close()
+            self._anchor = None
+
+
+BACKENDS = {
+    "mysql": MySQLBackend,
+    "sqlite": SQLiteBackend,
+}
@@ -0,0 +1,284 @@
+"""Batch command mode
+
+Runs a stream of JSON command records (one per line) through the
+`services` layer over one long-lived connection and writes one JSON
+result per command:
+
+    {"op": "schedule", "owner_id": 1, "animal_id": 4, "vet_id": 2,
+     "date_time": "2025-03-01 10:00", "treatment_id": 3}      (or "treatment_type")
+    {"op": "cancel", "appt_id": 17, "animal_id": 4}
+    {"op": "cancel_many", "appt_ids": [17, 18]}     (or "vet_id" / "animal_id", "start", "end")
+    {"op": "insert", "table": "Owner", "values": {"Oname": "...", ...}}
+    {"op": "update", "table": "Owner", "key": 12, "values": {"Phone": "..."}}
+    {"op": "summary", "owner_id": 1, "animal_id": 4}       (+ "include_archive": true)
+    {"op": "pets", "owner_id": 1}
+    {"op": "dashboard", "owner_id": 1}
+
+An optional "id" field is echoed back in the result.
+
+Commits are grouped: a transaction is committed every `commit_every`
+commands. Each command runs under its own savepoint. A failed command is
+rolled back to that savepoint, and the rest of its group still commits.
+Results are written when their group commits. If the server aborts the
+transaction (or the commit fails), every command of that group is
+reported as rolled back.
+
+    python main.py batch commands.jsonl --out results.jsonl --commit-every 500
+"""
+
+import json
+import sys
+import time
+
+import query
+import records
+import services
+
+
+SAVEPOINT = "batch_command"
+
+
+class CommandError(Exception):
+    pass
+
+
+class _GroupedConnection:
+    # Handed to services in place of the real connection: commit() is
+    # deferred to the end of the group, rollback() only undoes the
+    # current command
+    def __init__(self, connection, cursor):
+        self._connection = connection
+        self._cursor = cursor
+
+    @property
+    def in_transaction(self):
+        return True
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        query.rollback_to_savepoint(self._cursor, SAVEPOINT)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+# ======================================================
+#                     COMMANDS
+# ======================================================
+
+def _schedule(cursor, connection, cmd, catalog):
+    _require(cmd, "owner_id", "animal_id", "vet_id", "date_time")
+    if cmd.get("treatment_id") is not None:
+        choice, new_type = str(cmd["treatment_id"]), None
+    elif cmd.get("treatment_type"):
+        choice, new_type = "0", cmd["treatment_type"]
+    else:
+        raise CommandError("Give either treatment_id or treatment_type.")
+    return services.schedule_appointment_and_treatment(
+        cursor, connection, cmd["owner_id"], cmd["animal_id"], cmd["vet_id"],
+        cmd["date_time"], choice, new_type
+    )
+
+
+def _cancel(cursor, connection, cmd, catalog):
+    _require(cmd, "appt_id", "animal_id")
+    return services.cancel_appointment(cursor, connection, cmd["appt_id"], cmd["animal_id"])
+
+
+def _cancel_many(cursor, connection, cmd, catalog):
+    criteria = {k: cmd.get(k) for k in ("appt_ids", "animal_id", "owner_id", "vet_id", "start", "end")}
+    return services.cancel_appointments(cursor, connection, **criteria)
+
+
+def _insert(cursor, connection, cmd, catalog):
+    table, values = _table_values(cursor, cmd, catalog)
+    if table.lower() in services.RESTRICTED_INSERT_TABLES:
+        raise CommandError(f"Rows in {table} are created by scheduling appointments.")
+    columns = list(values)
+    return services.insert_row(cursor, connection, table, columns, [values[c] for c in columns])
+
+
+def _update(cursor, connection, cmd, catalog):
+    _require(cmd, "key")
+    table, values = _table_values(cursor, cmd, catalog)
+    pk_cols = services.get_primary_key(cursor, table, catalog)
+    if len(pk_cols) != 1:
+        raise CommandError(f"{table} has no single-column primary key.")
+    return services.update_row(cursor, connection, table, pk_cols[0], cmd["key"], values)
+
+
+def _summary(cursor, connection, cmd, catalog):
+    _require(cmd, "owner_id", "animal_id")
+    success, rows = services.get_appointment_summary(cursor, cmd["owner_id"], cmd["animal_id"],
+                                                     bool(cmd.get("include_archive")))
+    return success, records.records(cursor, rows) if success else rows
+
+
+def _pets(cursor, connection, cmd, catalog):
+    _require(cmd, "owner_id")
+    pets = services.list_pets_by_owner(cursor, cmd["owner_id"])
+    if pets is None:
+        return False, "Owner not found."
+    return True, records.records(cursor, pets)
+
+
+def _dashboard(cursor, connection, cmd, catalog):
+    _require(cmd, "owner_id")
+    return services.get_owner_dashboard(cursor, cmd["owner_id"], catalog)
+
+
+COMMANDS = {
+    "schedule": _schedule,
+    "cancel": _cancel,
+    "cancel_many": _cancel_many,
+    "insert": _insert,
+    "update": _update,
+    "summary": _summary,
+    "pets": _pets,
+    "dashboard": _dashboard,
+}
+
+
+# ======================================================
+#                      RUNNER
+# ======================================================
+
+def run_batch(db, lines, out, commit_every=100, stop_on_error=False):
+    # Execute JSON command lines, writing one JSON result line per command
+    # to `out`. Returns {"commands", "succeeded", "failed", "seconds"}.
+    # Results are held back until their group commits, so a line never
+    # reports success for work that was rolled back.
+    stats = {"commands": 0, "succeeded": 0, "failed": 0}
+    started = time.perf_counter()
+
+    with db.borrow() as (cursor, connection):
+        grouped = _GroupedConnection(connection, cursor)
+        pending = []
+
+        def settle(lost=None):
+            # Commit the open group, or roll it back when `lost` says why it
+            # cannot commit, then write its results
+            if lost is None and connection.in_transaction:
+                try:
+                    connection.commit()
+                except Exception as e:
+                    lost = f"commit failed: {e}"
+            if lost is not None:
+                _abandon_group(connection)
+            for result in pending:
+                if lost is not None and result["success"]:
+                    result = _rolled_back(result, lost)
+                stats["commands"] += 1
+                stats["succeeded" if result["success"] else "failed"] += 1
+                out.write(json.dumps(result, default=records.json_default) + "\n")
+            out.flush()
+            pending.clear()
+
+        for line_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            result, aborted = _run_one(cursor, connection, grouped, line, line_no, db.catalog)
+            pending.append(result)
+
+            if aborted:
+                settle(lost=f"transaction aborted by line {line_no}")
+            elif len(pending) >= commit_every:
+                settle()
+
+            if stop_on_error and not result["success"]:
+                break
+
+        settle()
+
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def _run_one(cursor, connection, grouped, line, line_no, catalog):
+    # Returns (result, aborted): aborted means the server rolled back the
+    # whole transaction, taking the rest of the group with it
+    result = {"line": line_no}
+    try:
+        cmd = json.loads(line)
+        if not isinstance(cmd, dict):
+            raise CommandError("Command must be a JSON object.")
+    except ValueError as e:
+        return dict(result, success=False, error=f"Invalid JSON: {e}"), False
+    except CommandError as e:
+        return dict(result, success=False, error=str(e)), False
+
+    if "id" in cmd:
+        result["id"] = cmd["id"]
+    op = cmd.get("op")
+    result["op"] = op
+    handler = COMMANDS.get(op)
+    if handler is None:
+        return dict(result, success=False, error=f"Unknown op: {op}"), False
+
+    if not connection.in_transaction:
+        query.begin_transaction(cursor)
+    query.savepoint(cursor, SAVEPOINT)
+    try:
+        success, payload = handler(cursor, grouped, cmd, catalog)
+    except CommandError as e:
+        success, payload = False, str(e)
+    except Exception as e:
+        success, payload = False, f"Invalid input: {e}"
+
+    if not success:
+        # Services do not always roll back their partial work themselves
+        try:
+            query.rollback_to_savepoint(cursor, SAVEPOINT)
+        except Exception:
+            # The server aborted the whole transaction (e.g. a deadlock)
+            return dict(result, success=False, error=f"{payload} (transaction aborted)"), True
+    query.release_savepoint(cursor, SAVEPOINT)
+
+    if success:
+        return dict(result, success=True, result=payload), False
+    return dict(result, success=False, error=payload), False
+
+
+def _abandon_group(connection):
+    # The group's writes are gone, but the in-memory state services keep
+    # (treatment types, booked slots, cached rows) was updated as each
+    # command "committed" through the proxy: rebuild it from the database
+    try:
+        connection.rollback()
+    except Exception:
+        pass
+    services.treatment_catalog.reset()
+    services.vet_calendar.reset()
+    services.entity_cache.clear()
+
+
+def _rolled_back(result, reason):
+    failed = {k: v for k, v in result.items() if k != "result"}
+    return dict(failed, success=False, error=f"Rolled back: {reason}")
+
+
+def _require(cmd, *fields):
+    missing = [f for f in fields if cmd.get(f) in (None, "")]
+    if missing:
+        raise CommandError(f"Missing fields: {', '.join(missing)}")
+
+
+def _table_values(cursor, cmd, catalog):
+    _require(cmd, "table")
+    values = cmd.get("values")
+    if not isinstance(values, dict) or not values:
+        raise CommandError('"values" must be a non-empty object.')
+    table = services.resolve_table(cursor, cmd["table"], catalog)
+    if table is None:
+        raise CommandError(f"Unknown table: {cmd['table']}")
+    unknown = services.unknown_columns(cursor, table, values, catalog)
+    if unknown:
+        raise CommandError(f"Unknown columns for {table}: {', '.join(unknown)}")
+    return table, values
+
+
+def open_input(path):
+    # "-" reads commands from stdin
+    return sys.stdin if path == "-" else open(path, encoding="utf-8")
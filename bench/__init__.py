@@ -0,0 +1,10 @@
+"""Benchmark suite
+
+Generates a synthetic clinic at a chosen scale, bulk-loads it and times
+the main `services` entry points. Results are written as JSON so runs can
+be compared. By default everything runs against an in-memory SQLite
+database, so no server is needed:
+
+    python -m bench --appointments 100000 --out run.json
+    python -m bench --appointments 100000 --compare run.json
+"""
@@ -0,0 +1,115 @@
+"""python -m bench: generate, load and time a synthetic clinic."""
+
+import argparse
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from Database import Database
+from bench import datagen, runner
+import cli
+import migrations
+import profiling
+import query
+import ui
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m bench", parents=[cli.connection_args(cli.profiling_args())],
+                                     description="Benchmark the services layer on synthetic data.")
+    parser.set_defaults(backend="sqlite", database=":memory:")
+    parser.add_argument("--appointments", type=int, default=10000,
+                        help="scale of the generated clinic (owners, animals, vets follow)")
+    parser.add_argument("--iterations", type=int, default=200, help="timed calls per operation")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cache", choices=["cold", "warm"], default="cold",
+                        help="cold: empty the entity cache before every timed call; warm: keep it")
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per bulk insert batch")
+    parser.add_argument("--no-load", action="store_true",
+                        help="benchmark data already in the database (generated with the same scale/seed)")
+    parser.add_argument("--no-migrate", action="store_true",
+                        help="skip schema migrations (benchmark without the hot-lookup indexes)")
+    parser.add_argument("--out", metavar="PATH", help="write results JSON here (default: stdout)")
+    parser.add_argument("--compare", metavar="PATH", help="earlier results JSON to compare against")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    scale = datagen.Scale(args.appointments)
+
+    # Same flags as main.py: --profile* / --slow-log time every statement
+    # (which slows the run down), --replica sends the read-only calls to replicas
+    profiler = profiling.profiler
+    if args.profile or args.profile_json or args.slow_log:
+        profiler.enable(slow_ms=args.slow_ms, slow_log_path=args.slow_log, explain=args.explain)
+
+    db = Database(args.host, args.database, args.user, args.password, backend=args.backend,
+                  replicas=args.replica, replica_policy=args.replica_policy,
+                  max_replica_lag=args.max_replica_lag)
+    if not db.connect():
+        print("Connection failed.", file=sys.stderr)
+        return 2
+
+    try:
+        load_report = None
+        if not args.no_load:
+            with db.borrow() as (cursor, connection):
+                if any(query.count_rows(cursor, table) for table, _, _ in datagen.TABLES):
+                    print("Target database is not empty; use --no-load to benchmark existing data.",
+                          file=sys.stderr)
+                    return 2
+                print(f"Loading {scale.as_dict()} ...", file=sys.stderr)
+                load_report = datagen.load(cursor, connection, scale, args.seed, args.batch_size)
+
+        if not args.no_migrate:
+            with db.borrow() as (cursor, connection):
+                success, result = migrations.migrate(cursor, connection, db.catalog)
+            if not success:
+                print(result, file=sys.stderr)
+                return 2
+
+        print(f"Timing with a {args.cache} entity cache ...", file=sys.stderr)
+        # Timed on a fresh thread: the load and migrations above are this
+        # thread's writes, and read-your-writes would keep its reads off
+        # the replicas
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            results = executor.submit(runner.run_benchmarks, db, scale, args.iterations, args.seed,
+                                      args.cache).result()
+        output = {
+            "meta": dict(runner.metadata(db, scale, args.seed, args.iterations, args.cache),
+                         migrated=not args.no_migrate),
+            "load": load_report,
+            "results": results,
+        }
+        if db.replicas:
+            output["replicas"] = db.replica_status()
+        if args.profile:
+            output["profile"] = profiler.snapshot()
+    finally:
+        db.close()
+
+    if args.profile_json:
+        with open(args.profile_json, "w", encoding="utf-8") as f:
+            json.dump(profiler.snapshot(), f, indent=2)
+
+    text = json.dumps(output, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("cache", "cold") != args.cache:
+            print(f"Baseline was timed with a {baseline['meta'].get('cache')} cache, this run with a "
+                  f"{args.cache} one.", file=sys.stderr)
+        headers = ["Operation", "Metric", "Baseline", "Current", "Change %"]
+        ui.print_table(headers, runner.compare(output, baseline))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
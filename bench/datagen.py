@@ -0,0 +1,147 @@
+"""Synthetic clinic data
+
+Deterministic row generators for Owner, Veterinarian, Animal, Appointment
+and Treatment, sized from a target appointment count. Rows carry explicit
+IDs so foreign keys line up without reading anything back. Columns follow
+the schema shipped in backends.SQLITE_SCHEMA.
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+
+import services
+
+
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie",
+               "Avery", "Quinn", "Drew", "Robin", "Kerry", "Dana", "Reese", "Skyler"]
+LAST_NAMES = ["Smith", "Garcia", "Nguyen", "Brown", "Patel", "Kim", "Lopez", "Miller",
+              "Davis", "Wilson", "Moore", "Clark", "Lewis", "Walker", "Young", "Hall"]
+PET_NAMES = ["Bella", "Max", "Luna", "Charlie", "Lucy", "Cooper", "Daisy", "Milo",
+             "Whiskers", "Rocky", "Coco", "Oreo", "Pepper", "Ginger", "Shadow", "Biscuit"]
+SPECIES = {
+    "Dog": ["Labrador", "Beagle", "Poodle", "Bulldog", "Mixed"],
+    "Cat": ["Siamese", "Maine Coon", "Persian", "Tabby", "Mixed"],
+    "Rabbit": ["Lop", "Rex", "Dutch"],
+    "Bird": ["Parakeet", "Cockatiel", "Canary"],
+}
+SPECIES_WEIGHTS = [50, 40, 6, 4]
+TREATMENT_TYPES = ["Annual Checkup", "Rabies Vaccine", "Distemper Vaccine", "Deworming",
+                   "Dental Cleaning", "Spay/Neuter", "X-Ray", "Blood Panel", "Flea Treatment",
+                   "Microchipping", "Nail Trim", "Allergy Shot", "Wound Care", "Ear Infection",
+                   "Skin Biopsy", "Ultrasound"]
+SPECIALTIES = ["General Practice", "Surgery", "Dentistry", "Dermatology", "Exotics", "Internal Medicine"]
+
+
+class Scale:
+    # Table sizes derived from the appointment count
+    def __init__(self, appointments, animals_per_owner=1.6, appointments_per_animal=6,
+                 appointments_per_vet=2000, years=5):
+        self.appointments = appointments
+        self.animals = max(1, round(appointments / appointments_per_animal))
+        self.owners = max(1, round(self.animals / animals_per_owner))
+        self.vets = max(3, round(appointments / appointments_per_vet))
+        self.years = years
+
+    def as_dict(self):
+        return {
+            "owners": self.owners,
+            "vets": self.vets,
+            "animals": self.animals,
+            "appointments": self.appointments,
+            "treatments": self.appointments,
+        }
+
+
+def owners(scale, seed):
+    rng = random.Random(f"{seed}-owners")
+    for owner_id in range(1, scale.owners + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield (
+            owner_id,
+            f"{first} {last}",
+            f"555-{rng.randrange(10000):04d}",
+            f"{first.lower()}.{last.lower()}{owner_id}@example.com",
+            f"{rng.randrange(1, 9999)} Main St",
+        )
+
+
+def vets(scale, seed):
+    rng = random.Random(f"{seed}-vets")
+    for vet_id in range(1, scale.vets + 1):
+        yield (
+            vet_id,
+            f"Dr. {rng.choice(LAST_NAMES)}",
+            rng.choice(SPECIALTIES),
+            f"555-{rng.randrange(10000):04d}",
+        )
+
+
+def animals(scale, seed):
+    rng = random.Random(f"{seed}-animals")
+    species_names = list(SPECIES)
+    today = datetime(2025, 1, 1)
+    for animal_id in range(1, scale.animals + 1):
+        species = rng.choices(species_names, SPECIES_WEIGHTS)[0]
+        dob = today - timedelta(days=rng.randrange(60, 15 * 365))
+        yield (
+            animal_id,
+            rng.choice(PET_NAMES),
+            species,
+            rng.choice(SPECIES[species]),
+            dob.strftime("%Y-%m-%d"),
+            rng.randrange(1, scale.owners + 1),
+        )
+
+
+def appointments(scale, seed):
+    rng = random.Random(f"{seed}-appointments")
+    start = datetime(2025, 1, 1) - timedelta(days=365 * scale.years)
+    span_minutes = 365 * scale.years * 24 * 60
+    for appt_id in range(1, scale.appointments + 1):
+        # Round to the half hour like a real booking calendar
+        when = start + timedelta(minutes=rng.randrange(span_minutes) // 30 * 30)
+        yield (
+            appt_id,
+            when.strftime("%Y-%m-%d %H:%M:%S"),
+            rng.randrange(1, scale.animals + 1),
+            rng.randrange(1, scale.vets + 1),
+        )
+
+
+def treatments(scale, seed):
+    rng = random.Random(f"{seed}-treatments")
+    # A few treatment types dominate, as in a real clinic
+    weights = [1 / (rank + 1) for rank in range(len(TREATMENT_TYPES))]
+    for appt_id in range(1, scale.appointments + 1):
+        yield (appt_id, appt_id, rng.choices(TREATMENT_TYPES, weights)[0])
+
+
+TABLES = [
+    ("Owner", ["OwnerID", "Oname", "Phone", "Email", "Address"], owners),
+    ("Veterinarian", ["VetID", "Vname", "Specialty", "Phone"], vets),
+    ("Animal", ["AnimalID", "Aname", "Species", "Breed", "DOB", "Animal_OwnerID"], animals),
+    ("Appointment", ["ApptID", "DateTime", "Scheduled_AnimalID", "Treating_VetID"], appointments),
+    ("Treatment", ["TreatmentID", "AppointmentID", "TreatmentType"], treatments),
+]
+
+
+def load(cursor, connection, scale, seed=42, batch_size=5000):
+    # Bulk-load every table in foreign-key order.
+    # Returns {table: {"rows", "seconds", "rows_per_sec"}} or raises on failure.
+    report = {}
+    for table, columns, generate in TABLES:
+        start = time.perf_counter()
+        success, result = services.bulk_insert(
+            cursor, connection, table, columns, generate(scale, seed),
+            batch_size=batch_size, commit_every=batch_size * 20
+        )
+        seconds = time.perf_counter() - start
+        if not success:
+            raise RuntimeError(f"Loading {table} failed: {result['errors'][:3]}")
+        report[table] = {
+            "rows": result["inserted"],
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(result["inserted"] / seconds) if seconds else None,
+        }
+    return report
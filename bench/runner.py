@@ -0,0 +1,144 @@
+"""Benchmark runner
+
+Times each `services` entry point over many iterations, borrowing a
+connection per call the way the application does, and summarises the
+latencies. `compare()` lines a run up against an earlier JSON result.
+
+Owner / Animal / Vet lookups go through `services.entity_cache`. A cold
+run (the default) clears it before every timed call, so the queries are
+measured. A warm run keeps it, as a long-running server would.
+"""
+
+import itertools
+import platform
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import query
+import services
+
+
+def summarize(samples):
+    # Latency summary in milliseconds
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    total = sum(ordered)
+    return {
+        "iterations": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "p50_ms": round(pct(50) * 1000, 4),
+        "p95_ms": round(pct(95) * 1000, 4),
+        "p99_ms": round(pct(99) * 1000, 4),
+        "min_ms": round(ordered[0] * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+        "ops_per_sec": round(len(ordered) / total, 1) if total else None,
+    }
+
+
+def _timed(db, iterations, prepare, call, readonly=False, cold=True):
+    # prepare(cursor) runs untimed and returns the arguments for call().
+    # readonly: borrow the way AsyncServices does for READ_ONLY_CALLS, so
+    # a replica may serve it. cold: empty the entity cache first.
+    samples = []
+    for _ in range(iterations):
+        with db.borrow(readonly=readonly) as (cursor, connection):
+            args = prepare(cursor)
+            if cold:
+                services.entity_cache.clear()
+            start = time.perf_counter()
+            call(cursor, connection, *args)
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run_benchmarks(db, scale, iterations=200, seed=42, cache="cold"):
+    rng = random.Random(f"{seed}-bench")
+    cold = cache == "cold"
+    booked = []
+
+    def random_animal(cursor):
+        animal_id = rng.randrange(1, scale.animals + 1)
+        owner_id = query.get_owner_of_animal(cursor, animal_id)[0]
+        return owner_id, animal_id
+
+    def first_page(cursor, connection):
+        next(services.view_table(cursor, "Appointment", page_size=100, catalog=db.catalog), None)
+
+    def full_scan(cursor, connection):
+        for _ in services.view_table(cursor, "Owner", page_size=1000, catalog=db.catalog):
+            pass
+
+    def pets(cursor, connection, owner_id):
+        services.list_pets_by_owner(cursor, owner_id)
+
+    def summary(cursor, connection, owner_id, animal_id):
+        services.get_appointment_summary(cursor, owner_id, animal_id)
+
+    # Distinct future slots, so no booking is rejected as a double booking
+    slots = (datetime(2030, 1, 1) + timedelta(minutes=30 * i) for i in itertools.count())
+
+    def schedule_args(cursor):
+        owner_id, animal_id = random_animal(cursor)
+        return owner_id, animal_id, rng.randrange(1, scale.vets + 1), next(slots)
+
+    def schedule(cursor, connection, owner_id, animal_id, vet_id, when):
+        success, result = services.schedule_appointment_and_treatment(
+            cursor, connection, owner_id, animal_id, vet_id, when.strftime("%Y-%m-%d %H:%M:%S"), "1"
+        )
+        if not success:
+            raise RuntimeError(f"schedule failed: {result}")
+        booked.append((result["ApptID"], animal_id))
+
+    def cancel(cursor, connection, appt_id, animal_id):
+        success, msg = services.cancel_appointment(cursor, connection, appt_id, animal_id)
+        if not success:
+            raise RuntimeError(f"cancel failed: {msg}")
+
+    def timed(n, prepare, call, readonly=False):
+        return _timed(db, n, prepare, call, readonly, cold)
+
+    scan_iterations = max(1, min(iterations, 5))
+    results = {
+        "view_table_first_page": timed(iterations, lambda c: (), first_page, readonly=True),
+        "view_table_full_owner_scan": timed(scan_iterations, lambda c: (), full_scan, readonly=True),
+        "list_pets_by_owner": timed(
+            iterations, lambda c: (rng.randrange(1, scale.owners + 1),), pets, readonly=True),
+        "get_appointment_summary": timed(iterations, random_animal, summary, readonly=True),
+        "schedule_appointment_and_treatment": timed(iterations, schedule_args, schedule),
+        "cancel_appointment": timed(iterations, lambda c: booked.pop(), cancel),
+    }
+    return {name: summarize(samples) for name, samples in results.items()}
+
+
+def metadata(db, scale, seed, iterations, cache="cold"):
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "backend": db.backend_name,
+        "database": db.database,
+        "replicas": db.replica_hosts,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "iterations": iterations,
+        "cache": cache,
+        "scale": scale.as_dict(),
+    }
+
+
+def compare(current, baseline):
+    # [(operation, metric, baseline, current, change %)] for p50/p95
+    rows = []
+    for op, stats in current["results"].items():
+        before = baseline.get("results", {}).get(op)
+        if not before:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            old, new = before[metric], stats[metric]
+            change = round((new - old) / old * 100, 1) if old else None
+            rows.append((op, metric, old, new, change))
+    return rows
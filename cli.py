@@ -0,0 +1,420 @@
+"""Command-line entry point
+
+Non-interactive commands for scripted jobs, dispatched from main.py when
+it is given arguments:
+
+    python main.py import Owner owners.csv --backend sqlite --database vetclinic.db
+
+Each command connects with the same defaults as the interactive menu.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from Database import Database
+import advisor
+import archive
+import batch
+import exporter
+import importer
+import migrations
+import profiling
+import reports
+import server
+import services
+import shards
+import ui
+
+
+def profiling_args():
+    parent = argparse.ArgumentParser(add_help=False)
+    prof = parent.add_argument_group("profiling")
+    prof.add_argument("--profile", action="store_true", help="print per-query stats when done")
+    prof.add_argument("--profile-json", metavar="PATH", help="write per-query stats to a JSON file")
+    prof.add_argument("--slow-ms", type=float, default=500, help="slow-query threshold")
+    prof.add_argument("--slow-log", metavar="PATH", help="append slow statements to this file")
+    prof.add_argument("--explain", action="store_true", help="log EXPLAIN plans for slow SELECTs")
+    return parent
+
+
+def connection_args(prof):
+    parent = argparse.ArgumentParser(add_help=False, parents=[prof])
+    group = parent.add_argument_group("connection")
+    group.add_argument("--backend", choices=["mysql", "sqlite"], default="mysql")
+    group.add_argument("--host", default="localhost")
+    group.add_argument("--database", default="vetclinic",
+                       help="database name (MySQL) or file path (SQLite)")
+    group.add_argument("--user", default="root")
+    group.add_argument("--password", default="Panthers1!")
+    group.add_argument("--replica", action="append", default=[], metavar="HOST",
+                       help="read replica host (SQLite: file path); repeat for several")
+    group.add_argument("--replica-policy", choices=["round-robin", "least-latency"], default="round-robin")
+    group.add_argument("--max-replica-lag", type=float, default=5.0, metavar="SECONDS",
+                       help="skip replicas further behind the primary than this")
+    return parent
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="main.py", description="Vet clinic command-line tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    prof = profiling_args()
+    conn = connection_args(prof)
+
+    p = commands.add_parser("import", parents=[conn], help="bulk-load a CSV or JSONL file into a table")
+    p.add_argument("table")
+    p.add_argument("file")
+    p.add_argument("--batch-size", type=int, default=1000, help="rows per INSERT batch")
+    p.add_argument("--commit-every", type=int, default=10000, help="rows per commit")
+    p.set_defaults(handler=cmd_import)
+
+    p = commands.add_parser("batch", parents=[conn], help="run JSON command records (JSONL) through the services layer")
+    p.add_argument("file", help="JSONL command file, or - for stdin")
+    p.add_argument("--out", metavar="PATH", help="write JSONL results here (default: stdout)")
+    p.add_argument("--commit-every", type=int, default=100, help="commands per commit")
+    p.add_argument("--stop-on-error", action="store_true", help="stop at the first failed command")
+    p.set_defaults(handler=cmd_batch)
+
+    p = commands.add_parser("export", parents=[conn], help="stream a table or the appointment summary to a file")
+    p.add_argument("source", help=f"table name, or '{exporter.SUMMARY}' for the appointment summary join")
+    p.add_argument("file", help="output path; the extension picks the format (.csv, .jsonl, .parquet, .arrow, + .gz/.zst)")
+    p.add_argument("--format", choices=exporter.FORMATS, help="override the format implied by the file name")
+    p.add_argument("--compress", choices=exporter.COMPRESSIONS + ("none",), help="override the compression implied by the file name")
+    p.add_argument("--batch-size", type=int, default=5000, help="rows fetched and written per batch")
+    p.add_argument("--animal-id", help="summary only: export one animal")
+    p.add_argument("--quiet", action="store_true", help="no progress indicator")
+    p.add_argument("--workers", type=int, default=1,
+                   help="split the primary key into ranges and export them in this many processes")
+    p.add_argument("--parts", action="store_true",
+                   help="with --workers: keep one numbered file per range instead of joining them")
+    p.add_argument("--verify", action="store_true", help="check the rows written against COUNT(*)")
+    p.set_defaults(handler=cmd_export)
+
+    p = commands.add_parser("report", parents=[conn], help="run a clinic report")
+    p.add_argument("name", choices=list(reports.REPORTS))
+    p.add_argument("--start", help="first day, YYYY-MM-DD (default: all history)")
+    p.add_argument("--end", help="last day, YYYY-MM-DD (default: all history)")
+    p.add_argument("--limit", type=int, default=50, help="owner-visits: number of owners")
+    p.add_argument("--json", action="store_true", help="print the report as JSON")
+    p.add_argument("--include-archive", action="store_true", help="also count archived appointments")
+    p.set_defaults(handler=cmd_report)
+
+    p = commands.add_parser("bulk-update", parents=[conn], help="apply row updates from a CSV or JSONL file")
+    p.add_argument("table")
+    p.add_argument("file", help="CSV (every column is set) or JSONL (each record sets the fields it names)")
+    p.add_argument("--key", help="column identifying rows (default: the primary key)")
+    p.add_argument("--chunk-size", type=int, default=200, help="rows per UPDATE statement")
+    p.set_defaults(handler=cmd_bulk_update)
+
+    p = commands.add_parser("cancel", parents=[conn], help="cancel many appointments in one transaction")
+    which = p.add_mutually_exclusive_group(required=True)
+    which.add_argument("--ids", help="comma-separated appointment IDs")
+    which.add_argument("--vet", metavar="VET_ID", help="a vet's appointments between --start and --end")
+    which.add_argument("--animal", metavar="ANIMAL_ID", help="an animal's upcoming appointments")
+    p.add_argument("--start", help="YYYY-MM-DD [HH:MM] (default: now)")
+    p.add_argument("--end", help="YYYY-MM-DD [HH:MM]; a date alone includes that day")
+    p.set_defaults(handler=cmd_cancel)
+
+    p = commands.add_parser("archive", parents=[conn], help="move old appointments into per-year archive tables")
+    when = p.add_mutually_exclusive_group(required=True)
+    when.add_argument("--before", help="archive appointments dated before this day (YYYY-MM-DD)")
+    when.add_argument("--older-than-days", type=int, help="archive appointments older than this many days")
+    p.add_argument("--batch-size", type=int, default=1000, help="appointments per transaction")
+    p.add_argument("--max-batches", type=int, help="stop after this many batches (run again to resume)")
+    p.set_defaults(handler=cmd_archive)
+
+    p = commands.add_parser("shards", parents=[prof], help="query every clinic branch of a shard map at once")
+    p.add_argument("map", help="JSON shard map (see shards.py)")
+    actions = p.add_subparsers(dest="action", required=True)
+    actions.add_parser("tables", help="list tables and the branches that have them")
+    a = actions.add_parser("view", help="print a table from every branch, in primary-key order")
+    a.add_argument("table")
+    a.add_argument("--limit", type=int, default=100, help="rows to print")
+    a = actions.add_parser("owners", help="look up owners by ID range")
+    a.add_argument("first_id", type=int)
+    a.add_argument("last_id", type=int)
+    a = actions.add_parser("report", help="run a clinic report over every branch")
+    a.add_argument("name", choices=list(reports.REPORTS))
+    a.add_argument("--start", help="first day, YYYY-MM-DD (default: all history)")
+    a.add_argument("--end", help="last day, YYYY-MM-DD (default: all history)")
+    a.add_argument("--limit", type=int, default=50, help="owner-visits: number of owners")
+    a.add_argument("--json", action="store_true", help="print the report as JSON")
+    a.add_argument("--include-archive", action="store_true", help="also count archived appointments")
+    p.set_defaults(handler=cmd_shards)
+
+    p = commands.add_parser("migrate", parents=[conn], help="apply pending schema migrations")
+    p.add_argument("--check", action="store_true", help="only report pending migrations and missing indexes")
+    p.add_argument("--target", type=int, help="stop after this migration version")
+    p.set_defaults(handler=cmd_migrate)
+
+    p = commands.add_parser("advise", parents=[conn], help="EXPLAIN the hot queries and flag full scans")
+    p.add_argument("--json", action="store_true", help="print the full report as JSON")
+    p.set_defaults(handler=cmd_advise)
+
+    p = commands.add_parser("serve", parents=[conn], help="run the HTTP/JSON API")
+    p.add_argument("--bind", default="127.0.0.1", help="address to listen on")
+    p.add_argument("--port", type=int, default=8080)
+    p.add_argument("--workers", type=int, default=8, help="request worker threads (and pooled connections)")
+    p.set_defaults(handler=cmd_serve, pooled=True)
+
+    return parser
+
+
+def connect(args):
+    # `shards` talks to every branch of a shard map instead of one database
+    if args.command == "shards":
+        try:
+            router = shards.load_shard_map(args.map)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"[DB ERROR] Bad shard map: {e}")
+            return None
+        if not router.connect():
+            router.close()
+            return None
+        return router
+
+    # Commands serving concurrent requests get one pooled connection per worker
+    pool_size = args.workers if getattr(args, "pooled", False) else None
+    db = Database(args.host, args.database, args.user, args.password,
+                  pool_size=pool_size, backend=args.backend, replicas=args.replica,
+                  replica_policy=args.replica_policy, max_replica_lag=args.max_replica_lag)
+    if not db.connect():
+        return None
+    return db
+
+
+# ======================================================
+#                     COMMANDS
+# ======================================================
+
+def cmd_import(db, args):
+    with db.borrow() as (cursor, connection):
+        success, report = importer.import_file(
+            cursor, connection, args.table, args.file,
+            batch_size=args.batch_size, commit_every=args.commit_every
+        )
+    ui.print_import_report(report)
+    return 0 if success else 1
+
+
+def cmd_batch(db, args):
+    try:
+        source = batch.open_input(args.file)
+    except OSError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        with source:
+            stats = batch.run_batch(db, source, out, commit_every=max(1, args.commit_every),
+                                    stop_on_error=args.stop_on_error)
+    finally:
+        if args.out:
+            out.close()
+
+    rate = stats["commands"] / stats["seconds"] if stats["seconds"] else 0
+    print(f"{stats['commands']} commands: {stats['succeeded']} succeeded, {stats['failed']} failed "
+          f"in {stats['seconds']} s ({rate:,.0f}/s).", file=sys.stderr)
+    return 0 if not stats["failed"] else 1
+
+
+def cmd_export(db, args):
+    progress = None if args.quiet else ui.ExportProgress()
+    if args.workers > 1 or args.parts:
+        if args.animal_id:
+            print("--animal-id cannot be combined with --workers/--parts.")
+            return 2
+        success, result = exporter.parallel_export(
+            db, args.source, args.file, workers=args.workers, merge=not args.parts,
+            verify=args.verify, fmt=args.format, compression=args.compress,
+            batch_size=args.batch_size, progress=progress
+        )
+        ui.print_export_result(success, result)
+        return 0 if success else 1
+
+    # Unbuffered, so large results stream instead of loading client-side
+    with db.borrow(buffered=False, readonly=True) as (cursor, connection):
+        success, result = exporter.export(
+            cursor, args.source, args.file, animal_id=args.animal_id, catalog=db.catalog,
+            fmt=args.format, compression=args.compress, batch_size=args.batch_size,
+            progress=progress
+        )
+    if success and args.verify:
+        with db.borrow(readonly=True) as (cursor, connection):
+            expected = exporter.expected_rows(cursor, args.source, args.animal_id)
+        result["expected"] = expected
+        if expected != result["rows"]:
+            success, result = False, f"Row count mismatch: wrote {result['rows']} rows, source has {expected}."
+    ui.print_export_result(success, result)
+    return 0 if success else 1
+
+
+def cmd_report(db, args):
+    options = {"limit": args.limit} if args.name == "owner-visits" else {}
+    with db.borrow(readonly=True) as (cursor, connection):
+        success, result = reports.run_report(cursor, args.name, args.start, args.end,
+                                             include_archive=args.include_archive, **options)
+
+    if not success:
+        print(result)
+        return 1
+    if args.json:
+        print(json.dumps(result, indent=2, default=str))
+    else:
+        ui.print_report(result)
+    return 0
+
+
+def cmd_shards(router, args):
+    if args.action == "tables":
+        ui.print_table(["Table", "Branches"], [(t, ", ".join(names)) for t, names in router.list_tables()])
+        return 0
+
+    if args.action == "owners":
+        columns, rows = router.owners_in_range(args.first_id, args.last_id)
+        ui.print_table(columns, rows)
+        return 0
+
+    if args.action == "view":
+        try:
+            columns = router.table_columns(args.table)
+            rows = []
+            for page in router.view_table(args.table):
+                rows.extend(page)
+                if args.limit is not None and len(rows) >= args.limit:
+                    rows = rows[:args.limit]
+                    break
+        except Exception as e:
+            print(f"Cannot read {args.table}: {e}")
+            return 1
+        ui.print_table(columns, rows)
+        return 0
+
+    options = {"limit": args.limit} if args.name == "owner-visits" else {}
+    success, result = reports.run_sharded_report(router, args.name, args.start, args.end,
+                                                 include_archive=args.include_archive, **options)
+    if not success:
+        print(result)
+        return 1
+    if args.json:
+        print(json.dumps(result, indent=2, default=str))
+    else:
+        ui.print_report(result)
+    return 0
+
+
+def cmd_bulk_update(db, args):
+    started = time.perf_counter()
+    with db.borrow() as (cursor, connection):
+        success, report = importer.update_file(cursor, connection, args.table, args.file, key=args.key,
+                                               chunk_size=max(1, args.chunk_size), catalog=db.catalog)
+    if not success:
+        print(report)
+        return 1
+    ui.print_update_report(report, time.perf_counter() - started)
+    return 0 if not report["failed"] else 1
+
+
+def cmd_cancel(db, args):
+    if args.ids:
+        criteria = {"appt_ids": [i.strip() for i in args.ids.split(",") if i.strip()]}
+    else:
+        criteria = {"vet_id": args.vet, "animal_id": args.animal, "start": args.start, "end": args.end}
+
+    with db.borrow() as (cursor, connection):
+        success, results = services.cancel_appointments(cursor, connection, **criteria)
+
+    if not success:
+        print(results)
+        return 1
+    ui.print_cancel_results(results)
+    return 0 if all(r["success"] for r in results) else 1
+
+
+def cmd_archive(db, args):
+    before = args.before or archive.horizon(args.older_than_days)
+
+    def progress(result):
+        print(f"\r{result['appointments']:,} appointments archived", end="", file=sys.stderr, flush=True)
+
+    with db.borrow() as (cursor, connection):
+        success, result = archive.archive_before(
+            cursor, connection, before, batch_size=args.batch_size,
+            max_batches=args.max_batches, catalog=db.catalog, progress=progress
+        )
+    print(file=sys.stderr)
+
+    if not success:
+        print(result)
+        return 1
+    years = ", ".join(str(y) for y in result["years"]) or "none"
+    print(f"Archived {result['appointments']} appointments and {result['treatments']} treatments "
+          f"before {before} in {result['batches']} batches (years: {years}).")
+    return 0
+
+
+def cmd_migrate(db, args):
+    with db.borrow() as (cursor, connection):
+        if args.check:
+            todo = migrations.pending(cursor)
+            indexes = migrations.check_indexes(cursor)
+            connection.commit()
+
+            print("\nPending migrations:" if todo else "\nNo pending migrations.")
+            for version, description in todo:
+                print(f"  {version}: {description}")
+            ui.print_table(["Table", "Index", "Columns", "Present"],
+                           [(t, name, ", ".join(cols), "yes" if ok else "NO") for t, name, cols, ok in indexes])
+            return 1 if todo or not all(i[3] for i in indexes) else 0
+
+        success, result = migrations.migrate(cursor, connection, db.catalog, args.target)
+
+    if not success:
+        print(result)
+        return 1
+    print("\n".join(f"Applied {step}" for step in result) if result else "Schema is up to date.")
+    return 0
+
+
+def cmd_advise(db, args):
+    with db.borrow() as (cursor, connection):
+        report = advisor.advise(cursor)
+
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        ui.print_table(["Query", "Full scans", "SQL"],
+                       [(r["query"], ", ".join(r["full_scans"]) or "-", r["sql"][:70]) for r in report])
+    return 1 if any(r["full_scans"] for r in report) else 0
+
+
+def cmd_serve(db, args):
+    report = server.serve(db, args.bind, args.port, args.workers)
+    ui.print_server_stats(report)
+    return 0
+
+
+def run(argv=None):
+    args = build_parser().parse_args(argv)
+
+    profiler = profiling.profiler
+    if args.profile or args.profile_json or args.slow_log:
+        profiler.enable(slow_ms=args.slow_ms, slow_log_path=args.slow_log, explain=args.explain)
+
+    db = connect(args)
+    if not db:
+        print("Connection failed.", file=sys.stderr)
+        return 2
+
+    try:
+        return args.handler(db, args)
+    finally:
+        db.close()
+        if args.profile:
+            ui.print_query_stats(profiler.snapshot(), profiler.enabled)
+            ui.print_cache_stats(services.cache_stats())
+        if args.profile_json:
+            with open(args.profile_json, "w", encoding="utf-8") as f:
+                json.dump(profiler.snapshot(), f, indent=2)
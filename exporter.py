@@ -0,0 +1,425 @@
+"""Streaming export
+
+Writes a table, or the appointment summary join, to CSV, JSONL, Parquet
+or Arrow. Rows are fetched a batch at a time and written as they arrive.
+Memory use stays flat however big the export is (use an unbuffered
+cursor on MySQL).
+
+- CSV: header row, then one line per row; NULL becomes an empty cell,
+  so files round-trip through `importer`.
+- JSONL: one object per line.
+- Parquet / Arrow: one row group / record batch per fetched batch
+  (needs pyarrow).
+
+CSV and JSONL can be gzip- or zstd-compressed (zstd needs the
+`zstandard` package). Parquet and Arrow compress internally. The format
+and compression follow the file name (`appointments.csv.gz`,
+`summary.parquet`) unless given. Output goes to `<path>.part` and is
+renamed into place once complete.
+
+`parallel_export` splits a table on its integer primary key (ApptID for
+the summary) and exports the ranges in separate processes, each with its
+own connection, then joins the parts or leaves them as numbered files.
+"""
+
+import csv
+import gzip
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Database import Database
+import query
+import records
+import services
+
+
+FORMATS = ("csv", "jsonl", "parquet", "arrow")
+COMPRESSIONS = ("gzip", "zstd")
+
+# Pseudo-table name for the appointment summary join
+SUMMARY = "summary"
+
+_EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "jsonl",
+               ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+_COMPRESSED = {".gz": "gzip", ".zst": "zstd"}
+
+
+def detect_format(path):
+    # (format, compression) from the file name, e.g. "x.csv.gz" -> ("csv", "gzip")
+    stem, ext = os.path.splitext(path.lower())
+    compression = _COMPRESSED.get(ext)
+    if compression:
+        ext = os.path.splitext(stem)[1]
+    return _EXTENSIONS.get(ext, "csv"), compression
+
+
+# ======================================================
+#                      WRITERS
+# ======================================================
+
+class CsvWriter:
+    def __init__(self, f, columns, header=True):
+        self.f = f
+        self.out = csv.writer(f)
+        if header:
+            self.out.writerow(columns)
+
+    def write(self, rows):
+        # csv already writes None as "" and dates in ISO form
+        self.out.writerows(rows)
+
+    def close(self):
+        self.f.close()
+
+
+class JsonlWriter:
+    def __init__(self, f, columns):
+        self.f = f
+        self.columns = columns
+
+    def write(self, rows):
+        self.f.writelines(json.dumps(dict(zip(self.columns, row)), default=records.json_default) + "\n" for row in rows)
+
+    def close(self):
+        self.f.close()
+
+
+class ArrowWriter:
+    # Parquet or Arrow IPC. The schema is inferred from the first batch;
+    # columns that were all NULL there are written as strings.
+    def __init__(self, path, columns, fmt, compression):
+        try:
+            import pyarrow
+        except ImportError:
+            raise ValueError(f"{fmt} export needs pyarrow (pip install pyarrow).")
+        self.pa = pyarrow
+        self.path = path
+        self.columns = columns
+        self.fmt = fmt
+        self.compression = compression
+        self.schema = None
+        self.writer = None
+
+    def write(self, rows):
+        pa = self.pa
+        data = {c: [row[i] for row in rows] for i, c in enumerate(self.columns)}
+
+        if self.schema is None:
+            inferred = pa.Table.from_pydict(data).schema
+            self.schema = pa.schema([pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f
+                                     for f in inferred])
+            self._open()
+
+        for field in self.schema:
+            if pa.types.is_string(field.type):
+                data[field.name] = [v if v is None or isinstance(v, str) else records.json_default(v)
+                                    for v in data[field.name]]
+        self.writer.write_table(pa.Table.from_pydict(data, schema=self.schema))
+
+    def _open(self):
+        if self.fmt == "parquet":
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(self.path, self.schema, compression=self.compression or "snappy")
+        else:
+            import pyarrow.ipc as ipc
+            options = ipc.IpcWriteOptions(compression=self.compression) if self.compression else None
+            self.writer = ipc.new_file(self.path, self.schema, options=options)
+
+    def close(self):
+        if self.writer is None and self.columns:
+            # No rows at all: still write a valid, empty file
+            self.schema = self.pa.schema([self.pa.field(c, self.pa.string()) for c in self.columns])
+            self._open()
+        if self.writer is not None:
+            self.writer.close()
+
+
+def open_writer(path, columns, fmt, compression=None, header=True):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if compression and compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression}")
+
+    if fmt in ("parquet", "arrow"):
+        if fmt == "arrow" and compression == "gzip":
+            raise ValueError("Arrow files support zstd compression, not gzip.")
+        return ArrowWriter(path, columns, fmt, compression)
+
+    f = _open_text(path, compression)
+    return CsvWriter(f, columns, header) if fmt == "csv" else JsonlWriter(f, columns)
+
+
+def _open_text(path, compression):
+    if compression == "gzip":
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd compression needs the zstandard package (pip install zstandard).")
+        return zstandard.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+# ======================================================
+#                      EXPORTS
+# ======================================================
+
+def export_table(cursor, table_name, path, fmt=None, compression=None, batch_size=5000,
+                 progress=None, catalog=None):
+    # Stream a whole table (keyset pages when it has a single-column key).
+    # Returns (success, report_or_message).
+    try:
+        total = query.count_rows(cursor, table_name) if progress else None
+    except Exception as e:
+        return False, str(e)
+    pages = services.view_table(cursor, table_name, page_size=batch_size, catalog=catalog)
+    return _export(cursor, pages, path, fmt, compression, progress, total)
+
+
+def export_summary(cursor, path, animal_id=None, fmt=None, compression=None, batch_size=5000,
+                   progress=None):
+    # Stream the appointment/treatment/vet summary join for every animal (or one)
+    pages = _summary_pages(cursor, animal_id, batch_size)
+    return _export(cursor, pages, path, fmt, compression, progress, None)
+
+
+def export(cursor, source, path, animal_id=None, catalog=None, **options):
+    # `source` is a table name or SUMMARY
+    if source.lower() == SUMMARY:
+        return export_summary(cursor, path, animal_id=animal_id, **options)
+    return export_table(cursor, source, path, catalog=catalog, **options)
+
+
+def expected_rows(cursor, source, animal_id=None):
+    # Row count an export of `source` should produce, for verification
+    if source.lower() == SUMMARY:
+        return query.count_appointment_summaries(cursor, animal_id)
+    return query.count_rows(cursor, source)
+
+
+def _summary_pages(cursor, animal_id, batch_size, appt_range=None):
+    query.select_appointment_summaries(cursor, animal_id, appt_range)
+    batches = query.fetch_batches(cursor, batch_size)
+    try:
+        yield from batches
+    finally:
+        # Drain rows left behind if the export stopped early
+        for _ in batches:
+            pass
+
+
+def _resolve_format(path, fmt, compression):
+    detected_fmt, detected_compression = detect_format(path)
+    fmt = fmt or detected_fmt
+    compression = compression if compression is not None else detected_compression
+    return fmt, (None if compression == "none" else compression)
+
+
+def _export(cursor, pages, path, fmt, compression, progress, total, header=True):
+    fmt, compression = _resolve_format(path, fmt, compression)
+
+    started = time.perf_counter()
+    part = path + ".part"
+    writer = None
+    rows = 0
+    try:
+        # The first page runs the query, which sets cursor.description
+        first = next(pages, [])
+        columns = [d[0] for d in cursor.description or []]
+        writer = open_writer(part, columns, fmt, compression, header)
+
+        page = first
+        while page:
+            writer.write(page)
+            rows += len(page)
+            if progress:
+                progress(rows, total)
+            page = next(pages, None)
+
+        writer.close()
+        writer = None
+        os.replace(part, path)
+    except Exception as e:
+        if writer is not None:
+            try:
+                writer.close()
+            except Exception:
+                pass
+        if os.path.exists(part):
+            os.remove(part)
+        return False, str(e)
+    finally:
+        pages.close()
+
+    return True, {
+        "path": path,
+        "format": fmt,
+        "compression": compression,
+        "rows": rows,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+# ======================================================
+#                  PARALLEL EXPORT
+# ======================================================
+
+def parallel_export(db, source, path, workers=4, merge=True, verify=True, fmt=None,
+                    compression=None, batch_size=5000, progress=None):
+    # Split `source` into primary-key ranges (ApptID for SUMMARY) and export
+    # each range in its own process over its own connection. The parts are
+    # then concatenated into `path` (CSV/JSONL) or, with merge=False, left
+    # as numbered files next to it. verify compares the rows written with
+    # a COUNT(*) taken up front. Returns (success, report_or_message).
+    if db.backend_name == "sqlite" and db.database == ":memory:":
+        return False, "Parallel export needs a database other processes can open (not :memory:)."
+
+    fmt, compression = _resolve_format(path, fmt, compression)
+    if merge and fmt not in ("csv", "jsonl"):
+        return False, f"{fmt} parts cannot be concatenated; export them as separate parts."
+
+    started = time.perf_counter()
+    try:
+        with db.borrow() as (cursor, connection):
+            table, pk_col = _range_key(cursor, source, db.catalog)
+            low, high = query.get_key_range(cursor, table, pk_col)
+            total = expected_rows(cursor, source) if verify or progress else None
+    except Exception as e:
+        return False, str(e)
+
+    if low is not None and not (isinstance(low, int) and isinstance(high, int)):
+        return False, f"{table}.{pk_col} is not an integer key; use a serial export."
+
+    ranges = key_ranges(low, high, workers) if low is not None else [(0, -1)]
+    settings = {"host": db.host, "database": db.database, "user": db.user,
+                "password": db.password, "backend": db.backend_name}
+    parts = [_part_path(path, i, len(ranges)) for i in range(len(ranges))]
+
+    results = [None] * len(ranges)
+    done = 0
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        futures = {
+            pool.submit(_export_range, settings, source, pk_col, lo, hi, parts[i],
+                        fmt, compression, batch_size, not merge or i == 0): i
+            for i, (lo, hi) in enumerate(ranges)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                results[i] = (False, str(e))
+            if results[i][0]:
+                done += results[i][1]["rows"]
+                if progress:
+                    progress(done, total)
+
+    failed = [msg for success, msg in results if not success]
+    if failed:
+        _remove(parts)
+        return False, failed[0]
+
+    if merge:
+        try:
+            _concatenate(parts, path)
+        except OSError as e:
+            _remove(parts + [path + ".part"])
+            return False, str(e)
+        _remove(parts)
+
+    report = {
+        "path": path,
+        "format": fmt,
+        "compression": compression,
+        "rows": done,
+        "seconds": round(time.perf_counter() - started, 3),
+        "workers": workers,
+        "parts": [] if merge else parts,
+        "expected": total if verify else None,
+    }
+    if verify and done != total:
+        return False, f"Row count mismatch: wrote {done} rows, source has {total}."
+    return True, report
+
+
+def key_ranges(low, high, parts):
+    # Split the inclusive integer range [low, high] into at most `parts`
+    # contiguous, non-overlapping inclusive ranges
+    span = high - low + 1
+    parts = max(1, min(parts, span))
+    step, extra = divmod(span, parts)
+    ranges = []
+    start = low
+    for i in range(parts):
+        end = start + step - 1 + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end + 1
+    return ranges
+
+
+def _range_key(cursor, source, catalog):
+    # (table, key column) to split on
+    if source.lower() == SUMMARY:
+        return "Appointment", "ApptID"
+    pk_cols = services.get_primary_key(cursor, source, catalog)
+    if len(pk_cols) != 1:
+        raise ValueError(f"{source} has no single-column primary key; use a serial export.")
+    return source, pk_cols[0]
+
+
+def _export_range(settings, source, pk_col, low, high, path, fmt, compression, batch_size, header):
+    # Runs in a worker process: open a connection and export one key range
+    db = Database(**settings)
+    if not db.connect():
+        return False, "Connection failed."
+    try:
+        with db.borrow(buffered=False) as (cursor, connection):
+            if source.lower() == SUMMARY:
+                pages = _summary_pages(cursor, None, batch_size, (low, high))
+            else:
+                pages = _range_pages(cursor, source, pk_col, low, high, batch_size)
+            return _export(cursor, pages, path, fmt, compression, None, None, header)
+    finally:
+        db.close()
+
+
+def _range_pages(cursor, table_name, pk_col, low, high, batch_size):
+    last, key_idx = low - 1, None
+    while True:
+        rows = query.select_page(cursor, table_name, pk_col, last, batch_size, upto=high)
+        if not rows:
+            return
+        if key_idx is None:
+            key_idx = [d[0] for d in cursor.description].index(pk_col)
+        yield rows
+        last = rows[-1][key_idx]
+
+
+def _part_path(path, index, count):
+    # "out.csv.gz" -> "out.part003.csv.gz"
+    base, ext = os.path.splitext(path)
+    if ext.lower() in _COMPRESSED:
+        base, inner = os.path.splitext(base)
+        ext = inner + ext
+    return f"{base}.part{index:0{max(3, len(str(count)))}d}{ext}"
+
+
+def _concatenate(parts, path):
+    # Byte-level join: valid for CSV/JSONL, including gzip and zstd
+    # streams, which allow several members/frames per file
+    tmp = path + ".part"
+    with open(tmp, "wb") as out:
+        for part in parts:
+            with open(part, "rb") as f:
+                shutil.copyfileobj(f, out, 1024 * 1024)
+    os.replace(tmp, path)
+
+
+def _remove(paths):
+    for p in paths:
+        if os.path.exists(p):
+            os.remove(p)
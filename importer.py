@@ -0,0 +1,135 @@
+"""Bulk import
+
+Reads CSV or JSONL files as a stream of rows and hands them to
+`services.bulk_insert`. Files are never loaded into memory whole.
+
+- CSV: the header row names the columns; empty cells become NULL.
+- JSONL: one object per line; the first object's keys name the columns.
+
+`update_file` reads the same formats as row updates keyed by the primary
+key (or `key`) and hands them to `services.update_rows`. A CSV row sets
+every column in the file, while a JSONL record sets only the fields it
+names.
+"""
+
+import csv
+import json
+
+import services
+
+
+def read_csv(path):
+    # Return (columns, row iterator)
+    f = open(path, newline="", encoding="utf-8")
+    reader = csv.reader(f)
+    columns = next(reader, [])
+
+    def rows():
+        with f:
+            for record in reader:
+                if record:
+                    yield [value if value != "" else None for value in record]
+
+    return columns, rows()
+
+
+def read_jsonl(path):
+    # Return (columns, row iterator)
+    f = open(path, encoding="utf-8")
+    first = None
+    line_no = 0
+    for line in f:
+        line_no += 1
+        if line.strip():
+            first = json.loads(line)
+            break
+
+    if first is None:
+        f.close()
+        return [], iter(())
+
+    columns = list(first.keys())
+
+    def rows():
+        nonlocal line_no
+        with f:
+            yield [first.get(c) for c in columns]
+            for line in f:
+                line_no += 1
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"line {line_no}: {e}")
+                yield [record.get(c) for c in columns]
+
+    return columns, rows()
+
+
+def read_file(path):
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        return read_jsonl(path)
+    return read_csv(path)
+
+
+def read_changes(path, key):
+    # Yield (key value, {column: value}) update records
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        return _jsonl_changes(path, key)
+
+    columns, rows = read_csv(path)
+    if key not in columns:
+        raise ValueError(f"The header has no {key} column.")
+    key_idx = columns.index(key)
+    return ((row[key_idx], {c: v for i, (c, v) in enumerate(zip(columns, row)) if i != key_idx})
+            for row in rows)
+
+
+def _jsonl_changes(path, key):
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"line {line_no}: {e}")
+            if not isinstance(record, dict) or key not in record:
+                raise ValueError(f"line {line_no}: no {key} field")
+            yield record.pop(key), record
+
+
+def update_file(cursor, connection, table_name, path, key=None, chunk_size=200, catalog=None):
+    # Returns services.update_rows's (success, report)
+    table = services.resolve_table(cursor, table_name, catalog)
+    if table is None:
+        return False, f"Unknown table: {table_name}"
+    if key is None:
+        pk_cols = services.get_primary_key(cursor, table, catalog)
+        if len(pk_cols) != 1:
+            return False, f"{table} has no single-column primary key; pass a key column."
+        key = pk_cols[0]
+
+    try:
+        changes = read_changes(path, key)
+    except (OSError, ValueError) as e:
+        return False, str(e)
+    return services.update_rows(cursor, connection, table, changes, pk_column=key,
+                                chunk_size=chunk_size, catalog=catalog)
+
+
+def import_file(cursor, connection, table_name, path, batch_size=1000, commit_every=10000):
+    # Returns services.bulk_insert's (success, report)
+    try:
+        columns, rows = read_file(path)
+    except (OSError, ValueError) as e:
+        return False, {"inserted": 0, "failed": 0,
+                       "errors": [{"first_row": None, "last_row": None, "error": str(e)}]}
+
+    if not columns:
+        return False, {"inserted": 0, "failed": 0,
+                       "errors": [{"first_row": None, "last_row": None, "error": "File is empty."}]}
+
+    return services.bulk_insert(cursor, connection, table_name, columns, rows,
+                                batch_size=batch_size, commit_every=commit_every)
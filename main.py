@@ -2,23 +2,44 @@
 
 Thin controller / entry point.
 - Presents the interactive menu and delegates work to `ui` and `services`.
+- With command-line arguments, runs a non-interactive command (see `cli`).
 """
 
+import sys
+
 from Database import Database
+import cli
+import exporter
+import importer
+import profiling
+import reports
 import ui
 import services
 
+# rows fetched and printed per page in "View Table"
+VIEW_PAGE_SIZE = 50
+
+# menu actions that only read, so they may run on a read replica
+# (view, summary, pets, export, reports, dashboard)
+READ_ONLY_CHOICES = ("1", "5", "7", "11", "12", "13")
+
 
 # Prompt user until a DB connection is successful
 def establish_connection_ui():
     while True:
         print("\nEnter database login details:")
-        host = ui.prompt("Host", "localhost")
-        dbname = ui.prompt("Database name", "vetclinic")
-        user = ui.prompt("User", "root")
-        password = ui.prompt("Password", "Panthers1!")
+        backend = ui.prompt("Backend (mysql/sqlite)", "mysql")
 
-        db = Database(host, dbname, user, password)
+        if backend == "sqlite":
+            path = ui.prompt("Database file", "vetclinic.db")
+            db = Database(database=path, backend="sqlite")
+        else:
+            host = ui.prompt("Host", "localhost")
+            dbname = ui.prompt("Database name", "vetclinic")
+            user = ui.prompt("User", "root")
+            password = ui.prompt("Password", "Panthers1!")
+
+            db = Database(host, dbname, user, password)
 
         if db.connect():
             print("Connected to database successfully.\n")
@@ -30,8 +51,6 @@ def establish_connection_ui():
 # Main program: menu loop and dispatch to ui/services
 def main():
     db = establish_connection_ui()
-    # get a DB cursor for all operations
-    cursor = db.get_cursor()
 
     while True:
         print("\n=== Vet Clinic Menu ===")
@@ -42,162 +61,306 @@ def main():
         print("5. Treatment Summary")
         print("6. Cancel Appointment")
         print("7. List Pets By Owner")
-        print("8. Exit")
+        print("8. Bulk Import From File")
+        print("9. Batch Schedule Appointments")
+        print("10. Query & Cache Stats")
+        print("11. Export To File")
+        print("12. Reports")
+        print("13. Owner Dashboard")
+        print("14. Vet Availability")
+        print("15. Batch Cancel Appointments")
+        print("0. Exit")
 
         # read user menu selection
         choice = input("Enter choice: ")
 
-        # ------------------------------------------------------
-        # 1. VIEW TABLE
-        # ------------------------------------------------------
-        if choice == "1":
-            table = ui.choose_table_ui(cursor)
-            if table:
-                rows = services.view_table(cursor, table)
-                ui.print_query_results(cursor, rows)
-
-        # ------------------------------------------------------
-        # 2. INSERT INTO TABLE
-        # ------------------------------------------------------
-        elif choice == "2":
-            table = ui.choose_insert_table_ui(cursor)
-            if not table:
-                continue
-
-            cols = services.get_table_columns(cursor, table)
-
-            insert_cols = []
-            values = []
-
-            print("\nEnter values (blank → NULL):\n")
-
-            for col in cols:
-                name = col[0]
-                extra = col[5]
-
-                # skip auto-increment
-                if "auto_increment" in (extra or ""):
+        # borrow a connection + fresh cursor for this action;
+        # table views and exports stream their rows, so they get an unbuffered cursor
+        with db.borrow(buffered=(choice not in ("1", "11")),
+                       readonly=(choice in READ_ONLY_CHOICES)) as (cursor, connection):
+
+            # ------------------------------------------------------
+            # 1. VIEW TABLE
+            # ------------------------------------------------------
+            if choice == "1":
+                table = ui.choose_table_ui(cursor, db.catalog)
+                if table:
+                    pages = services.view_table(cursor, table, page_size=VIEW_PAGE_SIZE, catalog=db.catalog)
+                    ui.print_query_pages(cursor, pages)
+
+            # ------------------------------------------------------
+            # 2. INSERT INTO TABLE
+            # ------------------------------------------------------
+            elif choice == "2":
+                table = ui.choose_insert_table_ui(cursor, db.catalog)
+                if not table:
                     continue
 
-                val = input(f"{name}: ")
-                insert_cols.append(name)
-                values.append(val if val != "" else None)
-
-            success, msg = services.insert_row(cursor, db.connection, table, insert_cols, values)
-            print(msg)
-
-
-        # ------------------------------------------------------
-        # 3. UPDATE ENTRY
-        # ------------------------------------------------------
-        elif choice == "3":
-            table = ui.choose_table_ui(cursor)
-            if not table:
-                continue
+                cols = services.get_table_columns(cursor, table, db.catalog)
+                auto_cols = services.get_auto_increment_columns(cursor, table, db.catalog)
 
-            cols = services.get_table_columns(cursor, table)
+                insert_cols = []
+                values = []
 
-            pk_col = None
-            for col in cols:
-                if col[3] == "PRI":
-                    pk_col = col[0]
-                    break
+                print("\nEnter values (blank → NULL):\n")
 
-            if not pk_col:
-                pk_col = input("Enter primary key column: ")
+                for col in cols:
+                    name = col[0]
 
-            pk_value = input(f"{pk_col} value: ")
+                    # skip auto-increment
+                    if name in auto_cols:
+                        continue
 
-            print("\nColumns:")
-            non_pk_cols = [c[0] for c in cols if c[0] != pk_col]
+                    val = input(f"{name}: ")
+                    insert_cols.append(name)
+                    values.append(val if val != "" else None)
 
-            for i, c in enumerate(non_pk_cols, start=1):
-                print(f"{i}. {c}")
+                success, msg = services.insert_row(cursor, connection, table, insert_cols, values)
+                print(msg)
 
-            choices = input("Enter columns to update (comma-separated): ")
 
-            updates = {}
-            for num in choices.split(","):
-                try:
-                    idx = int(num.strip()) - 1
-                    if 0 <= idx < len(non_pk_cols):
-                        col = non_pk_cols[idx]
-                        new_val = input(f"New value for {col} (blank → NULL): ")
-                        updates[col] = new_val if new_val != "" else None
-                except:
-                    pass
-
-            success, msg = services.update_row(cursor, db.connection, table, pk_col, pk_value, updates)
-            print(msg)
-
-
-        # ------------------------------------------------------
-        # 4. SCHEDULE APPOINTMENT + TREATMENT
-        # ------------------------------------------------------
-        elif choice == "4":
-            owner_id, animal_id, vet_id, date_time = ui.get_appointment_inputs()
-            t_choice = ui.choose_treatment_ui(cursor)
-
-            new_treat = None
-            if t_choice == "0":
-                new_treat = ui.get_new_treatment_type_ui()
+            # ------------------------------------------------------
+            # 3. UPDATE ENTRY
+            # ------------------------------------------------------
+            elif choice == "3":
+                table = ui.choose_table_ui(cursor, db.catalog)
+                if not table:
+                    continue
 
-            success, result = services.schedule_appointment_and_treatment(
-                cursor, db.connection,
-                owner_id, animal_id, vet_id, date_time,
-                t_choice, new_treat
-            )
+                cols = services.get_table_columns(cursor, table, db.catalog)
+
+                pk_cols = services.get_primary_key(cursor, table, db.catalog)
+                pk_col = pk_cols[0] if pk_cols else None
+
+                if not pk_col:
+                    pk_col = input("Enter primary key column: ")
+
+                pk_value = input(f"{pk_col} value: ")
+
+                print("\nColumns:")
+                non_pk_cols = [c[0] for c in cols if c[0] != pk_col]
+
+                for i, c in enumerate(non_pk_cols, start=1):
+                    print(f"{i}. {c}")
+
+                choices = input("Enter columns to update (comma-separated): ")
+
+                updates = {}
+                for num in choices.split(","):
+                    try:
+                        idx = int(num.strip()) - 1
+                        if 0 <= idx < len(non_pk_cols):
+                            col = non_pk_cols[idx]
+                            new_val = input(f"New value for {col} (blank → NULL): ")
+                            updates[col] = new_val if new_val != "" else None
+                    except:
+                        pass
+
+                success, msg = services.update_row(cursor, connection, table, pk_col, pk_value, updates)
+                print(msg)
+
+
+            # ------------------------------------------------------
+            # 4. SCHEDULE APPOINTMENT + TREATMENT
+            # ------------------------------------------------------
+            elif choice == "4":
+                owner_id, animal_id, vet_id, date_time = ui.get_appointment_inputs()
+                t_choice = ui.choose_treatment_ui(cursor)
+
+                new_treat = None
+                if t_choice == "0":
+                    new_treat = ui.get_new_treatment_type_ui()
+
+                success, result = services.schedule_appointment_and_treatment(
+                    cursor, connection,
+                    owner_id, animal_id, vet_id, date_time,
+                    t_choice, new_treat
+                )
+
+                if not success:
+                    print(result)     # result is error message
+                else:
+                    ui.print_appointment_result(result)
+
+            # ------------------------------------------------------
+            # 5. TREATMENT SUMMARY
+            # ------------------------------------------------------
+            elif choice == "5":
+                owner_id = input("OwnerID: ")
+                animal_id = input("AnimalID: ")
+                include_archive = ui.include_archive_ui()
+
+                success, rows = services.get_appointment_summary(cursor, owner_id, animal_id, include_archive)
+
+                if not success:
+                    print(rows)  # rows contains error string
+                else:
+                    ui.print_query_results(cursor, rows)
+
+            # ------------------------------------------------------
+            # 6. CANCEL APPOINTMENT
+            # ------------------------------------------------------
+            elif choice == "6":
+                appt_id, animal_id = ui.get_cancel_appt_inputs()
+                success, msg = services.cancel_appointment(cursor, connection, appt_id, animal_id)
+                print(msg)
+
+            # ------------------------------------------------------
+            # 7. LIST PETS BY OWNER
+            # ------------------------------------------------------
+            elif choice == "7":
+                owner_id = input("OwnerID: ")
+                pets = services.list_pets_by_owner(cursor, owner_id)
+                if pets is None:
+                    print("Owner not found.")
+                else:
+                    ui.print_query_results(cursor, pets)
+
+            # ------------------------------------------------------
+            # 8. BULK IMPORT
+            # ------------------------------------------------------
+            elif choice == "8":
+                table = ui.choose_table_ui(cursor, db.catalog)
+                if not table:
+                    continue
 
-            if not success:
-                print(result)     # result is error message
-            else:
-                ui.print_appointment_result(result)
+                path = ui.get_import_file_ui()
+                success, report = importer.import_file(cursor, connection, table, path)
+                ui.print_import_report(report)
+
+            # ------------------------------------------------------
+            # 9. BATCH SCHEDULE
+            # ------------------------------------------------------
+            elif choice == "9":
+                owner_id, animal_ids, vet_id, date_time, count, every_days = ui.get_batch_appointment_inputs()
+                t_choice = ui.choose_treatment_ui(cursor)
+
+                new_treat = None
+                if t_choice == "0":
+                    new_treat = ui.get_new_treatment_type_ui()
+
+                items = [
+                    {"owner_id": owner_id, "animal_id": animal_id, "vet_id": vet_id,
+                     "date_time": date_time, "treatment_id": t_choice, "treatment_type": new_treat}
+                    for animal_id in animal_ids
+                ]
+                if count > 1:
+                    try:
+                        items = services.expand_recurrence(items, every_days, count)
+                    except ValueError:
+                        print("Invalid DateTime.")
+                        continue
+
+                success, results = services.schedule_batch(cursor, connection, items)
+                ui.print_batch_results(results)
+
+            # ------------------------------------------------------
+            # 10. QUERY & CACHE STATS
+            # ------------------------------------------------------
+            elif choice == "10":
+                profiler = profiling.profiler
+                ui.print_query_stats(profiler.snapshot(), profiler.enabled)
+                ui.print_cache_stats(services.cache_stats())
+                if db.replicas:
+                    ui.print_replica_stats(db.replica_status())
+
+                action = ui.query_stats_action_ui()
+                if action == "t":
+                    if profiler.enabled:
+                        profiler.disable()
+                    else:
+                        profiler.enable()
+                    print(f"Profiling {'enabled' if profiler.enabled else 'disabled'}.")
+                elif action == "r":
+                    profiler.reset()
+                    print("Stats reset.")
+
+            # ------------------------------------------------------
+            # 11. EXPORT
+            # ------------------------------------------------------
+            elif choice == "11":
+                table = ui.choose_table_ui(cursor, db.catalog, extra=[exporter.SUMMARY])
+                if not table:
+                    continue
 
-        # ------------------------------------------------------
-        # 5. TREATMENT SUMMARY
-        # ------------------------------------------------------
-        elif choice == "5":
-            owner_id = input("OwnerID: ")
-            animal_id = input("AnimalID: ")
+                path = ui.get_export_inputs_ui()
+                if not path:
+                    continue
+                success, result = exporter.export(cursor, table, path, catalog=db.catalog,
+                                                  progress=ui.ExportProgress())
+                ui.print_export_result(success, result)
+
+            # ------------------------------------------------------
+            # 12. REPORTS
+            # ------------------------------------------------------
+            elif choice == "12":
+                name = ui.choose_report_ui(reports.REPORTS)
+                if not name:
+                    continue
 
-            success, rows = services.get_appointment_summary(cursor, owner_id, animal_id)
+                start, end = ui.get_report_window_ui()
+                include_archive = ui.include_archive_ui()
+                success, result = reports.run_report(cursor, name, start, end, include_archive=include_archive)
+                if success:
+                    ui.print_report(result)
+                else:
+                    print(result)
+
+            # ------------------------------------------------------
+            # 13. OWNER DASHBOARD
+            # ------------------------------------------------------
+            elif choice == "13":
+                owner_id = input("OwnerID: ")
+                success, result = services.get_owner_dashboard(cursor, owner_id, db.catalog)
+                if success:
+                    ui.print_owner_dashboard(result)
+                else:
+                    print(result)
+
+            # ------------------------------------------------------
+            # 14. VET AVAILABILITY
+            # ------------------------------------------------------
+            elif choice == "14":
+                vet_id, date_time = ui.get_availability_inputs()
+                if vet_id:
+                    success, result = services.next_free_slots(cursor, vet_id, date_time)
+                    if success:
+                        ui.print_free_slots(vet_id, result)
+                    else:
+                        print(result)
+                else:
+                    success, result = services.free_vets_at(cursor, date_time)
+                    if success:
+                        ui.print_free_vets(date_time, result)
+                    else:
+                        print(result)
+
+            # ------------------------------------------------------
+            # 15. BATCH CANCEL APPOINTMENTS
+            # ------------------------------------------------------
+            elif choice == "15":
+                criteria = ui.get_batch_cancel_inputs()
+                if criteria:
+                    success, results = services.cancel_appointments(cursor, connection, **criteria)
+                    if success:
+                        ui.print_cancel_results(results)
+                    else:
+                        print(results)
+
+            # ------------------------------------------------------
+            # 0. EXIT
+            # ------------------------------------------------------
+            elif choice == "0":
+                print("Goodbye.")
+                break
 
-            if not success:
-                print(rows)  # rows contains error string
-            else:
-                ui.print_query_results(cursor, rows)
-
-        # ------------------------------------------------------
-        # 6. CANCEL APPOINTMENT
-        # ------------------------------------------------------
-        elif choice == "6":
-            appt_id, animal_id = ui.get_cancel_appt_inputs()
-            success, msg = services.cancel_appointment(cursor, db.connection, appt_id, animal_id)
-            print(msg)
-
-        # ------------------------------------------------------
-        # 7. LIST PETS BY OWNER
-        # ------------------------------------------------------
-        elif choice == "7":
-            owner_id = input("OwnerID: ")
-            pets = services.list_pets_by_owner(cursor, owner_id)
-            if pets is None:
-                print("Owner not found.")
             else:
-                ui.print_query_results(cursor, pets)
-
-        # ------------------------------------------------------
-        # 8. EXIT
-        # ------------------------------------------------------
-        elif choice == "8":
-            print("Goodbye.")
-            break
-
-        else:
-            print("Invalid selection.")
+                print("Invalid selection.")
 
     db.close()
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(cli.run(sys.argv[1:]))
     main()
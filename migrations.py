@@ -0,0 +1,92 @@
+"""Schema migrations
+
+Versioned schema changes applied on top of the base vetclinic schema.
+Applied versions are recorded in a `schema_migrations` table and
+`migrate()` runs whatever is missing, in order. Every step checks before
+it creates, so it is safe against databases that were changed by hand.
+
+Run them with `python main.py migrate` (add --check to only report).
+"""
+
+import query
+
+
+# (table, index name, columns) that the hot query.py lookups rely on:
+# - get_appointment_summary filters on the animal, sorts by date and joins the vet
+# - delete_treatments_by_appt and the summary join look treatments up by appointment
+# - get_animals_by_owner filters animals by owner
+HOT_INDEXES = [
+    ("Appointment", "idx_appointment_animal_datetime", ["Scheduled_AnimalID", "DateTime", "Treating_VetID"]),
+    ("Treatment", "idx_treatment_appointment_type", ["AppointmentID", "TreatmentType"]),
+    ("Animal", "idx_animal_owner", ["Animal_OwnerID"]),
+]
+
+
+# The vet calendar loads each vet's bookings in time order
+CALENDAR_INDEXES = [
+    ("Appointment", "idx_appointment_vet_datetime", ["Treating_VetID", "DateTime"]),
+]
+
+
+def _create_indexes(indexes):
+    def apply(cursor):
+        for table, name, columns in indexes:
+            if not query.index_exists(cursor, table, name):
+                query.create_index(cursor, table, name, columns)
+    return apply
+
+
+# (version, description, apply(cursor)), oldest first
+MIGRATIONS = [
+    (1, "Covering indexes for hot lookup columns", _create_indexes(HOT_INDEXES)),
+    (2, "Cancellation log for reports", query.create_cancellation_log),
+    (3, "Index for loading vet calendars", _create_indexes(CALENDAR_INDEXES)),
+]
+
+
+def applied_versions(cursor):
+    query.create_migrations_table(cursor)
+    return set(query.get_applied_migrations(cursor))
+
+
+def pending(cursor):
+    done = applied_versions(cursor)
+    return [(v, desc) for v, desc, _ in MIGRATIONS if v not in done]
+
+
+def migrate(cursor, connection, catalog=None, target=None):
+    # Apply pending migrations up to `target` (default: all).
+    # Returns (success, [applied "version: description"] or error message).
+    applied = []
+    try:
+        done = applied_versions(cursor)
+        connection.commit()
+
+        for version, description, apply in MIGRATIONS:
+            if version in done or (target is not None and version > target):
+                continue
+            apply(cursor)
+            query.record_migration(cursor, version, description)
+            connection.commit()
+            applied.append(f"{version}: {description}")
+
+        return True, applied
+
+    except Exception as e:
+        connection.rollback()
+        return False, f"Migration failed after {len(applied)} step(s): {e}"
+
+    finally:
+        if catalog:
+            catalog.invalidate()
+
+
+def check_indexes(cursor, indexes=None):
+    # [(table, index name, columns, present)] for every index we expect
+    expected = indexes if indexes is not None else required_indexes()
+    return [(table, name, columns, query.index_exists(cursor, table, name))
+            for table, name, columns in expected]
+
+
+def required_indexes():
+    return HOT_INDEXES + CALENDAR_INDEXES
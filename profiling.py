@@ -0,0 +1,287 @@
+"""Query profiling
+
+Times every statement run through a Database cursor and tags it with the
+`query` helper that issued it. Per helper it keeps call/error counts,
+rows and approximate bytes returned, and recent latencies for
+p50/p95/p99. Statements slower than a threshold go to a slow-query log,
+optionally with their EXPLAIN plan.
+
+Profiling is off by default and can be switched at runtime:
+
+    profiling.profiler.enable(slow_ms=200, slow_log_path="slow.log", explain=True)
+    ...
+    profiling.profiler.snapshot()
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import deque
+
+import query
+
+
+# Written only where set_slow_log() (or the application's own logging
+# setup) sends it; never to Python's last-resort stderr handler
+slow_log = logging.getLogger("vetclinic.slow_query")
+slow_log.addHandler(logging.NullHandler())
+
+
+class QueryStats:
+    def __init__(self, sample_size):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.bytes = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last_error = None
+        # Most recent latencies (seconds); percentiles are computed from these
+        self.samples = deque(maxlen=sample_size)
+
+    def percentile(self, pct):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[idx]
+
+
+class Profiler:
+    def __init__(self, slow_ms=500, slow_log_path=None, explain=False, sample_size=10000):
+        self.enabled = False
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.sample_size = sample_size
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._handler = None
+        self.set_slow_log(slow_log_path)
+
+    def enable(self, slow_ms=None, slow_log_path=None, explain=None):
+        if slow_ms is not None:
+            self.slow_ms = slow_ms
+        if slow_log_path is not None:
+            self.set_slow_log(slow_log_path)
+        if explain is not None:
+            self.explain = explain
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    # Send slow statements to a file (None: keep the current destination)
+    def set_slow_log(self, path):
+        if not path:
+            return
+        if self._handler:
+            slow_log.removeHandler(self._handler)
+            self._handler.close()
+        self._handler = logging.FileHandler(path, encoding="utf-8")
+        self._handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        slow_log.addHandler(self._handler)
+        slow_log.setLevel(logging.INFO)
+
+    def record(self, tag, sql, params, elapsed, rows=0, size=0, error=None):
+        with self._lock:
+            stats = self._stats.get(tag)
+            if stats is None:
+                stats = self._stats[tag] = QueryStats(self.sample_size)
+            stats.calls += 1
+            stats.rows += rows
+            stats.bytes += size
+            stats.total += elapsed
+            stats.max = max(stats.max, elapsed)
+            stats.samples.append(elapsed)
+            if error is not None:
+                stats.errors += 1
+                stats.last_error = str(error)
+
+        if error is not None:
+            slow_log.warning("ERROR %s: %s | %s params=%s", tag, error, _one_line(sql), _short(params))
+
+    def is_slow(self, elapsed):
+        return elapsed * 1000 >= self.slow_ms
+
+    def log_slow(self, tag, sql, params, elapsed, plan=None):
+        lines = [f"{elapsed * 1000:.1f} ms {tag}: {_one_line(sql)} params={_short(params)}"]
+        for row in plan or ():
+            lines.append("    " + " | ".join(str(v) for v in row))
+        slow_log.info("\n".join(lines))
+
+    # {tag: {calls, errors, rows, bytes, total_ms, p50_ms, p95_ms, p99_ms, max_ms, last_error}}
+    def snapshot(self):
+        with self._lock:
+            items = list(self._stats.items())
+        report = {}
+        for tag, s in sorted(items, key=lambda kv: -kv[1].total):
+            report[tag] = {
+                "calls": s.calls,
+                "errors": s.errors,
+                "rows": s.rows,
+                "bytes": s.bytes,
+                "total_ms": round(s.total * 1000, 3),
+                "p50_ms": round(s.percentile(50) * 1000, 3),
+                "p95_ms": round(s.percentile(95) * 1000, 3),
+                "p99_ms": round(s.percentile(99) * 1000, 3),
+                "max_ms": round(s.max * 1000, 3),
+                "last_error": s.last_error,
+            }
+        return report
+
+
+# Shared by every Database unless one is given its own
+profiler = Profiler()
+
+
+class _Statement:
+    # One in-flight statement: execute time plus the time spent fetching
+    __slots__ = ("tag", "sql", "params", "elapsed", "rows", "size")
+
+    def __init__(self, tag, sql, params):
+        self.tag = tag
+        self.sql = sql
+        self.params = params
+        self.elapsed = 0.0
+        self.rows = 0
+        self.size = 0
+
+
+class InstrumentedCursor:
+    # Wraps a backend cursor; a pass-through while profiling is off.
+    # A statement is recorded once its results have been read, i.e. when
+    # the cursor runs the next statement or is closed, so latency covers
+    # fetching too (SQLite and unbuffered MySQL do their work lazily).
+    def __init__(self, cursor, profiler):
+        self._cursor = cursor
+        self._profiler = profiler
+        self._current = None
+        self.staleness = 0.0    # how far behind the primary its reads may be
+
+    def execute(self, sql, params=()):
+        self._finish()
+        if not self._profiler.enabled:
+            return self._cursor.execute(sql, params)
+        return self._timed(self._cursor.execute, sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        self._finish()
+        if not self._profiler.enabled:
+            return self._cursor.executemany(sql, seq_of_params)
+        return self._timed(self._cursor.executemany, sql, seq_of_params)
+
+    def fetchone(self):
+        if not self._current:
+            return self._cursor.fetchone()
+        row = self._fetch(self._cursor.fetchone)
+        if row is not None:
+            self._count([row])
+        return row
+
+    def fetchmany(self, size=1):
+        if not self._current:
+            return self._cursor.fetchmany(size)
+        rows = self._fetch(self._cursor.fetchmany, size)
+        self._count(rows)
+        return rows
+
+    def fetchall(self):
+        if not self._current:
+            return self._cursor.fetchall()
+        rows = self._fetch(self._cursor.fetchall)
+        self._count(rows)
+        return rows
+
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _timed(self, run, sql, params):
+        stmt = _Statement(_caller_tag(), sql, params)
+        start = time.perf_counter()
+        try:
+            result = run(sql, params)
+        except Exception as e:
+            self._profiler.record(stmt.tag, sql, params, time.perf_counter() - start, error=e)
+            raise
+        stmt.elapsed = time.perf_counter() - start
+
+        # Result sets are counted as they are fetched; DML reports rowcount
+        if not self._cursor.description:
+            stmt.rows = max(self._cursor.rowcount or 0, 0)
+        self._current = stmt
+        return result
+
+    def _fetch(self, fetch, *args):
+        start = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            self._current.elapsed += time.perf_counter() - start
+
+    def _count(self, rows):
+        self._current.rows += len(rows)
+        self._current.size += sum(_row_bytes(row) for row in rows)
+
+    def _finish(self):
+        stmt, self._current = self._current, None
+        if not stmt:
+            return
+
+        profiler = self._profiler
+        profiler.record(stmt.tag, stmt.sql, stmt.params, stmt.elapsed, stmt.rows, stmt.size)
+        if not profiler.is_slow(stmt.elapsed):
+            return
+
+        plan = None
+        if profiler.explain and stmt.sql.lstrip().upper().startswith("SELECT"):
+            try:
+                plan = query.explain(self._cursor, stmt.sql, stmt.params)
+            except Exception as e:
+                plan = [(f"EXPLAIN failed: {e}",)]
+        profiler.log_slow(stmt.tag, stmt.sql, stmt.params, stmt.elapsed, plan)
+
+
+def _caller_tag():
+    # Name of the `query` helper issuing the statement, else the nearest
+    # caller outside this module (e.g. a backend running setup SQL)
+    frame = sys._getframe(2)
+    fallback = None
+    while frame:
+        module = frame.f_globals.get("__name__")
+        if module == "query":
+            return frame.f_code.co_name
+        if fallback is None and module != __name__:
+            fallback = f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return fallback or "unknown"
+
+
+def _row_bytes(row):
+    size = 0
+    for value in row:
+        if isinstance(value, (str, bytes, bytearray)):
+            size += len(value)
+        elif value is not None:
+            size += 8
+    return size
+
+
+def _one_line(sql):
+    return " ".join(sql.split())
+
+
+def _short(params, limit=200):
+    text = repr(params)
+    return text if len(text) <= limit else text[:limit] + "..."
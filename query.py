@@ -0,0 +1,892 @@
+"""Query helpers
+
+This module contains SQL-only helpers used by the services layer.
+No printing, no input, no business logic, and no commits happen here.
+
+Statements are written for MySQL. Cursors from the SQLite backend accept
+the same %s placeholders and backtick quoting; the few statements with no
+SQLite equivalent branch on `dialect(cur)`.
+"""
+
+import re
+
+
+def dialect(cur):
+    # mysql.connector cursors carry no tag; backend cursor wrappers do
+    return getattr(cur, "dialect", "mysql")
+
+
+def list_tables(cur):
+    if dialect(cur) == "sqlite":
+        cur.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )
+    else:
+        cur.execute("SHOW TABLES")
+    return [t[0] for t in cur.fetchall()]
+
+
+def get_schema_metadata(cur):
+    # One row per column, in table/ordinal order:
+    # (table, column, type, nullable, key, default, extra, ref_table, ref_column)
+    if dialect(cur) == "sqlite":
+        cur.execute("""
+            SELECT
+                m.name,
+                p.name,
+                p.type,
+                CASE WHEN p."notnull" OR p.pk THEN 'NO' ELSE 'YES' END,
+                CASE WHEN p.pk THEN 'PRI' ELSE '' END,
+                p.dflt_value,
+                CASE WHEN p.pk AND UPPER(p.type) = 'INTEGER'
+                      AND (SELECT COUNT(*) FROM pragma_table_info(m.name) k WHERE k.pk) = 1
+                     THEN 'auto_increment' ELSE '' END,
+                f."table",
+                f."to"
+            FROM sqlite_master m
+            JOIN pragma_table_info(m.name) p
+            LEFT JOIN pragma_foreign_key_list(m.name) f ON f."from" = p.name
+            WHERE m.type IN ('table', 'view') AND m.name NOT LIKE 'sqlite_%'
+            ORDER BY m.name, p.cid
+        """)
+        return cur.fetchall()
+
+    cur.execute("""
+        SELECT
+            c.TABLE_NAME,
+            c.COLUMN_NAME,
+            c.COLUMN_TYPE,
+            c.IS_NULLABLE,
+            c.COLUMN_KEY,
+            c.COLUMN_DEFAULT,
+            c.EXTRA,
+            k.REFERENCED_TABLE_NAME,
+            k.REFERENCED_COLUMN_NAME
+        FROM INFORMATION_SCHEMA.COLUMNS c
+        LEFT JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE k
+            ON k.TABLE_SCHEMA = c.TABLE_SCHEMA
+           AND k.TABLE_NAME = c.TABLE_NAME
+           AND k.COLUMN_NAME = c.COLUMN_NAME
+           AND k.REFERENCED_TABLE_NAME IS NOT NULL
+        WHERE c.TABLE_SCHEMA = DATABASE()
+        ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION
+    """)
+    return cur.fetchall()
+
+
+# ----------------------------
+# Generic Table Operations
+# ----------------------------
+
+def describe_table(cur, table_name):
+    # Rows follow MySQL's DESCRIBE layout: (Field, Type, Null, Key, Default, Extra)
+    if dialect(cur) == "sqlite":
+        cur.execute(f"PRAGMA table_info(`{table_name}`)")
+        info = cur.fetchall()
+        pk_count = sum(1 for col in info if col[5])
+        rows = []
+        for cid, name, col_type, notnull, default, pk in info:
+            # A lone INTEGER PRIMARY KEY aliases the rowid and auto-increments
+            auto = pk and pk_count == 1 and col_type.upper() == "INTEGER"
+            rows.append((
+                name,
+                col_type,
+                "NO" if notnull or pk else "YES",
+                "PRI" if pk else "",
+                default,
+                "auto_increment" if auto else "",
+            ))
+        return rows
+
+    cur.execute(f"DESCRIBE `{table_name}`")
+    return cur.fetchall()
+
+
+def select_page(cur, table_name, pk_col, after=None, page_size=500, upto=None):
+    # Keyset pagination: the next `page_size` rows with a key above `after`
+    # (and, for range scans, at most `upto`)
+    where, params = [], []
+    if after is not None:
+        where.append(f"`{pk_col}` > %s")
+        params.append(after)
+    if upto is not None:
+        where.append(f"`{pk_col}` <= %s")
+        params.append(upto)
+
+    sql = f"SELECT * FROM `{table_name}`"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY `{pk_col}` LIMIT {int(page_size)}"
+    cur.execute(sql, tuple(params))
+    return cur.fetchall()
+
+
+def get_key_range(cur, table_name, pk_col):
+    # (MIN, MAX) of a key column; (None, None) when the table is empty
+    cur.execute(f"SELECT MIN(`{pk_col}`), MAX(`{pk_col}`) FROM `{table_name}`")
+    return cur.fetchone()
+
+
+def seed_id_counter(cur, table_name, next_id):
+    # Make the table's next auto-increment ID at least `next_id`. Returns
+    # False for a SQLite table without AUTOINCREMENT, which has no counter.
+    if dialect(cur) == "mysql":
+        cur.execute(f"ALTER TABLE `{table_name}` AUTO_INCREMENT = {int(next_id)}")
+        return True
+
+    cur.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = %s", (table_name,))
+    row = cur.fetchone()
+    if not row or "AUTOINCREMENT" not in row[0].upper():
+        return False
+    cur.execute("UPDATE sqlite_sequence SET seq = %s WHERE name = %s AND seq < %s",
+                (int(next_id) - 1, table_name, int(next_id) - 1))
+    cur.execute("SELECT 1 FROM sqlite_sequence WHERE name = %s", (table_name,))
+    if cur.fetchone() is None:
+        cur.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)", (table_name, int(next_id) - 1))
+    return True
+
+
+def select_all_from_table(cur, table_name):
+    # Rows are left on the cursor; read them with fetch_batches()
+    cur.execute(f"SELECT * FROM `{table_name}`")
+
+
+def fetch_batches(cur, size=500):
+    # Yield the pending result set in fetchmany()-sized lists
+    while True:
+        rows = cur.fetchmany(size)
+        if not rows:
+            break
+        yield rows
+
+
+def count_rows(cur, table_name):
+    cur.execute(f"SELECT COUNT(*) FROM `{table_name}`")
+    return cur.fetchone()[0]
+
+
+def insert_into_table(cur, table_name, columns, values):
+    # columns: list of column names
+    # values: list or tuple of values
+    placeholders = ", ".join(["%s"] * len(values))
+    colnames = ", ".join([f"`{c}`" for c in columns])
+    sql = f"INSERT INTO `{table_name}` ({colnames}) VALUES ({placeholders})"
+    cur.execute(sql, tuple(values))
+
+
+def insert_many(cur, table_name, columns, rows):
+    # rows: list of value tuples, all in `columns` order. mysql.connector
+    # rewrites executemany() INSERTs into a single multi-row VALUES list.
+    placeholders = ", ".join(["%s"] * len(columns))
+    colnames = ", ".join([f"`{c}`" for c in columns])
+    sql = f"INSERT INTO `{table_name}` ({colnames}) VALUES ({placeholders})"
+    cur.executemany(sql, rows)
+
+
+def update_table_row(cur, table_name, primary_key_col, pk_value, updates):
+    # updates: dict of { column_name: new_value }
+    set_clause = ", ".join([f"`{col}` = %s" for col in updates.keys()])
+    sql = f"UPDATE `{table_name}` SET {set_clause} WHERE `{primary_key_col}` = %s"
+    params = list(updates.values()) + [pk_value]
+    cur.execute(sql, params)
+
+
+def update_rows(cur, table_name, primary_key_col, columns, rows):
+    # One UPDATE for many rows sharing a column set:
+    #   SET col = CASE pk WHEN k1 THEN v1 WHEN k2 THEN v2 ... ELSE col END
+    #   WHERE pk IN (k1, k2, ...)
+    # rows: [(pk_value, {column: value})]. MySQL assigns left to right, so
+    # a changed primary key must come last in `columns`.
+    whens = " ".join(["WHEN %s THEN %s"] * len(rows))
+    sets, params = [], []
+    for col in columns:
+        sets.append(f"`{col}` = CASE `{primary_key_col}` {whens} ELSE `{col}` END")
+        for pk_value, values in rows:
+            params += [pk_value, values[col]]
+
+    keys = [pk_value for pk_value, _ in rows]
+    placeholders = ", ".join(["%s"] * len(keys))
+    cur.execute(
+        f"UPDATE `{table_name}` SET {', '.join(sets)} WHERE `{primary_key_col}` IN ({placeholders})",
+        tuple(params + keys)
+    )
+    return cur.rowcount
+
+
+def count_rows_by_key(cur, table_name, key_col, keys):
+    # {position in `keys`: matching row count}, keys without rows left out.
+    # The CASE maps each row back to the first key it matches, using the
+    # database's own comparison (type coercion, collation) as the UPDATE does.
+    whens = " ".join(["WHEN %s THEN %s"] * len(keys))
+    placeholders = ", ".join(["%s"] * len(keys))
+    params = [p for i, key in enumerate(keys) for p in (key, i)]
+    cur.execute(
+        f"SELECT k, COUNT(*) FROM (SELECT CASE `{key_col}` {whens} END AS k FROM `{table_name}` "
+        f"WHERE `{key_col}` IN ({placeholders})) matched GROUP BY k",
+        tuple(params + list(keys))
+    )
+    return {int(k): n for k, n in cur.fetchall() if k is not None}
+
+
+def explain(cur, sql, params=()):
+    # Execution plan rows for a statement
+    if dialect(cur) == "sqlite":
+        cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+    else:
+        cur.execute("EXPLAIN " + sql, params)
+    return cur.fetchall()
+
+
+# ----------------------------
+# Indexes & Migrations
+# ----------------------------
+
+def index_exists(cur, table_name, index_name):
+    if dialect(cur) == "sqlite":
+        cur.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND tbl_name = %s AND name = %s",
+            (table_name, index_name)
+        )
+    else:
+        cur.execute(
+            "SELECT 1 FROM INFORMATION_SCHEMA.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s LIMIT 1",
+            (table_name, index_name)
+        )
+    return cur.fetchone() is not None
+
+
+def create_index(cur, table_name, index_name, columns):
+    colnames = ", ".join([f"`{c}`" for c in columns])
+    cur.execute(f"CREATE INDEX `{index_name}` ON `{table_name}` ({colnames})")
+
+
+def create_migrations_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description VARCHAR(200) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def get_applied_migrations(cur):
+    cur.execute("SELECT version FROM schema_migrations ORDER BY version")
+    return [r[0] for r in cur.fetchall()]
+
+
+def record_migration(cur, version, description):
+    cur.execute(
+        "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+        (version, description)
+    )
+
+
+def trigger_exists(cur, trigger_name):
+    if dialect(cur) == "sqlite":
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = %s", (trigger_name,))
+    else:
+        cur.execute(
+            "SELECT 1 FROM INFORMATION_SCHEMA.TRIGGERS "
+            "WHERE TRIGGER_SCHEMA = DATABASE() AND TRIGGER_NAME = %s",
+            (trigger_name,)
+        )
+    return cur.fetchone() is not None
+
+
+def create_cancellation_log(cur):
+    # AppointmentCancellation keeps a copy of every appointment deleted
+    # before its date, i.e. cancelled rather than cleaned up afterwards.
+    # ApptID is not unique: SQLite may hand a deleted ID out again.
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS AppointmentCancellation (
+            ApptID INTEGER NOT NULL,
+            DateTime DATETIME NOT NULL,
+            Scheduled_AnimalID INTEGER,
+            Treating_VetID INTEGER,
+            CancelledAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    if trigger_exists(cur, "trg_appointment_cancelled"):
+        return
+
+    copy = """
+        INSERT INTO AppointmentCancellation (ApptID, DateTime, Scheduled_AnimalID, Treating_VetID)
+        VALUES (OLD.ApptID, OLD.DateTime, OLD.Scheduled_AnimalID, OLD.Treating_VetID)
+    """
+    if dialect(cur) == "sqlite":
+        cur.execute(f"""
+            CREATE TRIGGER trg_appointment_cancelled AFTER DELETE ON Appointment
+            WHEN OLD.DateTime >= datetime('now', 'localtime')
+            BEGIN {copy}; END
+        """)
+    else:
+        cur.execute(f"""
+            CREATE TRIGGER trg_appointment_cancelled AFTER DELETE ON Appointment
+            FOR EACH ROW BEGIN
+                IF OLD.DateTime >= NOW() THEN {copy}; END IF;
+            END
+        """)
+
+
+# ----------------------------
+# Transactions
+# ----------------------------
+
+def begin_transaction(cur):
+    # SQLite: take the write lock up front so a read-then-write transaction
+    # cannot fail halfway on lock upgrade
+    if dialect(cur) == "sqlite":
+        cur.execute("BEGIN IMMEDIATE")
+    else:
+        cur.execute("START TRANSACTION")
+
+
+def savepoint(cur, name):
+    cur.execute(f"SAVEPOINT {name}")
+
+
+def release_savepoint(cur, name):
+    cur.execute(f"RELEASE SAVEPOINT {name}")
+
+
+def rollback_to_savepoint(cur, name):
+    cur.execute(f"ROLLBACK TO SAVEPOINT {name}")
+
+
+# ----------------------------
+# Appointment & Treatment Queries
+# ----------------------------
+
+def get_all_treatments(cur):
+    cur.execute("SELECT TreatmentID, TreatmentType FROM Treatment ORDER BY TreatmentID")
+    return cur.fetchall()
+
+
+def get_treatment_type_summary(cur, archive_years=()):
+    # [(TreatmentType, first TreatmentID, last TreatmentID)] per distinct type
+    cur.execute(f"""
+        SELECT t.TreatmentType, MIN(t.TreatmentID), MAX(t.TreatmentID)
+        FROM {_treatments(archive_years)} t
+        GROUP BY t.TreatmentType
+    """)
+    return cur.fetchall()
+
+
+def get_treatments_after(cur, last_id, limit=10000):
+    # Treatment rows added after `last_id`, oldest first
+    cur.execute(
+        f"SELECT TreatmentID, TreatmentType FROM Treatment WHERE TreatmentID > %s "
+        f"ORDER BY TreatmentID LIMIT {int(limit)}",
+        (last_id,)
+    )
+    return cur.fetchall()
+
+
+def get_treatment_type_by_id(cur, treatment_id):
+    cur.execute(
+        "SELECT TreatmentType FROM Treatment WHERE TreatmentID = %s",
+        (treatment_id,)
+    )
+    return cur.fetchone()
+
+
+def insert_appointment(cur, date_time, animal_id, vet_id):
+    sql = """
+        INSERT INTO Appointment (DateTime, Scheduled_AnimalID, Treating_VetID)
+        VALUES (%s, %s, %s)
+    """
+    cur.execute(sql, (date_time, animal_id, vet_id))
+    return cur.lastrowid
+
+
+def get_booking_context(cur, animal_id, vet_id, treatment_id=None):
+    # Everything a booking validates, in one row:
+    # (Animal_OwnerID, Aname, VetID, Vname, TreatmentID, TreatmentType).
+    # No row means no such animal; NULL VetID / TreatmentID mean not found.
+    # On MySQL the rows are share-locked until the booking commits.
+    sql = """
+        SELECT a.Animal_OwnerID, a.Aname, v.VetID, v.Vname, t.TreatmentID, t.TreatmentType
+        FROM Animal a
+        LEFT JOIN Veterinarian v ON v.VetID = %s
+        LEFT JOIN Treatment t ON t.TreatmentID = %s
+        WHERE a.AnimalID = %s
+    """
+    if dialect(cur) == "mysql":
+        sql += " LOCK IN SHARE MODE"
+    cur.execute(sql, (vet_id, treatment_id, animal_id))
+    return cur.fetchone()
+
+
+def insert_appointments(cur, rows):
+    # rows: [(date_time, animal_id, vet_id), ...] written as one multi-row
+    # INSERT. Returns the new ApptIDs in row order. A simple multi-row
+    # insert gets one ascending block of IDs: InnoDB reports its first ID
+    # and steps by @@auto_increment_increment, SQLite reports the last one
+    # and steps by 1. The derived IDs are read back and checked against
+    # the inserted rows, so a server that hands out IDs any other way
+    # fails the insert instead of mislabelling bookings.
+    values = ", ".join(["(%s, %s, %s)"] * len(rows))
+    sql = f"INSERT INTO Appointment (DateTime, Scheduled_AnimalID, Treating_VetID) VALUES {values}"
+    cur.execute(sql, [v for row in rows for v in row])
+
+    if dialect(cur) == "sqlite":
+        step = 1
+        first = cur.lastrowid - len(rows) + 1
+    else:
+        first = cur.lastrowid
+        cur.execute("SELECT @@auto_increment_increment")
+        step = int(cur.fetchone()[0])
+    appt_ids = [first + i * step for i in range(len(rows))]
+
+    placeholders = ", ".join(["%s"] * len(appt_ids))
+    cur.execute(
+        f"SELECT ApptID, Scheduled_AnimalID, Treating_VetID FROM Appointment "
+        f"WHERE ApptID IN ({placeholders})",
+        appt_ids
+    )
+    found = {r[0]: (str(r[1]), str(r[2])) for r in cur.fetchall()}
+    for appt_id, (_, animal_id, vet_id) in zip(appt_ids, rows):
+        if found.get(appt_id) != (str(animal_id), str(vet_id)):
+            raise RuntimeError(f"Appointment IDs from the multi-row insert are not one block "
+                               f"starting at {first} (step {step}).")
+    return appt_ids
+
+
+def get_treatment_types(cur, treatment_ids, archive_years=()):
+    # [(TreatmentID, TreatmentType), ...] for the given IDs
+    if not treatment_ids:
+        return []
+    placeholders = ", ".join(["%s"] * len(treatment_ids))
+    cur.execute(
+        f"SELECT t.TreatmentID, t.TreatmentType FROM {_treatments(archive_years)} t "
+        f"WHERE t.TreatmentID IN ({placeholders})",
+        tuple(treatment_ids)
+    )
+    return cur.fetchall()
+
+
+def insert_treatment(cur, appointment_id, treatment_type):
+    sql = """
+        INSERT INTO Treatment (AppointmentID, TreatmentType)
+        VALUES (%s, %s)
+    """
+    cur.execute(sql, (appointment_id, treatment_type))
+
+
+def get_animal_owner(cur, animal_id):
+    sql = "SELECT Animal_OwnerID, Aname FROM Animal WHERE AnimalID = %s"
+    cur.execute(sql, (animal_id,))
+    return cur.fetchone()
+
+
+def get_vet_name(cur, vet_id):
+    sql = "SELECT Vname FROM Veterinarian WHERE VetID = %s"
+    cur.execute(sql, (vet_id,))
+    return cur.fetchone()
+
+
+def get_vets(cur, vet_ids):
+    # [(VetID, Vname), ...] for the given IDs
+    if not vet_ids:
+        return []
+    placeholders = ", ".join(["%s"] * len(vet_ids))
+    cur.execute(f"SELECT VetID, Vname FROM Veterinarian WHERE VetID IN ({placeholders})", tuple(vet_ids))
+    return cur.fetchall()
+
+
+def select_appointment_summaries(cur, animal_id=None, appt_range=None):
+    # The appointment summary join for every animal (or one), optionally
+    # limited to an inclusive (low, high) ApptID range; rows are left on
+    # the cursor for fetch_batches()
+    sql = """
+        SELECT
+            a.ApptID,
+            a.Scheduled_AnimalID,
+            a.DateTime,
+            t.TreatmentType,
+            v.Vname
+        FROM Appointment a
+        JOIN Treatment t ON a.ApptID = t.AppointmentID
+        LEFT JOIN Veterinarian v ON a.Treating_VetID = v.VetID
+    """
+    where, params = _summary_filter(animal_id, appt_range)
+    cur.execute(sql + where, params)
+
+
+def count_appointment_summaries(cur, animal_id=None, appt_range=None):
+    sql = """
+        SELECT COUNT(*)
+        FROM Appointment a
+        JOIN Treatment t ON a.ApptID = t.AppointmentID
+    """
+    where, params = _summary_filter(animal_id, appt_range)
+    cur.execute(sql + where, params)
+    return cur.fetchone()[0]
+
+
+def _summary_filter(animal_id, appt_range):
+    where, params = [], []
+    if animal_id is not None:
+        where.append("a.Scheduled_AnimalID = %s")
+        params.append(animal_id)
+    if appt_range is not None:
+        where.append("a.ApptID BETWEEN %s AND %s")
+        params.extend(appt_range)
+    return (" WHERE " + " AND ".join(where) if where else ""), tuple(params)
+
+
+def get_appointment_summary(cursor, animal_id, archive_years=()):
+    sql = f"""
+        SELECT 
+            a.ApptID,
+            a.DateTime,
+            t.TreatmentType,
+            v.Vname
+        FROM {_appointments(archive_years)} a
+        JOIN {_treatments(archive_years)} t ON a.ApptID = t.AppointmentID
+        LEFT JOIN Veterinarian v ON a.Treating_VetID = v.VetID
+        WHERE a.Scheduled_AnimalID = %s
+        ORDER BY a.DateTime DESC, a.ApptID
+    """
+    cursor.execute(sql, (animal_id,))
+    return cursor.fetchall()
+
+
+def delete_appointment(cur, appt_id):
+    cur.execute("DELETE FROM Appointment WHERE ApptID = %s", (appt_id,))
+
+
+def delete_treatments_by_appt(cur, appt_id):
+    cur.execute("DELETE FROM Treatment WHERE AppointmentID = %s", (appt_id,))
+
+
+def delete_appointments(cur, appt_ids):
+    # Set-based delete of many appointments; delete their treatments first
+    placeholders = ", ".join(["%s"] * len(appt_ids))
+    cur.execute(f"DELETE FROM Appointment WHERE ApptID IN ({placeholders})", tuple(appt_ids))
+    return cur.rowcount
+
+
+def delete_treatments_by_appts(cur, appt_ids):
+    placeholders = ", ".join(["%s"] * len(appt_ids))
+    cur.execute(f"DELETE FROM Treatment WHERE AppointmentID IN ({placeholders})", tuple(appt_ids))
+    return cur.rowcount
+
+
+# Appointments with the owner of the animal, for ownership checks:
+# (ApptID, Scheduled_AnimalID, Animal_OwnerID, Treating_VetID, DateTime)
+_APPOINTMENTS_WITH_OWNER = """
+    SELECT a.ApptID, a.Scheduled_AnimalID, an.Animal_OwnerID, a.Treating_VetID, a.DateTime
+    FROM Appointment a
+    LEFT JOIN Animal an ON an.AnimalID = a.Scheduled_AnimalID
+"""
+
+
+def get_appointments_with_owner(cur, appt_ids):
+    if not appt_ids:
+        return []
+    placeholders = ", ".join(["%s"] * len(appt_ids))
+    cur.execute(_APPOINTMENTS_WITH_OWNER + f" WHERE a.ApptID IN ({placeholders})", tuple(appt_ids))
+    return cur.fetchall()
+
+
+def find_appointments_with_owner(cur, animal_id=None, vet_id=None, start=None, end=None):
+    # Appointments of an animal and/or vet with start <= DateTime < end
+    where, params = [], []
+    if animal_id is not None:
+        where.append("a.Scheduled_AnimalID = %s")
+        params.append(animal_id)
+    if vet_id is not None:
+        where.append("a.Treating_VetID = %s")
+        params.append(vet_id)
+    window, window_params = _window("a.DateTime", start, end)
+    sql = _APPOINTMENTS_WITH_OWNER + " WHERE " + (" AND ".join(where) or "1 = 1") + window
+    cur.execute(sql + " ORDER BY a.DateTime, a.ApptID", tuple(params + window_params))
+    return cur.fetchall()
+
+
+# ----------------------------
+# Reports
+# ----------------------------
+# Grouping happens in SQL; only one row per group comes back. `start` and
+# `end` bound Appointment.DateTime (start inclusive, end exclusive, None
+# for open-ended). `archive_years` adds those years' archive tables.
+
+def _window(column, start, end):
+    sql, params = "", []
+    if start is not None:
+        sql += f" AND {column} >= %s"
+        params.append(start)
+    if end is not None:
+        sql += f" AND {column} < %s"
+        params.append(end)
+    return sql, params
+
+
+def _week_start(cur, column):
+    # Monday of the column's week, as a date
+    if dialect(cur) == "sqlite":
+        return f"date({column}, 'weekday 0', '-6 days')"
+    return f"DATE({column} - INTERVAL WEEKDAY({column}) DAY)"
+
+
+def get_vet_weekly_appointments(cur, start=None, end=None, archive_years=()):
+    week = _week_start(cur, "a.DateTime")
+    window, params = _window("a.DateTime", start, end)
+    cur.execute(f"""
+        SELECT {week} AS WeekStart, v.VetID, v.Vname, COUNT(*) AS Appointments
+        FROM {_appointments(archive_years)} a
+        JOIN Veterinarian v ON v.VetID = a.Treating_VetID
+        WHERE 1 = 1 {window}
+        GROUP BY {week}, v.VetID, v.Vname
+        ORDER BY WeekStart, v.Vname
+    """, tuple(params))
+    return cur.fetchall()
+
+
+def get_treatment_frequency(cur, start=None, end=None, archive_years=()):
+    window, params = _window("a.DateTime", start, end)
+    cur.execute(f"""
+        SELECT t.TreatmentType, COUNT(*) AS Treatments
+        FROM {_treatments(archive_years)} t
+        JOIN {_appointments(archive_years)} a ON a.ApptID = t.AppointmentID
+        WHERE 1 = 1 {window}
+        GROUP BY t.TreatmentType
+        ORDER BY Treatments DESC, t.TreatmentType
+    """, tuple(params))
+    return cur.fetchall()
+
+
+def get_cancellation_counts(cur, start=None, end=None, archive_years=()):
+    # Per vet: (VetID, Vname, appointments kept, appointments cancelled)
+    kept, kept_params = _window("DateTime", start, end)
+    cancelled, cancelled_params = _window("DateTime", start, end)
+    cur.execute(f"""
+        SELECT v.VetID, v.Vname, COALESCE(k.n, 0) AS Kept, COALESCE(c.n, 0) AS Cancelled
+        FROM Veterinarian v
+        LEFT JOIN (
+            SELECT Treating_VetID, COUNT(*) AS n FROM {_appointments(archive_years)} ap
+            WHERE 1 = 1 {kept} GROUP BY Treating_VetID
+        ) k ON k.Treating_VetID = v.VetID
+        LEFT JOIN (
+            SELECT Treating_VetID, COUNT(*) AS n FROM AppointmentCancellation
+            WHERE 1 = 1 {cancelled} GROUP BY Treating_VetID
+        ) c ON c.Treating_VetID = v.VetID
+        ORDER BY v.Vname
+    """, tuple(kept_params + cancelled_params))
+    return cur.fetchall()
+
+
+def get_owner_visit_counts(cur, start=None, end=None, limit=50, archive_years=()):
+    window, params = _window("a.DateTime", start, end)
+    cur.execute(f"""
+        SELECT o.OwnerID, o.Oname, COUNT(a.ApptID) AS Visits,
+               MIN(a.DateTime) AS FirstVisit, MAX(a.DateTime) AS LastVisit
+        FROM Owner o
+        LEFT JOIN Animal an ON an.Animal_OwnerID = o.OwnerID
+        LEFT JOIN {_appointments(archive_years)} a ON a.Scheduled_AnimalID = an.AnimalID {window}
+        GROUP BY o.OwnerID, o.Oname
+        ORDER BY Visits DESC, o.OwnerID
+        LIMIT {int(limit)}
+    """, tuple(params))
+    return cur.fetchall()
+
+
+# ----------------------------
+# Archive
+# ----------------------------
+# Appointments older than the archive horizon move to per-year
+# AppointmentArchive_YYYY / TreatmentArchive_YYYY tables with the same
+# columns. Queries taking `archive_years` read those years as well.
+
+APPOINTMENT_COLUMNS = "ApptID, DateTime, Scheduled_AnimalID, Treating_VetID"
+TREATMENT_COLUMNS = "TreatmentID, AppointmentID, TreatmentType"
+_ARCHIVE_NAME = re.compile(r"AppointmentArchive_(\d{4})", re.IGNORECASE)
+
+
+def _appointments(archive_years=()):
+    # Appointment, or a UNION ALL of it and the given archive years
+    if not archive_years:
+        return "Appointment"
+    parts = [f"SELECT {APPOINTMENT_COLUMNS} FROM Appointment"]
+    parts += [f"SELECT {APPOINTMENT_COLUMNS} FROM AppointmentArchive_{int(y)}" for y in archive_years]
+    return "(" + " UNION ALL ".join(parts) + ")"
+
+
+def _treatments(archive_years=()):
+    if not archive_years:
+        return "Treatment"
+    parts = [f"SELECT {TREATMENT_COLUMNS} FROM Treatment"]
+    parts += [f"SELECT {TREATMENT_COLUMNS} FROM TreatmentArchive_{int(y)}" for y in archive_years]
+    return "(" + " UNION ALL ".join(parts) + ")"
+
+
+def get_archive_years(cur, start=None, end=None):
+    # Archived years, optionally only those overlapping [start, end)
+    years = []
+    for table in list_tables(cur):
+        match = _ARCHIVE_NAME.fullmatch(table)
+        if match:
+            years.append(int(match.group(1)))
+    if start is not None:
+        years = [y for y in years if y >= int(str(start)[:4])]
+    if end is not None:
+        years = [y for y in years if y <= int(str(end)[:4])]
+    return sorted(years)
+
+
+def create_archive_tables(cur, year):
+    year = int(year)
+    if dialect(cur) != "sqlite":
+        # LIKE copies columns and indexes (not foreign keys)
+        cur.execute(f"CREATE TABLE IF NOT EXISTS AppointmentArchive_{year} LIKE Appointment")
+        cur.execute(f"CREATE TABLE IF NOT EXISTS TreatmentArchive_{year} LIKE Treatment")
+        return
+
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS AppointmentArchive_{year} (
+            ApptID INTEGER PRIMARY KEY,
+            DateTime DATETIME NOT NULL,
+            Scheduled_AnimalID INTEGER NOT NULL,
+            Treating_VetID INTEGER
+        )
+    """)
+    cur.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_appt_archive_{year}_animal
+        ON AppointmentArchive_{year} (Scheduled_AnimalID, DateTime)
+    """)
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS TreatmentArchive_{year} (
+            TreatmentID INTEGER PRIMARY KEY,
+            AppointmentID INTEGER NOT NULL,
+            TreatmentType VARCHAR(100) NOT NULL
+        )
+    """)
+    cur.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_treatment_archive_{year}_appt
+        ON TreatmentArchive_{year} (AppointmentID)
+    """)
+
+
+def get_archivable_appointments(cur, before, limit):
+    # [(ApptID, DateTime)] of the oldest-ID appointments dated before
+    # `before`. The highest ApptID always stays, so SQLite never hands an
+    # archived ID out again.
+    cur.execute(f"""
+        SELECT ApptID, DateTime FROM Appointment
+        WHERE DateTime < %s AND ApptID < (SELECT MAX(ApptID) FROM Appointment)
+        ORDER BY ApptID
+        LIMIT {int(limit)}
+    """, (before,))
+    return cur.fetchall()
+
+
+def archive_appointments(cur, year, appt_ids):
+    # Copy the appointments and their treatments into the year's archive,
+    # then delete them; returns the number of treatments moved
+    placeholders = ", ".join(["%s"] * len(appt_ids))
+    params = tuple(appt_ids)
+    cur.execute(f"""
+        INSERT INTO AppointmentArchive_{int(year)} ({APPOINTMENT_COLUMNS})
+        SELECT {APPOINTMENT_COLUMNS} FROM Appointment WHERE ApptID IN ({placeholders})
+    """, params)
+    cur.execute(f"""
+        INSERT INTO TreatmentArchive_{int(year)} ({TREATMENT_COLUMNS})
+        SELECT {TREATMENT_COLUMNS} FROM Treatment WHERE AppointmentID IN ({placeholders})
+    """, params)
+    treatments = cur.rowcount
+    delete_treatments_by_appts(cur, appt_ids)
+    delete_appointments(cur, appt_ids)
+    return treatments
+
+
+# ----------------------------
+# Owner / Animal Queries
+# ----------------------------
+
+def get_owner(cur, owner_id):
+    cur.execute("SELECT * FROM Owner WHERE OwnerID = %s", (owner_id,))
+    return cur.fetchone()
+
+
+def get_owners_in_range(cur, first_id, last_id):
+    # Owners with first_id <= OwnerID <= last_id, in ID order
+    cur.execute("SELECT * FROM Owner WHERE OwnerID BETWEEN %s AND %s ORDER BY OwnerID",
+                (first_id, last_id))
+    return cur.fetchall()
+
+
+def get_animals(cur, animal_ids):
+    # [(AnimalID, Animal_OwnerID, Aname), ...] for the given IDs
+    if not animal_ids:
+        return []
+    placeholders = ", ".join(["%s"] * len(animal_ids))
+    cur.execute(
+        f"SELECT AnimalID, Animal_OwnerID, Aname FROM Animal WHERE AnimalID IN ({placeholders})",
+        tuple(animal_ids)
+    )
+    return cur.fetchall()
+
+
+def get_animals_by_owner(cur, owner_id):
+    sql = """
+        SELECT AnimalID, Aname, Species, Breed, DOB
+        FROM Animal
+        WHERE Animal_OwnerID = %s
+    """
+    cur.execute(sql, (owner_id,))
+    return cur.fetchall()
+
+
+def get_owner_history(cur, owner_id):
+    # One row per (animal, appointment, treatment); animals without
+    # appointments and appointments without treatments come back with NULLs
+    sql = """
+        SELECT an.AnimalID, an.Aname, an.Species, an.Breed, an.DOB,
+               a.ApptID, a.DateTime, v.Vname, t.TreatmentType
+        FROM Animal an
+        LEFT JOIN Appointment a ON a.Scheduled_AnimalID = an.AnimalID
+        LEFT JOIN Veterinarian v ON v.VetID = a.Treating_VetID
+        LEFT JOIN Treatment t ON t.AppointmentID = a.ApptID
+        WHERE an.Animal_OwnerID = %s
+        ORDER BY an.AnimalID, a.DateTime DESC, a.ApptID, t.TreatmentID
+    """
+    cur.execute(sql, (owner_id,))
+    return cur.fetchall()
+
+
+def get_appointment(cur, appt_id):
+    # (Scheduled_AnimalID, Treating_VetID, DateTime) or None
+    cur.execute(
+        "SELECT Scheduled_AnimalID, Treating_VetID, DateTime FROM Appointment WHERE ApptID = %s",
+        (appt_id,)
+    )
+    return cur.fetchone()
+
+
+def get_vet_appointment_times(cur, vet_id):
+    cur.execute(
+        "SELECT DateTime FROM Appointment WHERE Treating_VetID = %s ORDER BY DateTime",
+        (vet_id,)
+    )
+    return [r[0] for r in cur.fetchall()]
+
+
+def get_all_vets(cur):
+    cur.execute("SELECT VetID, Vname FROM Veterinarian ORDER BY VetID")
+    return cur.fetchall()
+
+
+def get_appt_animal(cur, appt_id):
+    cur.execute("SELECT Scheduled_AnimalID FROM Appointment WHERE ApptID = %s", (appt_id,))
+    return cur.fetchone()
+
+
+def get_owner_of_animal(cur, animal_id):
+    # Return Animal_OwnerID for verification
+    sql = "SELECT Animal_OwnerID FROM Animal WHERE AnimalID = %s"
+    cur.execute(sql, (animal_id,))
+    return cur.fetchone()
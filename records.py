@@ -0,0 +1,24 @@
+"""Row serialization
+
+Helpers shared by everything that turns query rows into JSON: the HTTP
+API (`server.py`), the batch command mode (`batch.py`) and the JSONL /
+Arrow exporters (`exporter.py`).
+"""
+
+from datetime import datetime
+
+
+# [{column: value}] for rows fetched from `cursor`
+def records(cursor, rows):
+    columns = [d[0] for d in cursor.description]
+    return [dict(zip(columns, row)) for row in rows]
+
+
+# json.dumps(default=...) hook: dates as ISO strings, Decimals and
+# anything else via str()
+def json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
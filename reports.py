@@ -0,0 +1,144 @@
+"""Clinic reports
+
+Management reports over a date window:
+
+- vet-weekly:    appointments per vet per week
+- treatments:    treatment-type frequency
+- cancellations: cancellation rate per vet (needs migration 2)
+- owner-visits:  visit counts per owner
+
+The grouping runs in SQL (see the Reports section of `query.py`), so only
+one row per group reaches Python, however many appointments are counted.
+Results are cached per report and window for `report_cache.ttl` seconds.
+
+    success, report = reports.run_report(cursor, "treatments", "2024-01-01", "2024-12-31")
+
+`run_sharded_report(router, ...)` runs the same report over every clinic
+branch of a `shards.ShardRouter`, concurrently, and merges the results.
+"""
+
+from collections import Counter
+from datetime import date, timedelta
+
+import cache
+import query
+
+
+# Keyed by (report name, start, end, options, scope)
+report_cache = cache.EntityCache(maxsize=256, ttl=300)
+
+
+# Each report is a fetch step (SQL, per database) and a shape step that
+# turns the fetched rows into (columns, rows). Shape steps also accept the
+# rows of several clinic databases concatenated, which is how sharded
+# reports are merged.
+
+def vet_weekly_appointments(rows):
+    rows = sorted(rows, key=lambda r: (r[0], r[2]))
+    return ["Week of", "Vet", "Appointments"], [(week, vname, n) for week, _, vname, n in rows]
+
+
+def treatment_frequency(rows):
+    counts = Counter()
+    for t, n in rows:
+        counts[t] += n
+    total = sum(counts.values())
+    ordered = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return ["Treatment", "Count", "Share %"], [(t, n, _pct(n, total)) for t, n in ordered]
+
+
+def cancellation_counts(cursor, start, end, archive_years=()):
+    # Cancelled = deleted before its date (logged by the migration 2 trigger)
+    if "appointmentcancellation" not in {t.lower() for t in query.list_tables(cursor)}:
+        raise LookupError("Cancellation log missing; run `python main.py migrate` first.")
+    return query.get_cancellation_counts(cursor, start, end, archive_years)
+
+
+def cancellation_rate(rows):
+    rows = sorted(rows, key=lambda r: r[1])
+    kept = sum(r[2] for r in rows)
+    cancelled = sum(r[3] for r in rows)
+    out = [(vname, k + c, c, _pct(c, k + c)) for _, vname, k, c in rows]
+    out.append(("All vets", kept + cancelled, cancelled, _pct(cancelled, kept + cancelled)))
+    return ["Vet", "Booked", "Cancelled", "Cancelled %"], out
+
+
+def owner_visits(rows, limit=50):
+    # Each database returns its own top `limit`; the overall top is among them
+    rows = sorted(rows, key=lambda r: (-r[2], r[0]))[:limit]
+    return ["OwnerID", "Owner", "Visits", "First visit", "Last visit"], rows
+
+
+# name -> (title, fetch, shape, note)
+REPORTS = {
+    "vet-weekly": ("Appointments per vet per week", query.get_vet_weekly_appointments,
+                   vet_weekly_appointments, None),
+    "treatments": ("Treatment frequency", query.get_treatment_frequency, treatment_frequency, None),
+    "cancellations": ("Cancellation rate", cancellation_counts, cancellation_rate,
+                      "No-show rates need attendance data, which the schema does not record."),
+    "owner-visits": ("Owner visit counts", query.get_owner_visit_counts, owner_visits, None),
+}
+
+
+def run_report(cursor, name, start=None, end=None, refresh=False, include_archive=False, **options):
+    # `start` / `end` are inclusive YYYY-MM-DD dates (None: open-ended).
+    # include_archive: also count archived years overlapping the window.
+    # Returns (success, {"title", "columns", "rows", "start", "end", "note",
+    # "cached"}) or (False, message).
+    def fetch(step, window):
+        return _fetch(cursor, step, window, include_archive, options)
+    return _run(name, start, end, refresh, options, fetch, scope=(None, include_archive))
+
+
+def run_sharded_report(router, name, start=None, end=None, refresh=False, include_archive=False, **options):
+    # Same as run_report, over every clinic database of a shards.ShardRouter:
+    # the fetch step runs on all shards at once and the rows are merged
+    def fetch(step, window):
+        results = router.gather(_fetch, step, window, include_archive, options)
+        return [row for rows in results.values() for row in rows]
+    return _run(name, start, end, refresh, options, fetch, scope=("shards", include_archive))
+
+
+def _fetch(cursor, step, window, include_archive, options):
+    years = query.get_archive_years(cursor, *window) if include_archive else ()
+    return step(cursor, *window, archive_years=years, **options)
+
+
+def _run(name, start, end, refresh, options, fetch, scope):
+    if name not in REPORTS:
+        return False, f"Unknown report: {name}"
+    title, step, shape, note = REPORTS[name]
+
+    try:
+        window = parse_window(start, end)
+    except ValueError:
+        return False, "Dates must be YYYY-MM-DD."
+
+    key = (name, window, tuple(sorted(options.items())), scope)
+    if not refresh:
+        cached = report_cache.get(key)
+        if cached is not None:
+            return True, dict(cached, cached=True)
+
+    try:
+        columns, rows = shape(fetch(step, window), **options)
+    except LookupError as e:
+        return False, str(e)
+    except Exception as e:
+        return False, f"Report failed: {e}"
+
+    result = {"title": title, "columns": columns, "rows": [tuple(r) for r in rows],
+              "start": start, "end": end, "note": note, "cached": False}
+    report_cache.put(key, result)
+    return True, result
+
+
+def parse_window(start=None, end=None):
+    # Inclusive dates -> (start, day after end) strings for the SQL filter
+    start = date.fromisoformat(start).isoformat() if start else None
+    end = (date.fromisoformat(end) + timedelta(days=1)).isoformat() if end else None
+    return start, end
+
+
+def _pct(part, whole):
+    return round(100 * part / whole, 1) if whole else 0.0
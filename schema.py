@@ -0,0 +1,127 @@
+"""Schema catalog
+
+Caches table, column, primary-key, auto-increment and foreign-key
+metadata so menu actions stop re-querying the schema on every call.
+Everything is loaded with a single query the first time it is needed.
+
+A catalog is shared per Database (`db.catalog`). Call `invalidate()`
+after DDL. With a snapshot path the metadata is also written to disk and
+read back on the next start-up instead of hitting the server.
+"""
+
+import json
+import os
+import threading
+
+import query
+
+
+class SchemaCatalog:
+    def __init__(self, snapshot_path=None):
+        self.snapshot_path = snapshot_path
+        # {table: {"columns": [DESCRIBE-style rows], "foreign_keys": {col: [table, col]}}}
+        self._tables = None
+        self._lock = threading.Lock()
+
+    # Load (or reload) metadata from the database and refresh the snapshot
+    def load(self, cursor):
+        tables = {}
+        for row in query.get_schema_metadata(cursor):
+            row = [_text(v) for v in row]
+            table, column, col_type, nullable, key, default, extra, ref_table, ref_col = row
+            entry = tables.setdefault(table, {"columns": [], "foreign_keys": {}})
+
+            # A column with several FKs comes back once per constraint
+            if not entry["columns"] or entry["columns"][-1][0] != column:
+                entry["columns"].append((column, col_type, nullable, key, default, extra))
+            if ref_table:
+                entry["foreign_keys"][column] = [ref_table, ref_col]
+
+        with self._lock:
+            self._tables = tables
+        self._write_snapshot(tables)
+        return self
+
+    # Drop cached metadata (and the snapshot) so the next lookup reloads
+    def invalidate(self):
+        with self._lock:
+            self._tables = None
+        if self.snapshot_path and os.path.exists(self.snapshot_path):
+            os.remove(self.snapshot_path)
+
+    def tables(self, cursor):
+        return list(self._ensure(cursor))
+
+    # Columns in MySQL DESCRIBE layout: (Field, Type, Null, Key, Default, Extra)
+    def describe(self, cursor, table_name):
+        entry = self._entry(cursor, table_name)
+        return list(entry["columns"]) if entry else []
+
+    def columns(self, cursor, table_name):
+        return [col[0] for col in self.describe(cursor, table_name)]
+
+    def primary_key(self, cursor, table_name):
+        return [col[0] for col in self.describe(cursor, table_name) if col[3] == "PRI"]
+
+    def auto_increment(self, cursor, table_name):
+        return [col[0] for col in self.describe(cursor, table_name)
+                if "auto_increment" in (col[5] or "")]
+
+    # {column: (referenced_table, referenced_column)}
+    def foreign_keys(self, cursor, table_name):
+        entry = self._entry(cursor, table_name)
+        if not entry:
+            return {}
+        return {col: tuple(ref) for col, ref in entry["foreign_keys"].items()}
+
+    def _ensure(self, cursor):
+        tables = self._tables
+        if tables is not None:
+            return tables
+
+        tables = self._read_snapshot()
+        if tables is not None:
+            with self._lock:
+                self._tables = tables
+            return tables
+
+        return self.load(cursor)._tables
+
+    def _entry(self, cursor, table_name):
+        entry = self._ensure(cursor).get(table_name)
+        if entry is None:
+            # Maybe created since we loaded: reload once before giving up
+            entry = self.load(cursor)._tables.get(table_name)
+        return entry
+
+    def _read_snapshot(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        return {
+            table: {
+                "columns": [tuple(col) for col in entry["columns"]],
+                "foreign_keys": entry["foreign_keys"],
+            }
+            for table, entry in data.items()
+        }
+
+    def _write_snapshot(self, tables):
+        if not self.snapshot_path:
+            return
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(tables, f, default=str)
+        os.replace(tmp_path, self.snapshot_path)
+
+
+def _text(value):
+    # INFORMATION_SCHEMA columns can come back as bytes on some servers
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8")
+    return value
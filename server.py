@@ -0,0 +1,437 @@
+"""HTTP/JSON API
+
+Exposes the menu operations as JSON endpoints for the web front end and
+kiosk tablets:
+
+    GET    /tables                                   list tables
+    GET    /tables/<table>?page_size=500             stream every row
+    POST   /tables/<table>            {"values": {...}}   insert a row
+    PATCH  /tables/<table>/<pk>       {"values": {...}}   update a row
+    PATCH  /tables/<table>            {"changes": [{"key", "values"}, ...]}
+                                                       update many rows
+    POST   /appointments              {"owner_id", "animal_id", "vet_id",
+                                       "date_time", "treatment_id" |
+                                       "treatment_type"}  schedule
+    DELETE /appointments/<appt_id>?animal_id=<id>   cancel
+    POST   /appointments/cancel       {"appt_ids": [...]} | {"vet_id", "start",
+                                       "end"} | {"animal_id"}  cancel many
+    GET    /owners/<owner_id>/pets                   list pets
+    GET    /owners/<owner_id>/dashboard              owner, pets and history
+    GET    /owners/<owner_id>/animals/<animal_id>/appointments   summary (?include_archive=1)
+    GET    /stats                                    requests/sec and latency
+
+Start it with `python main.py serve --port 8080 --workers 8`. Requests
+are handled by a fixed pool of worker threads. Each request borrows a
+pooled database connection, and connections are kept alive between
+requests (HTTP/1.1). Replies look like {"success": true, "result": ...}
+or {"success": false, "error": "..."}.
+"""
+
+import json
+import re
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from Database import PoolExhausted
+import profiling
+import records
+import services
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ServerStats:
+    # Per-route call/error counts and recent latencies (profiling.QueryStats)
+    def __init__(self, sample_size=10000):
+        self.sample_size = sample_size
+        self.started = time.perf_counter()
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, elapsed, ok):
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = profiling.QueryStats(self.sample_size)
+            stats.calls += 1
+            stats.total += elapsed
+            stats.max = max(stats.max, elapsed)
+            stats.samples.append(elapsed)
+            if not ok:
+                stats.errors += 1
+
+    def snapshot(self):
+        uptime = time.perf_counter() - self.started
+        with self._lock:
+            items = sorted(self._routes.items())
+            report = {}
+            for route, s in items:
+                report[route] = {
+                    "calls": s.calls,
+                    "errors": s.errors,
+                    "rps": round(s.calls / uptime, 2) if uptime else 0.0,
+                    "mean_ms": round(s.total / s.calls * 1000, 3) if s.calls else 0.0,
+                    "p50_ms": round(s.percentile(50) * 1000, 3),
+                    "p95_ms": round(s.percentile(95) * 1000, 3),
+                    "p99_ms": round(s.percentile(99) * 1000, 3),
+                    "max_ms": round(s.max * 1000, 3),
+                }
+        requests = sum(r["calls"] for r in report.values())
+        return {
+            "uptime_s": round(uptime, 1),
+            "requests": requests,
+            "rps": round(requests / uptime, 2) if uptime else 0.0,
+            "routes": report,
+        }
+
+
+class ApiServer(HTTPServer):
+    # HTTPServer that hands each accepted connection to a fixed worker pool
+    def __init__(self, address, db, workers=8, keep_alive=5):
+        super().__init__(address, ApiHandler)
+        self.db = db
+        self.keep_alive = keep_alive
+        self.stats = ServerStats()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vetclinic-http")
+        self._open = set()
+        self._open_lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self._open_lock:
+            self._open.add(request)
+        self.executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self._open_lock:
+                self._open.discard(request)
+            self.shutdown_request(request)
+
+    # Stop listening and hang up on kept-alive clients so workers exit
+    def server_close(self):
+        super().server_close()
+        with self._open_lock:
+            for request in self._open:
+                try:
+                    request.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "VetClinic/1.0"
+    # Headers and body are separate writes; without this, delayed ACKs
+    # add ~40 ms to every kept-alive request
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        # Idle keep-alive connections give their worker back after this long
+        self.timeout = self.server.keep_alive
+        super().setup()
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def log_message(self, format, *args):
+        # Per-request logging would dominate at high request rates; see /stats
+        pass
+
+    def _dispatch(self, method):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        route, ok = f"{method} ?", False
+        try:
+            # Read the body up front so a rejected request never leaves
+            # bytes behind on a kept-alive connection
+            length = int(self.headers.get("Content-Length") or 0)
+            self._raw_body = self.rfile.read(length) if length else b""
+            for route_method, pattern, name, action in ROUTES:
+                match = pattern.fullmatch(url.path)
+                if match and route_method == method:
+                    route = f"{method} {name}"
+                    params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                    ok = action(self, *match.groups(), params=params)
+                    break
+            else:
+                raise ApiError(404, "Not found.")
+        except ApiError as e:
+            self._send_json(e.status, {"success": False, "error": str(e)})
+        except PoolExhausted:
+            self._send_json(503, {"success": False, "error": "Server busy."})
+        except Exception as e:
+            self.server.handle_error(self.request, self.client_address)
+            self._send_json(500, {"success": False, "error": str(e)})
+        finally:
+            self.server.stats.record(route, time.perf_counter() - start, ok)
+
+    # ==================================================
+    #                 REQUEST / RESPONSE
+    # ==================================================
+
+    def _body(self):
+        if not self._raw_body:
+            return {}
+        try:
+            body = json.loads(self._raw_body)
+        except ValueError:
+            raise ApiError(400, "Request body is not valid JSON.")
+        if not isinstance(body, dict):
+            raise ApiError(400, "Request body must be a JSON object.")
+        return body
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload, default=records.json_default).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    # Reply with a (success, payload) result from services
+    def _send_result(self, success, result, status=200):
+        if success:
+            self._send_json(status, {"success": True, "result": result})
+        else:
+            self._send_json(400, {"success": False, "error": result})
+        return success
+
+    def _send_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+
+    # ==================================================
+    #                    ENDPOINTS
+    # ==================================================
+
+    def list_tables(self, params):
+        with self.server.db.borrow(readonly=True) as (cursor, connection):
+            return self._send_result(True, services.list_tables(cursor, self.server.db.catalog))
+
+    def view_table(self, table, params):
+        # Rows go out page by page (chunked encoding), so memory stays flat
+        # however big the table is
+        page_size = _int_param(params, "page_size", 500)
+        db = self.server.db
+        with db.borrow(buffered=False, readonly=True) as (cursor, connection):
+            table = _resolve_table(cursor, db, table)
+            pages = services.view_table(cursor, table, page_size, db.catalog)
+            first = next(pages, [])
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            columns = [d[0] for d in cursor.description or []]
+            self._send_chunk(b'{"success": true, "result": {"columns": '
+                             + json.dumps(columns).encode("utf-8") + b', "rows": [')
+            sep = b""
+            try:
+                for page in _chain(first, pages):
+                    rows = b",".join(json.dumps(list(row), default=records.json_default).encode("utf-8")
+                                     for row in page)
+                    if rows:
+                        self._send_chunk(sep + rows)
+                        sep = b","
+            except Exception:
+                # Headers are already out: drop the connection so the client
+                # sees a truncated response rather than a bogus complete one
+                self.close_connection = True
+                return False
+            finally:
+                pages.close()
+            self._send_chunk(b"]}}")
+            self.wfile.write(b"0\r\n\r\n")
+        return True
+
+    def insert_row(self, table, params):
+        values = _values(self._body())
+        db = self.server.db
+        with db.borrow() as (cursor, connection):
+            table = _resolve_table(cursor, db, table)
+            if table.lower() in services.RESTRICTED_INSERT_TABLES:
+                raise ApiError(403, f"Rows in {table} are created by scheduling appointments.")
+            columns = _check_columns(cursor, db, table, values)
+            success, result = services.insert_row(cursor, connection, table, columns,
+                                                  [values[c] for c in columns])
+        return self._send_result(success, result, status=201)
+
+    def update_row(self, table, pk_value, params):
+        values = _values(self._body())
+        db = self.server.db
+        with db.borrow() as (cursor, connection):
+            table = _resolve_table(cursor, db, table)
+            _check_columns(cursor, db, table, values)
+            pk_cols = services.get_primary_key(cursor, table, db.catalog)
+            if len(pk_cols) != 1:
+                raise ApiError(400, f"{table} has no single-column primary key.")
+            success, result = services.update_row(cursor, connection, table, pk_cols[0], pk_value, values)
+        return self._send_result(success, result)
+
+    def update_rows(self, table, params):
+        changes = self._body().get("changes")
+        if not isinstance(changes, list) or not all(
+                isinstance(c, dict) and "key" in c and isinstance(c.get("values"), dict) for c in changes):
+            raise ApiError(400, 'Expected {"changes": [{"key": ..., "values": {...}}, ...]}')
+        db = self.server.db
+        with db.borrow() as (cursor, connection):
+            table = _resolve_table(cursor, db, table)
+            success, result = services.update_rows(cursor, connection, table,
+                                                   [(c["key"], c["values"]) for c in changes],
+                                                   catalog=db.catalog)
+        return self._send_result(success, result)
+
+    def schedule(self, params):
+        body = self._body()
+        missing = [k for k in ("owner_id", "animal_id", "vet_id", "date_time") if body.get(k) in (None, "")]
+        if missing:
+            raise ApiError(400, f"Missing fields: {', '.join(missing)}")
+        if body.get("treatment_id") is not None:
+            choice, new_type = str(body["treatment_id"]), None
+        elif body.get("treatment_type"):
+            choice, new_type = "0", body["treatment_type"]
+        else:
+            raise ApiError(400, "Give either treatment_id or treatment_type.")
+
+        with self.server.db.borrow() as (cursor, connection):
+            success, result = services.schedule_appointment_and_treatment(
+                cursor, connection, body["owner_id"], body["animal_id"], body["vet_id"],
+                body["date_time"], choice, new_type
+            )
+        return self._send_result(success, result, status=201)
+
+    def cancel(self, appt_id, params):
+        if not params.get("animal_id"):
+            raise ApiError(400, "Missing query parameter: animal_id")
+        with self.server.db.borrow() as (cursor, connection):
+            success, result = services.cancel_appointment(cursor, connection, appt_id, params["animal_id"])
+        return self._send_result(success, result)
+
+    def cancel_many(self, params):
+        body = self._body()
+        criteria = {k: body.get(k) for k in ("appt_ids", "animal_id", "owner_id", "vet_id", "start", "end")}
+        if criteria["appt_ids"] is not None and not isinstance(criteria["appt_ids"], list):
+            raise ApiError(400, "appt_ids must be a list.")
+        with self.server.db.borrow() as (cursor, connection):
+            success, result = services.cancel_appointments(cursor, connection, **criteria)
+        return self._send_result(success, result)
+
+    def list_pets(self, owner_id, params):
+        with self.server.db.borrow(readonly=True) as (cursor, connection):
+            pets = services.list_pets_by_owner(cursor, owner_id)
+            if pets is None:
+                raise ApiError(404, "Owner not found.")
+            return self._send_result(True, records.records(cursor, pets))
+
+    def dashboard(self, owner_id, params):
+        db = self.server.db
+        with db.borrow(readonly=True) as (cursor, connection):
+            success, result = services.get_owner_dashboard(cursor, owner_id, db.catalog)
+        if not success:
+            raise ApiError(404, result)
+        return self._send_result(True, result)
+
+    def summary(self, owner_id, animal_id, params):
+        with self.server.db.borrow(readonly=True) as (cursor, connection):
+            include_archive = params.get("include_archive") in ("1", "true")
+            success, rows = services.get_appointment_summary(cursor, owner_id, animal_id, include_archive)
+            return self._send_result(success, records.records(cursor, rows) if success else rows)
+
+    def stats(self, params):
+        result = self.server.stats.snapshot()
+        if self.server.db.replicas:
+            result["replicas"] = self.server.db.replica_status()
+        return self._send_result(True, result)
+
+
+# (method, path pattern, route name for /stats, handler)
+ROUTES = [
+    ("GET", re.compile(r"/tables"), "/tables", ApiHandler.list_tables),
+    ("GET", re.compile(r"/tables/(\w+)"), "/tables/{table}", ApiHandler.view_table),
+    ("POST", re.compile(r"/tables/(\w+)"), "/tables/{table}", ApiHandler.insert_row),
+    ("PATCH", re.compile(r"/tables/(\w+)"), "/tables/{table}", ApiHandler.update_rows),
+    ("PATCH", re.compile(r"/tables/(\w+)/([^/]+)"), "/tables/{table}/{pk}", ApiHandler.update_row),
+    ("POST", re.compile(r"/appointments"), "/appointments", ApiHandler.schedule),
+    ("POST", re.compile(r"/appointments/cancel"), "/appointments/cancel", ApiHandler.cancel_many),
+    ("DELETE", re.compile(r"/appointments/([^/]+)"), "/appointments/{id}", ApiHandler.cancel),
+    ("GET", re.compile(r"/owners/([^/]+)/pets"), "/owners/{id}/pets", ApiHandler.list_pets),
+    ("GET", re.compile(r"/owners/([^/]+)/dashboard"), "/owners/{id}/dashboard", ApiHandler.dashboard),
+    ("GET", re.compile(r"/owners/([^/]+)/animals/([^/]+)/appointments"),
+     "/owners/{id}/animals/{id}/appointments", ApiHandler.summary),
+    ("GET", re.compile(r"/stats"), "/stats", ApiHandler.stats),
+]
+
+
+def serve(db, host="127.0.0.1", port=8080, workers=8):
+    # Run until interrupted; returns the final /stats report
+    server = ApiServer((host, port), db, workers)
+    print(f"Serving on http://{host}:{server.server_port} with {workers} workers (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return server.stats.snapshot()
+
+
+# ======================================================
+#                      HELPERS
+# ======================================================
+
+def _resolve_table(cursor, db, table):
+    name = services.resolve_table(cursor, table, db.catalog)
+    if name is None:
+        raise ApiError(404, f"Unknown table: {table}")
+    return name
+
+
+def _check_columns(cursor, db, table, values):
+    unknown = services.unknown_columns(cursor, table, values, db.catalog)
+    if unknown:
+        raise ApiError(400, f"Unknown columns for {table}: {', '.join(unknown)}")
+    return list(values)
+
+
+def _values(body):
+    values = body.get("values")
+    if not isinstance(values, dict) or not values:
+        raise ApiError(400, 'Body must contain a non-empty "values" object.')
+    return values
+
+
+def _int_param(params, name, default):
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer.")
+    if value < 1:
+        raise ApiError(400, f"{name} must be positive.")
+    return value
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
@@ -4,52 +4,338 @@ This module validates inputs and orchestrates calls to `query` (SQL helpers).
 It performs commits and returns (success, payload_or_message) tuples.
 """
 
+import inspect
+from datetime import datetime, timedelta
+from itertools import islice
+
+import cache
 import query
+import treatments
+import availability
+
+
+# Owner / Animal / Veterinarian lookups answered from memory. Keys are
+# (lowercased table, str(primary key)); writes made through this module
+# invalidate the keys they touch. Rows read from a replica are kept under
+# their own keys, and only for as long as the replica may lag.
+entity_cache = cache.EntityCache(maxsize=4096, ttl=300)
+
+# Cached tables and their primary-key columns
+CACHED_ENTITIES = {"owner": "OwnerID", "animal": "AnimalID", "veterinarian": "VetID"}
+
+
+def _cache_key(table_name, pk_value):
+    return (table_name.lower(), str(pk_value))
+
+
+def _invalidate_entities(table_name, pk_values):
+    if table_name.lower() in CACHED_ENTITIES:
+        for pk_value in pk_values:
+            key = _cache_key(table_name, pk_value)
+            entity_cache.invalidate(key)
+            entity_cache.invalidate(("replica",) + key)
+
+
+def _cached_entity(cursor, table_name, pk_value, loader):
+    # A replica may be up to `staleness` seconds behind, so what it returns
+    # must not be served to primary readers, nor kept longer than that
+    staleness = getattr(cursor, "staleness", 0)
+    if not staleness:
+        return entity_cache.get_or_load(_cache_key(table_name, pk_value), loader)
+    return entity_cache.get_or_load(("replica",) + _cache_key(table_name, pk_value), loader,
+                                    ttl=min(entity_cache.ttl, staleness))
+
+
+def _invalidate_calendar(table_name):
+    # Appointment rows written outside booking/cancelling: reload lazily.
+    # Added or renamed vets must show up in free_vets.
+    if table_name.lower() == "appointment":
+        vet_calendar.reset()
+    elif table_name.lower() == "veterinarian":
+        vet_calendar.forget_vets()
+
+
+def cache_stats():
+    return entity_cache.stats()
+
+
+# Distinct treatment types for the booking prompt, refreshed incrementally
+treatment_catalog = treatments.TreatmentCatalog()
+
+# Booked slots per vet; rejects double bookings and finds free slots
+vet_calendar = availability.VetCalendar()
+
+# Rows here are only created through scheduling, never by a plain insert
+RESTRICTED_INSERT_TABLES = {"appointment", "treatment"}
+
 
 # ======================================================
 #               GENERIC TABLE OPERATIONS
 # ======================================================
 
-def view_table(cursor, table_name):
-    rows = query.select_all_from_table(cursor, table_name)
-    return rows
+def view_table(cursor, table_name, page_size=500, catalog=None):
+    # Yield the whole table as lists of at most `page_size` rows.
+    # Tables with a single-column primary key are walked by keyset
+    # (WHERE pk > last ORDER BY pk); anything else is streamed from one
+    # SELECT in fetchmany() chunks, which needs an unbuffered cursor to
+    # keep memory flat on MySQL. If the caller stops a stream early, the
+    # cursor is closed, so stream on a cursor used for nothing else.
+    cols = get_table_columns(cursor, table_name, catalog)
+    pk_positions = [i for i, col in enumerate(cols) if col[3] == "PRI"]
+
+    if len(pk_positions) != 1:
+        query.select_all_from_table(cursor, table_name)
+        try:
+            yield from query.fetch_batches(cursor, page_size)
+        except GeneratorExit:
+            # Closing discards the unread rows instead of fetching them
+            cursor.close()
+            raise
+        return
+
+    pk_idx = pk_positions[0]
+    pk_col = cols[pk_idx][0]
+    last = None
+    while True:
+        rows = query.select_page(cursor, table_name, pk_col, last, page_size)
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        last = rows[-1][pk_idx]
+
+
+# Schema lookups take an optional schema.SchemaCatalog; with one they are
+# answered from memory instead of querying the server each time.
+
+def get_table_columns(cursor, table_name, catalog=None):
+    if catalog:
+        return catalog.describe(cursor, table_name)
+    return query.describe_table(cursor, table_name)
 
 
-def get_table_columns(cursor, table_name):
-    return query.describe_table(cursor, table_name)
+def get_primary_key(cursor, table_name, catalog=None):
+    return [col[0] for col in get_table_columns(cursor, table_name, catalog) if col[3] == "PRI"]
+
+
+def get_auto_increment_columns(cursor, table_name, catalog=None):
+    return [col[0] for col in get_table_columns(cursor, table_name, catalog)
+            if "auto_increment" in (col[5] or "")]
 
 
 def insert_row(cursor, connection, table_name, columns, values):
     try:
         query.insert_into_table(cursor, table_name, columns, values)
         connection.commit()
+
+        pk_col = CACHED_ENTITIES.get(table_name.lower())
+        if pk_col in columns:
+            _invalidate_entities(table_name, [values[columns.index(pk_col)]])
+        _invalidate_calendar(table_name)
         return True, "Insert successful."
     except Exception:
         return False, "Invalid input."
 
 
 
+def bulk_insert(cursor, connection, table_name, columns, rows, batch_size=1000, commit_every=10000):
+    # Insert an iterable of rows (sequences in `columns` order, or dicts
+    # keyed by column) in executemany() batches, committing roughly every
+    # `commit_every` rows. Each batch runs under a savepoint, so a bad
+    # batch is rolled back and reported while the import carries on.
+    report = {"inserted": 0, "failed": 0, "errors": []}
+    batches = _chunks(rows, batch_size)
+    first_row = 1
+    since_commit = 0
+    # Rows given with their primary key replace whatever was cached for it
+    pk_col = CACHED_ENTITIES.get(table_name.lower())
+    pk_idx = columns.index(pk_col) if pk_col in columns else None
+
+    if not getattr(connection, "in_transaction", False):
+        query.begin_transaction(cursor)
+
+    while True:
+        try:
+            batch = next(batches)
+        except StopIteration:
+            break
+        except Exception as e:
+            # The source itself failed (bad file, malformed record): stop here
+            report["errors"].append({"first_row": first_row, "last_row": None, "error": str(e)})
+            break
+
+        values = [tuple(row.get(c) for c in columns) if isinstance(row, dict) else tuple(row)
+                  for row in batch]
+        last_row = first_row + len(values) - 1
+
+        query.savepoint(cursor, "bulk_batch")
+        try:
+            query.insert_many(cursor, table_name, columns, values)
+            query.release_savepoint(cursor, "bulk_batch")
+            if pk_idx is not None:
+                _invalidate_entities(table_name, [v[pk_idx] for v in values])
+            report["inserted"] += len(values)
+            since_commit += len(values)
+        except Exception as e:
+            query.rollback_to_savepoint(cursor, "bulk_batch")
+            query.release_savepoint(cursor, "bulk_batch")
+            report["failed"] += len(values)
+            report["errors"].append({"first_row": first_row, "last_row": last_row, "error": str(e)})
+
+        if since_commit >= commit_every:
+            connection.commit()
+            query.begin_transaction(cursor)
+            since_commit = 0
+
+        first_row = last_row + 1
+
+    connection.commit()
+    _invalidate_calendar(table_name)
+    return not report["errors"], report
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
 def update_row(cursor, connection, table_name, pk_column, pk_value, update_dict):
     try:
         query.update_table_row(cursor, table_name, pk_column, pk_value, update_dict)
         connection.commit()
+
+        # The key itself may have been changed too
+        _invalidate_entities(table_name, [pk_value] + ([update_dict[pk_column]] if pk_column in update_dict else []))
+        _invalidate_calendar(table_name)
         return True, "Update successful."
     except Exception:
         return False, "Invalid input."
 
 
-def list_tables(cursor):
+def update_rows(cursor, connection, table_name, changes, pk_column=None, chunk_size=200, catalog=None):
+    # Apply many row updates in one transaction. `changes` is an iterable
+    # of (pk_value, {column: value}); later changes to the same key win.
+    # Keys with the same set of changed columns are updated together,
+    # `chunk_size` keys per UPDATE ... CASE statement, then committed once.
+    # Returns (success, {"updated", "failed", "rows", "results": [{"key",
+    # "success", "affected", "error"?}]}) with results in first-seen key
+    # order. "updated" / "failed" count keys; "affected" and "rows" count
+    # the rows each key matched, which can be several for a non-unique
+    # pk_column.
+    table = resolve_table(cursor, table_name, catalog)
+    if table is None:
+        return False, f"Unknown table: {table_name}"
+    pk_cols = get_primary_key(cursor, table, catalog)
+    if pk_column is None:
+        if len(pk_cols) != 1:
+            return False, f"{table} has no single-column primary key."
+        pk_column = pk_cols[0]
+
+    merged = {}
+    try:
+        for pk_value, values in changes:
+            entry = merged.setdefault(str(pk_value), (pk_value, {}))
+            entry[1].update(values)
+    except Exception as e:
+        return False, f"Invalid input: {e}"
+
+    columns = {c for _, values in merged.values() for c in values}
+    unknown = unknown_columns(cursor, table, columns | {pk_column}, catalog)
+    if unknown:
+        return False, f"Unknown columns for {table}: {', '.join(unknown)}"
+
+    groups = {}
+    for key, (pk_value, values) in merged.items():
+        if values:
+            # A changed key goes last: MySQL applies SET clauses in order
+            cols = tuple(sorted(c for c in values if c != pk_column)) + ((pk_column,) if pk_column in values else ())
+            groups.setdefault(cols, []).append(key)
+
+    affected = {}    # merged key -> rows it matched
+    try:
+        if not connection.in_transaction:
+            query.begin_transaction(cursor)
+        for cols, keys in groups.items():
+            for chunk in _chunks(keys, chunk_size):
+                counts = query.count_rows_by_key(cursor, table, pk_column, [merged[k][0] for k in chunk])
+                matched = [chunk[i] for i in sorted(counts)]
+                if matched:
+                    query.update_rows(cursor, table, pk_column, cols, [merged[k] for k in matched])
+                affected.update((chunk[i], n) for i, n in counts.items())
+        connection.commit()
+    except Exception as e:
+        connection.rollback()
+        return False, f"Invalid input: {e}"
+
+    if pk_cols == [pk_column]:
+        _invalidate_entities(table, [pk for pk, _ in merged.values()]
+                             + [values[pk_column] for _, values in merged.values() if pk_column in values])
+    elif table.lower() in CACHED_ENTITIES:
+        # Keyed by another column: the cached primary keys are unknown
+        entity_cache.clear()
+    _invalidate_calendar(table)
+
+    results = []
+    for key, (pk_value, values) in merged.items():
+        if not values:
+            results.append({"key": pk_value, "success": False, "affected": 0, "error": "Nothing to change."})
+        elif key in affected:
+            results.append({"key": pk_value, "success": True, "affected": affected[key]})
+        else:
+            results.append({"key": pk_value, "success": False, "affected": 0, "error": "Row not found."})
+    updated = sum(1 for r in results if r["success"])
+    return True, {"updated": updated, "failed": len(results) - updated,
+                  "rows": sum(r["affected"] for r in results), "results": results}
+
+
+def list_tables(cursor, catalog=None):
+    if catalog:
+        return catalog.tables(cursor)
     return query.list_tables(cursor)
 
 
+def resolve_table(cursor, table_name, catalog=None):
+    # The table's real name (case-insensitive match) or None. Table names
+    # end up in SQL text, so callers taking them from outside check here.
+    for name in list_tables(cursor, catalog):
+        if name.lower() == str(table_name).lower():
+            return name
+    return None
+
+
+def unknown_columns(cursor, table_name, columns, catalog=None):
+    known = {col[0] for col in get_table_columns(cursor, table_name, catalog)}
+    return [c for c in columns if c not in known]
+
+
 
 # ======================================================
 #               OWNER / ANIMAL OPERATIONS
 # ======================================================
 
+def get_animal(cursor, animal_id):
+    # (Animal_OwnerID, Aname) or None, through the entity cache
+    return _cached_entity(cursor, "Animal", animal_id, lambda: query.get_animal_owner(cursor, animal_id))
+
+
+def get_owner(cursor, owner_id):
+    # Owner row or None, through the entity cache
+    return _cached_entity(cursor, "Owner", owner_id, lambda: query.get_owner(cursor, owner_id))
+
+
+def get_vet(cursor, vet_id):
+    # (Vname,) or None, through the entity cache
+    return _cached_entity(cursor, "Veterinarian", vet_id, lambda: query.get_vet_name(cursor, vet_id))
+
+
 def verify_owner_of_animal(cursor, owner_id, animal_id):
     # Return (is_valid, animal_name)
-    result = query.get_animal_owner(cursor, animal_id)
+    result = get_animal(cursor, animal_id)
     if not result:
         return False, None
 
@@ -58,53 +344,118 @@ def verify_owner_of_animal(cursor, owner_id, animal_id):
 
 
 def list_pets_by_owner(cursor, owner_id):
-    owner_exists = query.get_owner(cursor, owner_id)
+    owner_exists = get_owner(cursor, owner_id)
     if not owner_exists:
         return None  # caller prints error
 
     return query.get_animals_by_owner(cursor, owner_id)
 
 
+def get_owner_dashboard(cursor, owner_id, catalog=None):
+    # The owner, every animal and each animal's appointments with vet and
+    # treatments: the cached owner lookup plus one join, assembled in a
+    # single pass over rows ordered by animal then appointment.
+    # Returns (True, dashboard) or (False, message).
+    owner = get_owner(cursor, owner_id)
+    if not owner:
+        return False, "Owner not found."
+
+    owner_cols = [col[0] for col in get_table_columns(cursor, "Owner", catalog)]
+    dashboard = {"owner": dict(zip(owner_cols, owner)), "animals": []}
+
+    animal = appt = None
+    for (animal_id, aname, species, breed, dob,
+         appt_id, date_time, vet_name, treatment) in query.get_owner_history(cursor, owner_id):
+        if animal is None or animal["AnimalID"] != animal_id:
+            animal = {"AnimalID": animal_id, "Aname": aname, "Species": species,
+                      "Breed": breed, "DOB": dob, "appointments": []}
+            dashboard["animals"].append(animal)
+            appt = None
+        if appt_id is None:
+            continue
+        if appt is None or appt["ApptID"] != appt_id:
+            appt = {"ApptID": appt_id, "DateTime": date_time, "Vet": vet_name, "treatments": []}
+            animal["appointments"].append(appt)
+        if treatment is not None:
+            appt["treatments"].append(treatment)
+
+    return True, dashboard
+
+
 # ======================================================
 #            APPOINTMENT & TREATMENT OPERATIONS
 # ======================================================
 
 def get_existing_treatments(cursor):
-    return query.get_all_treatments(cursor)
+    # [(TreatmentID, TreatmentType)], one entry per distinct type
+    treatment_catalog.refresh(cursor)
+    return treatment_catalog.entries()
+
+
+def search_treatments(cursor, prefix):
+    treatment_catalog.refresh(cursor)
+    return treatment_catalog.search(prefix)
+
+
+def _archived_treatment_types(cursor, treatment_ids):
+    # {str(TreatmentID): type} for IDs whose rows were archived; their
+    # types stay bookable
+    years = query.get_archive_years(cursor) if treatment_ids else []
+    if not years:
+        return {}
+    return {str(r[0]): r[1] for r in query.get_treatment_types(cursor, treatment_ids, years)}
 
 
 def schedule_appointment_and_treatment(cursor, connection, owner_id, animal_id, vet_id, date_time, treatment_choice, new_treatment_type=None):
+    reserved = False
     try:
-        # 1. Validate animal ownership
-        is_owner, animal_name = verify_owner_of_animal(cursor, owner_id, animal_id)
-        if not is_owner:
+        # 1. Open the booking transaction (joins one already in progress)
+        if not connection.in_transaction:
+            query.begin_transaction(cursor)
+
+        # 2. Validate owner, animal, vet and treatment in one locking lookup.
+        #    Treatment IDs offered by the catalog resolve from memory.
+        treatment_id = None if treatment_choice == "0" else treatment_choice
+        known_type = treatment_catalog.type_for_id(treatment_id) if treatment_id else None
+        row = query.get_booking_context(cursor, animal_id, vet_id, None if known_type else treatment_id)
+
+        if not row or str(row[0]) != str(owner_id):
+            connection.rollback()
             return False, "Animal does not belong to owner."
+        _, animal_name, vet_found, vet_name, treatment_found, treatment_type = row
 
-        # 2. Validate veterinarian
-        vet_result = query.get_vet_name(cursor, vet_id)
-        if not vet_result:
+        if vet_found is None:
+            connection.rollback()
             return False, "Veterinarian not found."
-        vet_name = vet_result[0]
 
         # 3. Determine treatment type
-        if treatment_choice == "0":
+        if treatment_id is None:
             treatment_type = new_treatment_type
-        else:
-            row = query.get_treatment_type_by_id(cursor, treatment_choice)
-            if not row:
+        elif known_type:
+            treatment_type = known_type
+        elif treatment_found is None:
+            treatment_type = _archived_treatment_types(cursor, [treatment_id]).get(str(treatment_id))
+            if treatment_type is None:
+                connection.rollback()
                 return False, "Invalid Treatment ID."
-            treatment_type = row[0]
 
-        # 4. Insert appointment
-        appt_id = query.insert_appointment(cursor, date_time, animal_id, vet_id)
-        if not appt_id:
-            appt_id = query.fallback_latest_appointment(cursor)
+        # 4. Claim the vet's slot; the calendar rejects overlapping bookings
+        if not vet_calendar.reserve(cursor, vet_id, date_time):
+            connection.rollback()
+            return False, "Vet is already booked at that time."
+        reserved = True
 
-        # 5. Insert treatment
+        # 5. Insert appointment + treatment; lastrowid is per-connection,
+        #    so it is always this insert's ID even under concurrent bookings
+        appt_id = query.insert_appointment(cursor, date_time, animal_id, vet_id)
         query.insert_treatment(cursor, appt_id, treatment_type)
 
         connection.commit()
 
+        # The lookup just read these rows; keep them for the next request
+        entity_cache.put(_cache_key("Animal", animal_id), (row[0], animal_name))
+        entity_cache.put(_cache_key("Veterinarian", vet_id), (vet_name,))
+
         return True, {
             "ApptID": appt_id,
             "DateTime": date_time,
@@ -114,24 +465,163 @@ def schedule_appointment_and_treatment(cursor, connection, owner_id, animal_id,
         }
 
     except Exception:
+        connection.rollback()
+        if reserved:
+            vet_calendar.release(vet_id, date_time)
         return False, "Invalid input."
 
-def get_appointment_summary(cursor, owner_id, animal_id):
+
+def next_free_slots(cursor, vet_id, after, count=5):
+    # Returns (True, [slot datetimes]) or (False, message)
+    if not get_vet(cursor, vet_id):
+        return False, "Veterinarian not found."
+    if not _is_datetime(after):
+        return False, "Invalid DateTime."
+    return True, vet_calendar.next_free(cursor, vet_id, after, count)
+
+
+def free_vets_at(cursor, when):
+    # Returns (True, [(VetID, Vname)]) or (False, message)
+    if not _is_datetime(when):
+        return False, "Invalid DateTime."
+    return True, vet_calendar.free_vets(cursor, when)
+
+
+def expand_recurrence(items, every_days, count):
+    # Repeat each booking request `count` times, `every_days` apart
+    expanded = []
+    for item in items:
+        start = _parse_datetime(item["date_time"])
+        for n in range(count):
+            when = start + timedelta(days=every_days * n)
+            expanded.append(dict(item, date_time=_format_datetime(when, item["date_time"])))
+    return expanded
+
+
+def schedule_batch(cursor, connection, items, chunk_size=500):
+    # Book many appointments at once. Each item is a dict with owner_id,
+    # animal_id, vet_id, date_time and either treatment_id (existing type)
+    # or treatment_type (new type). All items are validated with one IN
+    # query per entity, then every valid booking is written with
+    # multi-row inserts in a single transaction.
+    # Returns (success, [per-item result dicts]) in input order.
+    results = [{"index": i, "success": False} for i in range(len(items))]
+    if not items:
+        return True, results
+    reserved = []
+
+    try:
+        if not connection.in_transaction:
+            query.begin_transaction(cursor)
+
+        animals = {str(r[0]): r for r in query.get_animals(cursor, {it["animal_id"] for it in items})}
+        vets = {str(r[0]): r[1] for r in query.get_vets(cursor, {it["vet_id"] for it in items})}
+        treatment_ids = {it["treatment_id"] for it in items if it.get("treatment_id") not in (None, "", "0")}
+        known = {str(t): treatment_catalog.type_for_id(t) for t in treatment_ids}
+        known = {t: t_type for t, t_type in known.items() if t_type}
+        unknown = {t for t in treatment_ids if str(t) not in known}
+        treatments = dict(known, **{str(r[0]): r[1] for r in query.get_treatment_types(cursor, unknown)})
+        treatments.update(_archived_treatment_types(cursor, {t for t in unknown if str(t) not in treatments}))
+
+        valid = []
+        for item, result in zip(items, results):
+            animal = animals.get(str(item["animal_id"]))
+            treatment_id = item.get("treatment_id")
+
+            if not animal or str(animal[1]) != str(item["owner_id"]):
+                result["error"] = "Animal does not belong to owner."
+            elif str(item["vet_id"]) not in vets:
+                result["error"] = "Veterinarian not found."
+            elif treatment_id not in (None, "", "0") and str(treatment_id) not in treatments:
+                result["error"] = "Invalid Treatment ID."
+            elif treatment_id in (None, "", "0") and not str(item.get("treatment_type") or "").strip():
+                result["error"] = "Give either treatment_id or treatment_type."
+            elif not _is_datetime(item["date_time"]):
+                result["error"] = "Invalid DateTime."
+            elif not vet_calendar.reserve(cursor, item["vet_id"], item["date_time"]):
+                result["error"] = "Vet is already booked at that time."
+            else:
+                reserved.append((item["vet_id"], item["date_time"]))
+                if treatment_id in (None, "", "0"):
+                    treatment_type = item.get("treatment_type")
+                else:
+                    treatment_type = treatments[str(treatment_id)]
+                result.update({
+                    "DateTime": item["date_time"],
+                    "Vet": vets[str(item["vet_id"])],
+                    "Animal": animal[2],
+                    "Treatment": treatment_type,
+                })
+                valid.append((item, result))
+
+        for start in range(0, len(valid), chunk_size):
+            chunk = valid[start:start + chunk_size]
+            appt_ids = query.insert_appointments(
+                cursor, [(it["date_time"], it["animal_id"], it["vet_id"]) for it, _ in chunk]
+            )
+            query.insert_many(
+                cursor, "Treatment", ["AppointmentID", "TreatmentType"],
+                [(appt_id, res["Treatment"]) for appt_id, (_, res) in zip(appt_ids, chunk)]
+            )
+            for appt_id, (_, res) in zip(appt_ids, chunk):
+                res["ApptID"] = appt_id
+
+        connection.commit()
+        for _, res in valid:
+            res["success"] = True
+        return True, results
+
+    except Exception:
+        connection.rollback()
+        for vet_id, date_time in reserved:
+            vet_calendar.release(vet_id, date_time)
+        for result in results:
+            result["success"] = False
+            result.setdefault("error", "Invalid input.")
+            for key in ("ApptID", "DateTime", "Vet", "Animal", "Treatment"):
+                result.pop(key, None)
+        return False, results
+
+
+def _parse_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).strip())
+
+
+def _is_datetime(value):
+    try:
+        _parse_datetime(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _format_datetime(when, like):
+    # Keep date-only inputs date-only
+    if isinstance(like, str) and len(like.strip()) == 10:
+        return when.strftime("%Y-%m-%d")
+    return when.strftime("%Y-%m-%d %H:%M:%S")
+
+
+# include_archive: also read the archive tables (see archive.py)
+def get_appointment_summary(cursor, owner_id, animal_id, include_archive=False):
     # Verify ownership
-    row = query.get_owner_of_animal(cursor, animal_id)
+    row = get_animal(cursor, animal_id)
 
     if not row or str(row[0]) != str(owner_id):
         return False, "Animal does not belong to owner."
 
     # Fetch appointment/treatment summary
-    rows = query.get_appointment_summary(cursor, animal_id)
+    years = query.get_archive_years(cursor) if include_archive else ()
+    rows = query.get_appointment_summary(cursor, animal_id, years)
 
     return True, rows
 
 
 def cancel_appointment(cursor, connection, appt_id, animal_id):
     try:
-        row = query.get_appt_animal(cursor, appt_id)
+        row = query.get_appointment(cursor, appt_id)
         if not row:
             return False, "Appointment not found."
 
@@ -140,9 +630,123 @@ def cancel_appointment(cursor, connection, appt_id, animal_id):
 
         query.delete_treatments_by_appt(cursor, appt_id)
         query.delete_appointment(cursor, appt_id)
+        treatment_catalog.rows_deleted(cursor)
         connection.commit()
 
+        # Free the slot for new bookings
+        vet_calendar.release(row[1], row[2])
+
         return True, f"Appointment {appt_id} and related treatments cancelled."
 
     except Exception:
-        return False, "Invalid input."
\ No newline at end of file
+        return False, "Invalid input."
+
+
+def cancel_appointments(cursor, connection, appt_ids=None, animal_id=None, owner_id=None,
+                        vet_id=None, start=None, end=None, chunk_size=500):
+    # Cancel many appointments at once: one lookup query (with the
+    # animal's owner, for ownership checks), set-based deletes of
+    # treatments then appointments, one commit.
+    # Select either by `appt_ids` (each checked against animal_id /
+    # owner_id when given) or by vet_id and/or animal_id over
+    # [start, end). `start` defaults to now so past visits are kept; a
+    # date-only `end` includes that day.
+    # Returns (success, [{"ApptID", "success", "DateTime", "AnimalID",
+    # "VetID"} or {"ApptID", "success", "error"}]) in request/date order.
+    if not appt_ids and animal_id in (None, "") and vet_id in (None, ""):
+        return False, "Give appointment IDs, a vet or an animal."
+
+    try:
+        if not connection.in_transaction:
+            query.begin_transaction(cursor)
+
+        if appt_ids:
+            results, wanted = [], []
+            for appt_id in appt_ids:
+                try:
+                    wanted.append(int(appt_id))
+                    results.append({"ApptID": int(appt_id), "success": False})
+                except (TypeError, ValueError):
+                    results.append({"ApptID": appt_id, "success": False, "error": "Invalid appointment ID."})
+            rows = []
+            for chunk in _chunks(dict.fromkeys(wanted), chunk_size):
+                rows += query.get_appointments_with_owner(cursor, chunk)
+        else:
+            window_start, window_end = _cancel_window(start, end)
+            rows = query.find_appointments_with_owner(cursor, animal_id or None, vet_id or None,
+                                                      window_start, window_end)
+            results = [{"ApptID": r[0], "success": False} for r in rows]
+
+        found = {r[0]: r for r in rows}
+        doomed = []
+        for result in results:
+            if "error" in result:
+                continue
+            row = found.get(result["ApptID"])
+            if row is None:
+                result["error"] = "Appointment not found."
+            elif animal_id not in (None, "") and str(row[1]) != str(animal_id):
+                result["error"] = "Appointment does not belong to this animal."
+            elif owner_id not in (None, "") and str(row[2]) != str(owner_id):
+                result["error"] = "Appointment does not belong to this owner."
+            elif row[0] not in doomed:
+                doomed.append(row[0])
+                result.update({"DateTime": row[4], "AnimalID": row[1], "VetID": row[3]})
+            else:
+                result["error"] = "Listed twice."
+
+        for chunk in _chunks(doomed, chunk_size):
+            query.delete_treatments_by_appts(cursor, chunk)
+            query.delete_appointments(cursor, chunk)
+        if doomed:
+            treatment_catalog.rows_deleted(cursor)
+        connection.commit()
+
+    except Exception:
+        connection.rollback()
+        return False, "Invalid input."
+
+    for result in results:
+        if "error" not in result:
+            result["success"] = True
+            # Free the slot for new bookings
+            vet_calendar.release(result["VetID"], result["DateTime"])
+    return True, results
+
+
+def _cancel_window(start, end):
+    # (start, end) for the cancellation filter: start defaults to now,
+    # a date-only end means the end of that day
+    when = _parse_datetime(start) if start not in (None, "") else datetime.now()
+    if end in (None, ""):
+        until = None
+    elif len(str(end).strip()) == 10:
+        until = _parse_datetime(end) + timedelta(days=1)
+    else:
+        until = _parse_datetime(end)
+    return (when.strftime("%Y-%m-%d %H:%M:%S"),
+            until.strftime("%Y-%m-%d %H:%M:%S") if until else None)
+
+# Calls that only read, so callers may run them on a read replica
+# (Database.borrow(readonly=True)). Availability and treatment lookups stay
+# on the primary: they fill `vet_calendar` / `treatment_catalog`, which
+# booking relies on being current.
+READ_ONLY_CALLS = {
+    view_table,
+    list_tables,
+    list_pets_by_owner,
+    verify_owner_of_animal,
+    get_owner_dashboard,
+    get_appointment_summary,
+}
+
+
+_signatures = {}
+
+
+# True for calls shaped (cursor, connection, ...), i.e. ones that may commit
+def takes_connection(fn):
+    if fn not in _signatures:
+        params = list(inspect.signature(fn).parameters)
+        _signatures[fn] = len(params) > 1 and params[1] == "connection"
+    return _signatures[fn]
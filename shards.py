@@ -0,0 +1,242 @@
+"""Multi-clinic sharding
+
+Each clinic branch keeps its own `vetclinic` database. Every branch hands
+out OwnerID / AnimalID / VetID / ApptID values from its own ID range, so
+any of those IDs tells which branch holds the row. `connect()` seeds the
+ID counters (AUTO_INCREMENT, or SQLite's AUTOINCREMENT sequence) of empty
+tables to the start of the branch's range, and refuses a branch holding
+IDs outside it. The shard map is a JSON file:
+
+    {"shards": [
+        {"name": "north", "host": "db-north", "ids": [1, 999999]},
+        {"name": "south", "backend": "sqlite", "database": "south.db", "ids": [1000000, 1999999]}
+    ]}
+
+Other keys (backend, host, database, user, password, pool_size,
+replicas) are passed to `Database`.
+
+- Point operations go to the branch that owns the ID:
+      router.call(owner_id, services.list_pets_by_owner, owner_id)
+- Cross-branch reads run on every branch at once and are merged in order:
+      router.gather(query.list_tables), router.owners_in_range(1, 5000),
+      router.view_table("Owner"), reports.run_sharded_report(router, ...)
+
+`services` keeps one treatment catalog per process. Book appointments by
+treatment ID from a process attached to that branch, not through the router.
+"""
+
+import bisect
+import heapq
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from Database import Database
+import query
+import services
+
+
+# Tables whose IDs route requests, with their ID columns
+ROUTED_KEYS = [("Owner", "OwnerID"), ("Animal", "AnimalID"),
+               ("Veterinarian", "VetID"), ("Appointment", "ApptID")]
+
+
+class ShardRangeError(RuntimeError):
+    pass
+
+
+class Shard:
+    def __init__(self, name, db, first_id, last_id):
+        self.name = name
+        self.db = db
+        self.first_id = first_id
+        self.last_id = last_id
+
+    def holds(self, entity_id):
+        return self.first_id <= entity_id <= self.last_id
+
+    # Seed empty tables' ID counters to first_id and check that existing
+    # IDs are in range. Returns a list of problems (empty when fine).
+    def claim_range(self):
+        problems = []
+        with self.db.borrow() as (cursor, connection):
+            for table, column in ROUTED_KEYS:
+                low, high = query.get_key_range(cursor, table, column)
+                if low is None:
+                    if not query.seed_id_counter(cursor, table, self.first_id) and self.first_id > 1:
+                        problems.append(f"{table} has no AUTOINCREMENT counter to start at {self.first_id}")
+                elif low < self.first_id or high > self.last_id:
+                    problems.append(f"{table} holds {column} {low}..{high}, "
+                                    f"outside {self.first_id}..{self.last_id}")
+            connection.commit()
+        return problems
+
+    # Raise when a call handed out an ID belonging to another shard
+    def check_new_ids(self, result):
+        for column, value in _ids_in(result):
+            if not self.holds(value):
+                raise ShardRangeError(f"Shard {self.name} gave out {column} {value}, "
+                                      f"outside {self.first_id}..{self.last_id}.")
+
+
+class ShardRouter:
+    def __init__(self, shards):
+        self.shards = sorted(shards, key=lambda s: s.first_id)
+        if not self.shards:
+            raise ValueError("A shard map needs at least one shard.")
+        for a, b in zip(self.shards, self.shards[1:]):
+            if b.first_id <= a.last_id:
+                raise ValueError(f"Shards {a.name} and {b.name} have overlapping ID ranges.")
+
+        self._starts = [s.first_id for s in self.shards]
+        self._executor = ThreadPoolExecutor(max_workers=len(self.shards),
+                                            thread_name_prefix="vetclinic-shard")
+
+    # Connect every shard; True only when all of them are reachable and
+    # keep their IDs inside their ranges
+    def connect(self):
+        ok = True
+        for shard in self.shards:
+            if not shard.db.connect():
+                print(f"[DB ERROR] Shard {shard.name} is unreachable.")
+                ok = False
+                continue
+            for problem in shard.claim_range():
+                print(f"[DB ERROR] Shard {shard.name}: {problem}.")
+                ok = False
+        return ok
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        for shard in self.shards:
+            shard.db.close()
+
+    # ==================================================
+    #                     ROUTING
+    # ==================================================
+
+    # The shard holding an Owner / Animal / Vet / Appointment ID
+    def shard_for(self, entity_id):
+        entity_id = int(entity_id)
+        i = bisect.bisect_right(self._starts, entity_id) - 1
+        if i >= 0 and self.shards[i].holds(entity_id):
+            return self.shards[i]
+        raise LookupError(f"No shard holds ID {entity_id}.")
+
+    # Shards whose ID range overlaps first_id..last_id
+    def shards_for_range(self, first_id, last_id):
+        return [s for s in self.shards if s.first_id <= last_id and first_id <= s.last_id]
+
+    # Run a `services` call on the shard owning `entity_id`. As in
+    # AsyncServices, functions taking (cursor, connection, ...) get both.
+    # IDs a write hands back (e.g. a booking's ApptID) must fall in the
+    # shard's range, or ShardRangeError is raised.
+    def call(self, entity_id, fn, *args, **kwargs):
+        shard = self.shard_for(entity_id)
+        with shard.db.borrow(readonly=fn in services.READ_ONLY_CALLS) as (cursor, connection):
+            if not services.takes_connection(fn):
+                return fn(cursor, *args, **kwargs)
+            result = fn(cursor, connection, *args, **kwargs)
+        shard.check_new_ids(result)
+        return result
+
+    # ==================================================
+    #                  SCATTER-GATHER
+    # ==================================================
+
+    # Run fn(cursor, *args, **kwargs) on each shard (all by default) at
+    # the same time, on read-only connections. Returns {shard name: result}
+    # in shard order. `fn` must return fully fetched rows.
+    def gather(self, fn, *args, shards=None, **kwargs):
+        targets = self.shards if shards is None else shards
+        futures = [(s.name, self._executor.submit(self._read, s, fn, args, kwargs)) for s in targets]
+        return {name: future.result() for name, future in futures}
+
+    def _read(self, shard, fn, args, kwargs):
+        with shard.db.borrow(readonly=True) as (cursor, connection):
+            return fn(cursor, *args, **kwargs)
+
+    # [(table, [shard names that have it])] across all shards
+    def list_tables(self):
+        found = {}
+        for name, tables in self.gather(query.list_tables).items():
+            for table in tables:
+                found.setdefault(table, []).append(name)
+        return sorted(found.items(), key=lambda item: item[0].lower())
+
+    # (columns, rows) of the owners with first_id <= OwnerID <= last_id,
+    # merged in OwnerID order; only shards overlapping the range are asked
+    def owners_in_range(self, first_id, last_id):
+        def fetch(cursor):
+            rows = query.get_owners_in_range(cursor, first_id, last_id)
+            return [d[0] for d in cursor.description], rows
+
+        results = self.gather(fetch, shards=self.shards_for_range(first_id, last_id))
+        if not results:
+            return [], []
+        columns = next(iter(results.values()))[0]
+        return columns, list(heapq.merge(*(rows for _, rows in results.values()), key=lambda r: r[0]))
+
+    # Column names of a table, as the first shard has it
+    def table_columns(self, table_name):
+        shard = self.shards[0]
+        with shard.db.borrow(readonly=True) as (cursor, connection):
+            return [c[0] for c in services.get_table_columns(cursor, table_name, shard.db.catalog)]
+
+    # Yield the table from every shard as pages of at most `page_size`
+    # rows, merged in primary-key order. Each shard streams its own rows
+    # (see services.view_table), so memory stays flat.
+    def view_table(self, table_name, page_size=500):
+        with ExitStack() as stack:
+            streams = []
+            pk_idx = None
+            for shard in self.shards:
+                cursor, connection = stack.enter_context(shard.db.borrow(buffered=False, readonly=True))
+                if pk_idx is None:
+                    cols = services.get_table_columns(cursor, table_name, shard.db.catalog)
+                    pk_positions = [i for i, col in enumerate(cols) if col[3] == "PRI"]
+                    pk_idx = pk_positions[0] if len(pk_positions) == 1 else -1
+                pages = services.view_table(cursor, table_name, page_size, shard.db.catalog)
+                stack.callback(pages.close)
+                streams.append(row for page in pages for row in page)
+
+            if pk_idx >= 0:
+                rows = heapq.merge(*streams, key=lambda r: r[pk_idx])
+            else:
+                rows = (row for stream in streams for row in stream)
+
+            page = []
+            for row in rows:
+                page.append(row)
+                if len(page) == page_size:
+                    yield page
+                    page = []
+            if page:
+                yield page
+
+
+# (column, value) for every routed ID in a services result: dicts keyed
+# by ID column, possibly inside lists or the (success, payload) tuple
+def _ids_in(result):
+    columns = {column for _, column in ROUTED_KEYS}
+    if isinstance(result, dict):
+        for column, value in result.items():
+            if column in columns and isinstance(value, int):
+                yield column, value
+    elif isinstance(result, (list, tuple)):
+        for item in result:
+            yield from _ids_in(item)
+
+
+# Build a router from a JSON shard map (see the module docstring)
+def load_shard_map(path):
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+
+    shards = []
+    for entry in config.get("shards", []):
+        entry = dict(entry)
+        name = entry.pop("name")
+        first_id, last_id = entry.pop("ids")
+        shards.append(Shard(name, Database(**entry), int(first_id), int(last_id)))
+    return ShardRouter(shards)
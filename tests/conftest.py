@@ -0,0 +1,91 @@
+"""Shared fixtures: connected SQLite databases in tmp_path
+
+The modules live at the repository root (main.py imports them as plain
+top-level modules), so the root goes on sys.path here.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Database import Database  # noqa: E402
+import reports  # noqa: E402
+import services  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_service_state():
+    # services keeps per-process caches; every test starts from empty
+    def clear():
+        services.entity_cache.clear()
+        services.treatment_catalog.reset()
+        services.vet_calendar.reset()
+        reports.report_cache.clear()
+
+    clear()
+    yield
+    clear()
+
+
+@pytest.fixture
+def make_db(tmp_path):
+    # make_db(name="clinic.db", **Database kwargs) -> connected Database
+    opened = []
+
+    def make(name="clinic.db", **kwargs):
+        db = Database(database=str(tmp_path / name), backend="sqlite", **kwargs)
+        assert db.connect()
+        opened.append(db)
+        return db
+
+    yield make
+    for db in opened:
+        db.close()
+
+
+@pytest.fixture
+def db(make_db):
+    return make_db(pool_size=2)
+
+
+def add_owner(cursor, name="Ann", owner_id=None):
+    if owner_id is None:
+        cursor.execute("INSERT INTO Owner (Oname) VALUES (%s)", (name,))
+    else:
+        cursor.execute("INSERT INTO Owner (OwnerID, Oname) VALUES (%s, %s)", (owner_id, name))
+    return cursor.lastrowid
+
+
+def add_vet(cursor, name="Dr. Vale"):
+    cursor.execute("INSERT INTO Veterinarian (Vname) VALUES (%s)", (name,))
+    return cursor.lastrowid
+
+
+def add_animal(cursor, owner_id, name="Rex"):
+    cursor.execute("INSERT INTO Animal (Aname, Animal_OwnerID) VALUES (%s, %s)", (name, owner_id))
+    return cursor.lastrowid
+
+
+def add_appointment(cursor, animal_id, vet_id, date_time, treatment_type="Checkup"):
+    cursor.execute(
+        "INSERT INTO Appointment (DateTime, Scheduled_AnimalID, Treating_VetID) VALUES (%s, %s, %s)",
+        (date_time, animal_id, vet_id)
+    )
+    appt_id = cursor.lastrowid
+    cursor.execute("INSERT INTO Treatment (AppointmentID, TreatmentType) VALUES (%s, %s)",
+                   (appt_id, treatment_type))
+    return appt_id
+
+
+@pytest.fixture
+def clinic(db):
+    # One owner with one animal, and one vet: {"owner", "animal", "vet"}
+    with db.borrow() as (cursor, connection):
+        owner = add_owner(cursor)
+        vet = add_vet(cursor)
+        animal = add_animal(cursor, owner)
+        connection.commit()
+    return {"owner": owner, "animal": animal, "vet": vet}
@@ -0,0 +1,86 @@
+import archive
+import query
+import services
+from conftest import add_appointment
+
+
+def test_archive_moves_old_appointments_into_year_tables(db, clinic):
+    with db.borrow() as (cursor, connection):
+        for when in ("2021-05-01 09:00", "2022-02-01 09:00", "2022-06-01 09:00", "2024-01-01 09:00"):
+            add_appointment(cursor, clinic["animal"], clinic["vet"], when)
+        connection.commit()
+
+        seen = []
+        success, result = archive.archive_before(cursor, connection, "2023-01-01", batch_size=2,
+                                                 catalog=db.catalog, progress=lambda r: seen.append(dict(r)))
+        assert success
+        assert result == {"appointments": 3, "treatments": 3, "batches": 2, "years": [2021, 2022]}
+        assert [r["batches"] for r in seen] == [1, 2]
+        assert query.get_archive_years(cursor) == [2021, 2022]
+        cursor.execute("SELECT COUNT(*) FROM Appointment")
+        assert cursor.fetchone()[0] == 1
+        cursor.execute("SELECT COUNT(*) FROM TreatmentArchive_2022")
+        assert cursor.fetchone()[0] == 2
+
+        success, recent = services.get_appointment_summary(cursor, clinic["owner"], clinic["animal"])
+        assert success and len(recent) == 1
+        success, everything = services.get_appointment_summary(cursor, clinic["owner"], clinic["animal"],
+                                                               include_archive=True)
+        assert success and len(everything) == 4
+
+        # Nothing older is left: a second run is a no-op
+        success, again = archive.archive_before(cursor, connection, "2023-01-01", catalog=db.catalog)
+        assert success and again["appointments"] == 0
+
+
+def test_archive_can_stop_and_resume(db, clinic):
+    with db.borrow() as (cursor, connection):
+        for day in range(1, 6):
+            add_appointment(cursor, clinic["animal"], clinic["vet"], f"2022-01-0{day} 09:00")
+        add_appointment(cursor, clinic["animal"], clinic["vet"], "2024-01-01 09:00")
+        connection.commit()
+
+        success, first = archive.archive_before(cursor, connection, "2023-01-01", batch_size=2, max_batches=1)
+        assert success and first["appointments"] == 2
+        success, rest = archive.archive_before(cursor, connection, "2023-01-01", batch_size=2)
+        assert success and rest["appointments"] == 3
+        cursor.execute("SELECT COUNT(*) FROM AppointmentArchive_2022")
+        assert cursor.fetchone()[0] == 5
+
+
+def test_archive_keeps_the_highest_appt_id(db, clinic):
+    # Otherwise a table without AUTOINCREMENT (older SQLite files) would
+    # hand the archived ApptID out again
+    with db.borrow() as (cursor, connection):
+        add_appointment(cursor, clinic["animal"], clinic["vet"], "2021-01-01 09:00")
+        top = add_appointment(cursor, clinic["animal"], clinic["vet"], "2021-02-01 09:00")
+        connection.commit()
+
+        success, result = archive.archive_before(cursor, connection, "2023-01-01")
+        assert success and result["appointments"] == 1
+        cursor.execute("SELECT ApptID FROM Appointment")
+        assert cursor.fetchall() == [(top,)]
+
+
+def test_archive_refuses_a_horizon_in_the_future(db):
+    with db.borrow() as (cursor, connection):
+        assert archive.archive_before(cursor, connection, "2999-01-01") == \
+            (False, "The archive horizon must be in the past.")
+        assert archive.archive_before(cursor, connection, "soon") == (False, "Horizon must be YYYY-MM-DD.")
+
+
+def test_archived_treatment_types_stay_bookable(db, clinic):
+    with db.borrow() as (cursor, connection):
+        add_appointment(cursor, clinic["animal"], clinic["vet"], "2021-05-01 09:00", "Deworming")
+        add_appointment(cursor, clinic["animal"], clinic["vet"], "2024-01-01 09:00", "Checkup")
+        connection.commit()
+        assert services.get_existing_treatments(cursor) == [(1, "Deworming"), (2, "Checkup")]
+
+        success, _ = archive.archive_before(cursor, connection, "2023-01-01", catalog=db.catalog)
+        assert success
+
+        services.treatment_catalog.reset()
+        assert services.get_existing_treatments(cursor) == [(1, "Deworming"), (2, "Checkup")]
+        success, booking = services.schedule_appointment_and_treatment(
+            cursor, connection, clinic["owner"], clinic["animal"], clinic["vet"], "2025-03-01 10:00", "1")
+        assert success and booking["Treatment"] == "Deworming"
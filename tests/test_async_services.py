@@ -0,0 +1,47 @@
+import asyncio
+import threading
+
+from async_services import BUSY, TIMED_OUT, AsyncServices
+
+
+def test_timed_out_call_keeps_its_slot_until_the_worker_finishes(db):
+    release = threading.Event()
+
+    def slow(cursor):
+        release.wait(5)
+        return True, "done"
+
+    async def scenario():
+        svc = AsyncServices(db, max_pending=1, timeout=0.05)
+        assert await svc.call(slow) == TIMED_OUT
+        # The worker is still running: no room for another call or stream
+        assert svc.pending == 1
+        assert await svc.list_tables() == BUSY
+        assert await svc.view_table("Owner") == BUSY
+
+        release.set()
+        for _ in range(100):
+            if svc.pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert svc.pending == 0
+        tables = await svc.list_tables()
+        svc.close()
+        return tables
+
+    assert "Owner" in asyncio.run(scenario())
+
+
+def test_view_table_streams_pages(db, clinic):
+    async def scenario():
+        svc = AsyncServices(db, timeout=5)
+        success, pages = await svc.view_table("Animal", page_size=1)
+        rows = [row async for page in pages for row in page]
+        pending = svc.pending
+        svc.close()
+        return success, rows, pending
+
+    success, rows, pending = asyncio.run(scenario())
+    assert success
+    assert [r[1] for r in rows] == ["Rex"]
+    assert pending == 0
@@ -0,0 +1,76 @@
+import io
+import json
+
+import batch
+import query
+import services
+
+
+def run(db, commands, **kwargs):
+    out = io.StringIO()
+    lines = [c if isinstance(c, str) else json.dumps(c) for c in commands]
+    stats = batch.run_batch(db, lines, out, **kwargs)
+    return stats, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def count(db, table):
+    with db.borrow() as (cursor, connection):
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+
+def test_failed_command_is_undone_and_the_group_still_commits(db, clinic):
+    stats, results = run(db, [
+        {"op": "insert", "table": "Owner", "values": {"Oname": "Bo"}, "id": "a"},
+        {"op": "insert", "table": "Owner", "values": {"Phone": "555"}},      # Oname is NOT NULL
+        "not json",
+        {"op": "schedule", "owner_id": clinic["owner"], "animal_id": clinic["animal"],
+         "vet_id": clinic["vet"], "date_time": "2025-03-01 10:00", "treatment_type": "Checkup"},
+    ], commit_every=2)
+
+    assert stats["commands"] == 4 and stats["succeeded"] == 2 and stats["failed"] == 2
+    assert [r["success"] for r in results] == [True, False, False, True]
+    assert results[0]["id"] == "a"
+    assert results[2]["error"].startswith("Invalid JSON")
+    assert results[3]["result"]["Treatment"] == "Checkup"
+    assert count(db, "Owner") == 2
+    assert count(db, "Appointment") == 1
+
+
+def test_aborted_transaction_reports_the_whole_group_as_rolled_back(db, clinic, monkeypatch):
+    def aborted(cursor, name):
+        raise RuntimeError("savepoint does not exist")
+
+    # As after a deadlock: the server has already rolled everything back
+    monkeypatch.setattr(query, "rollback_to_savepoint", aborted)
+    stats, results = run(db, [
+        {"op": "schedule", "owner_id": clinic["owner"], "animal_id": clinic["animal"],
+         "vet_id": clinic["vet"], "date_time": "2025-03-01 10:00", "treatment_type": "Phantom"},
+        {"op": "cancel", "appt_id": 999, "animal_id": clinic["animal"]},
+        {"op": "insert", "table": "Owner", "values": {"Oname": "Bo"}},
+    ], commit_every=10)
+
+    assert [r["success"] for r in results] == [False, False, True]
+    assert results[0]["error"] == "Rolled back: transaction aborted by line 2"
+    assert "result" not in results[0]
+    assert results[1]["error"].endswith("(transaction aborted)")
+    assert stats["succeeded"] == 1 and stats["failed"] == 2
+
+    assert count(db, "Appointment") == 0
+    assert count(db, "Owner") == 2
+    # The catalog and calendar forgot the rolled-back booking
+    assert services.treatment_catalog.last_id is None
+    with db.borrow() as (cursor, connection):
+        assert services.vet_calendar.reserve(cursor, clinic["vet"], "2025-03-01 10:00")
+
+
+def test_stop_on_error_stops_after_the_first_failure(db, clinic):
+    stats, results = run(db, [
+        {"op": "pets", "owner_id": clinic["owner"]},
+        {"op": "nope"},
+        {"op": "pets", "owner_id": clinic["owner"]},
+    ], stop_on_error=True)
+
+    assert stats["commands"] == 2
+    assert results[0]["result"][0]["Aname"] == "Rex"
+    assert results[1]["error"] == "Unknown op: nope"
@@ -0,0 +1,68 @@
+import csv
+import gzip
+import json
+
+from Database import Database
+import exporter
+from conftest import add_appointment, add_owner
+
+
+def read_csv(path, opener=open):
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))
+
+
+def fill(db, clinic=None, owners=50):
+    with db.borrow() as (cursor, connection):
+        for n in range(owners):
+            add_owner(cursor, f"Owner {n}")
+        # A gap in the key range, as deleted rows leave
+        cursor.execute("DELETE FROM Owner WHERE OwnerID BETWEEN 10 AND 19")
+        if clinic:
+            for day in range(1, 8):
+                add_appointment(cursor, clinic["animal"], clinic["vet"], f"2025-01-0{day} 09:00")
+        connection.commit()
+
+
+def test_key_ranges_cover_the_range_without_overlap():
+    assert exporter.key_ranges(1, 10, 3) == [(1, 4), (5, 7), (8, 10)]
+    assert exporter.key_ranges(5, 6, 4) == [(5, 5), (6, 6)]
+    assert exporter.key_ranges(7, 7, 2) == [(7, 7)]
+
+
+def test_parallel_export_matches_the_serial_export(db, tmp_path):
+    fill(db)
+    with db.borrow(buffered=False) as (cursor, connection):
+        success, serial = exporter.export(cursor, "Owner", str(tmp_path / "serial.csv"), catalog=db.catalog)
+    assert success and serial["rows"] == 40
+
+    success, report = exporter.parallel_export(db, "Owner", str(tmp_path / "parallel.csv.gz"), workers=3)
+    assert success, report
+    assert report["rows"] == report["expected"] == 40
+    assert not list(tmp_path.glob("*.part*"))
+
+    assert read_csv(tmp_path / "parallel.csv.gz", gzip.open) == read_csv(tmp_path / "serial.csv")
+
+
+def test_parallel_summary_export_keeps_parts_when_not_merged(db, clinic, tmp_path):
+    fill(db, clinic, owners=0)
+    success, report = exporter.parallel_export(db, exporter.SUMMARY, str(tmp_path / "summary.jsonl"),
+                                               workers=2, merge=False)
+    assert success, report
+    assert len(report["parts"]) == 2
+
+    rows = []
+    for part in report["parts"]:
+        with open(part, encoding="utf-8") as f:
+            rows.extend(json.loads(line) for line in f)
+    assert len(rows) == report["expected"] == 7
+
+
+def test_parallel_export_needs_a_shared_database(tmp_path):
+    db = Database(database=":memory:", backend="sqlite")
+    assert db.connect()
+    try:
+        success, message = exporter.parallel_export(db, "Owner", str(tmp_path / "out.csv"))
+    finally:
+        db.close()
+    assert not success and "not :memory:" in message
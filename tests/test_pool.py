@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+from Database import PoolExhausted
+from conftest import add_owner
+
+
+def test_borrow_replaces_a_dead_pooled_connection(db):
+    with db.borrow() as (cursor, connection):
+        first = connection
+    first.close()
+
+    with db.borrow() as (cursor, connection):
+        assert connection is not first
+        cursor.execute("SELECT 1")
+        assert cursor.fetchone() == (1,)
+
+
+def test_release_rolls_back_uncommitted_work(db):
+    with db.borrow() as (cursor, connection):
+        add_owner(cursor, "Uncommitted")
+
+    with db.borrow() as (cursor, connection):
+        cursor.execute("SELECT COUNT(*) FROM Owner")
+        assert cursor.fetchone()[0] == 0
+
+
+def test_exhausted_pool_raises_after_timeout(make_db):
+    db = make_db(pool_size=1, pool_timeout=0.05)
+    with db.borrow():
+        with pytest.raises(PoolExhausted):
+            with db.borrow():
+                pass
+
+    # The connection went back to the pool
+    with db.borrow() as (cursor, connection):
+        cursor.execute("SELECT 1")
+
+
+def test_threads_share_the_pool(db):
+    errors = []
+
+    def work(n):
+        try:
+            for _ in range(20):
+                with db.borrow() as (cursor, connection):
+                    add_owner(cursor, f"Owner {n}")
+                    connection.commit()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    with db.borrow() as (cursor, connection):
+        cursor.execute("SELECT COUNT(*) FROM Owner")
+        assert cursor.fetchone()[0] == 80
+    assert db.pool._opened <= db.pool_size
@@ -0,0 +1,88 @@
+import shutil
+import threading
+
+import pytest
+
+from Database import Database
+import services
+from conftest import add_owner
+
+
+@pytest.fixture
+def replicated(tmp_path, make_db):
+    # A primary with one owner, and a replica copied from it. The primary
+    # then renames the owner, which the replica has not replayed.
+    primary = make_db()
+    with primary.borrow() as (cursor, connection):
+        owner_id = add_owner(cursor, "Old")
+        connection.commit()
+    shutil.copy(tmp_path / "clinic.db", tmp_path / "replica.db")
+
+    db = Database(database=str(tmp_path / "clinic.db"), backend="sqlite", pool_size=2,
+                  replicas=[str(tmp_path / "replica.db")], max_replica_lag=5.0)
+    assert db.connect()
+    with primary.borrow() as (cursor, connection):
+        cursor.execute("UPDATE Owner SET Oname = 'New' WHERE OwnerID = %s", (owner_id,))
+        connection.commit()
+    yield db, owner_id
+    db.close()
+
+
+def owner_name(db, owner_id, readonly):
+    with db.borrow(readonly=readonly) as (cursor, connection):
+        cursor.execute("SELECT Oname FROM Owner WHERE OwnerID = %s", (owner_id,))
+        return cursor.fetchone()[0]
+
+
+def in_new_thread(fn, *args):
+    # Read-your-writes is tracked per thread
+    result = []
+    thread = threading.Thread(target=lambda: result.append(fn(*args)))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_readonly_borrow_goes_to_the_replica(replicated):
+    db, owner_id = replicated
+    assert in_new_thread(owner_name, db, owner_id, True) == "Old"
+    assert in_new_thread(owner_name, db, owner_id, False) == "New"
+    assert db.replica_status()[0]["reads"] == 1
+
+
+def test_reads_after_a_write_stay_on_the_primary(replicated):
+    db, owner_id = replicated
+
+    def write_then_read():
+        with db.borrow() as (cursor, connection):
+            pass
+        return owner_name(db, owner_id, True)
+
+    assert in_new_thread(write_then_read) == "New"
+    assert db.replica_status()[0]["reads"] == 0
+
+
+def test_unhealthy_replica_falls_back_to_the_primary(replicated):
+    db, owner_id = replicated
+    db.replicas[0].lag = db.max_replica_lag + 1
+    db.replicas[0].healthy = False
+    db.replica_check_interval = 3600
+    db.replicas[0].checked_at = float("inf")
+
+    assert in_new_thread(owner_name, db, owner_id, True) == "New"
+
+
+def test_replica_reads_do_not_fill_the_primary_entity_cache(replicated):
+    db, owner_id = replicated
+
+    def cached_owner(readonly):
+        with db.borrow(readonly=readonly) as (cursor, connection):
+            return services.get_owner(cursor, owner_id)[1]
+
+    assert in_new_thread(cached_owner, True) == "Old"
+    assert in_new_thread(cached_owner, False) == "New"
+
+    # The replica's copy is kept no longer than the replica may lag
+    expires_at = services.entity_cache._data[("replica",) + services._cache_key("Owner", owner_id)][0]
+    primary_expires_at = services.entity_cache._data[services._cache_key("Owner", owner_id)][0]
+    assert expires_at < primary_expires_at
@@ -0,0 +1,72 @@
+import services
+from conftest import add_animal, add_appointment
+
+
+def booking(clinic, date_time, **extra):
+    item = dict(owner_id=clinic["owner"], animal_id=clinic["animal"], vet_id=clinic["vet"],
+                date_time=date_time)
+    item.update(extra)
+    return item
+
+
+def booked_rows(cursor):
+    cursor.execute("SELECT a.ApptID, a.DateTime, a.Scheduled_AnimalID, t.TreatmentType "
+                   "FROM Appointment a JOIN Treatment t ON t.AppointmentID = a.ApptID ORDER BY a.ApptID")
+    return {r[0]: r[1:] for r in cursor.fetchall()}
+
+
+def test_schedule_batch_reports_the_ids_of_its_own_rows(db, clinic):
+    with db.borrow() as (cursor, connection):
+        # Leave a gap below the batch, as cancelled bookings do
+        old = add_appointment(cursor, clinic["animal"], clinic["vet"], "2024-01-01 09:00")
+        cursor.execute("DELETE FROM Treatment WHERE AppointmentID = %s", (old,))
+        cursor.execute("DELETE FROM Appointment WHERE ApptID = %s", (old,))
+        other_pet = add_animal(cursor, clinic["owner"], "Tom")
+        connection.commit()
+
+        items = services.expand_recurrence(
+            [booking(clinic, "2025-03-03 10:00", treatment_type="Vaccine")], every_days=7, count=3)
+        items.append(booking(clinic, "2025-03-03 10:00", animal_id=other_pet, treatment_type="Dental"))
+        items.append(booking(clinic, "2025-03-04 10:00", animal_id=other_pet, treatment_type="Dental"))
+
+        success, results = services.schedule_batch(cursor, connection, items, chunk_size=2)
+        rows = booked_rows(cursor)
+
+    assert success
+    assert [r["success"] for r in results] == [True, True, True, False, True]
+    assert results[3]["error"] == "Vet is already booked at that time."
+    assert len(rows) == 4
+    for item, result in zip(items, results):
+        if result["success"]:
+            assert result["ApptID"] > old
+            assert rows[result["ApptID"]] == (item["date_time"], item["animal_id"], result["Treatment"])
+
+
+def test_schedule_batch_refuses_ids_that_are_not_one_block(db, clinic):
+    class SkewedCursor:
+        # Reports an ID one past the real one, as a server stepping
+        # auto-increment values by 2 would for a single row
+        def __init__(self, cursor):
+            self._cursor = cursor
+
+        @property
+        def lastrowid(self):
+            return self._cursor.lastrowid + 1
+
+        def __getattr__(self, name):
+            return getattr(self._cursor, name)
+
+    with db.borrow() as (cursor, connection):
+        items = [booking(clinic, f"2025-03-0{d} 10:00", treatment_type="Checkup") for d in (3, 4)]
+        success, results = services.schedule_batch(SkewedCursor(cursor), connection, items)
+        cursor.execute("SELECT COUNT(*) FROM Appointment")
+        assert cursor.fetchone()[0] == 0
+
+    assert not success
+    assert not any(r["success"] for r in results)
+    assert all("ApptID" not in r for r in results)
+
+    # The calendar slots were given back
+    with db.borrow() as (cursor, connection):
+        success, results = services.schedule_batch(cursor, connection, items)
+    assert success and all(r["success"] for r in results)
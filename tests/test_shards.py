@@ -0,0 +1,101 @@
+import sqlite3
+
+import pytest
+
+from Database import Database
+import services
+from shards import Shard, ShardRangeError, ShardRouter
+from conftest import add_owner
+
+
+def make_router(tmp_path):
+    return ShardRouter([
+        Shard("north", Database(database=str(tmp_path / "north.db"), backend="sqlite", pool_size=2), 1, 999),
+        Shard("south", Database(database=str(tmp_path / "south.db"), backend="sqlite", pool_size=2), 1000, 1999),
+    ])
+
+
+@pytest.fixture
+def router(tmp_path):
+    router = make_router(tmp_path)
+    assert router.connect()
+    yield router
+    router.close()
+
+
+def seed_branch(shard):
+    # One owner, animal and vet, with IDs from the branch's own range
+    with shard.db.borrow() as (cursor, connection):
+        owner = add_owner(cursor, f"{shard.name} owner")
+        cursor.execute("INSERT INTO Veterinarian (Vname) VALUES (%s)", (f"{shard.name} vet",))
+        vet = cursor.lastrowid
+        cursor.execute("INSERT INTO Animal (Aname, Animal_OwnerID) VALUES (%s, %s)", ("Rex", owner))
+        animal = cursor.lastrowid
+        connection.commit()
+    return owner, animal, vet
+
+
+def test_connect_seeds_each_branch_id_counter(router):
+    north, south = router.shards
+    assert seed_branch(north) == (1, 1, 1)
+    assert seed_branch(south) == (1000, 1000, 1000)
+    assert router.shard_for(1000) is south
+    with pytest.raises(LookupError):
+        router.shard_for(5000)
+
+
+def test_connect_refuses_ids_outside_the_range(tmp_path, capsys):
+    router = make_router(tmp_path)
+    assert router.connect()
+    with router.shards[1].db.borrow() as (cursor, connection):
+        add_owner(cursor, "Misplaced", owner_id=5)
+        connection.commit()
+    router.close()
+
+    router = make_router(tmp_path)
+    assert not router.connect()
+    assert "Owner holds OwnerID 5..5" in capsys.readouterr().out
+    router.close()
+
+
+def test_connect_refuses_a_table_without_an_id_counter(tmp_path, capsys):
+    # Created before AUTOINCREMENT was declared: nothing to seed
+    conn = sqlite3.connect(tmp_path / "south.db")
+    conn.execute("CREATE TABLE Owner (OwnerID INTEGER PRIMARY KEY, Oname VARCHAR(100) NOT NULL, "
+                 "Phone VARCHAR(20), Email VARCHAR(100), Address VARCHAR(200))")
+    conn.close()
+
+    router = make_router(tmp_path)
+    assert not router.connect()
+    assert "Owner has no AUTOINCREMENT counter" in capsys.readouterr().out
+    router.close()
+
+
+def test_write_handing_out_a_foreign_id_raises(router):
+    south = router.shards[1]
+    owner, animal, vet = seed_branch(south)
+    success, booking = router.call(animal, services.schedule_appointment_and_treatment,
+                                   owner, animal, vet, "2025-03-01 10:00", "0", "Checkup")
+    assert success and booking["ApptID"] == 1000
+
+    with pytest.raises(ShardRangeError):
+        south.check_new_ids((True, {"ApptID": 7}))
+
+
+def test_cross_branch_reads_merge_in_id_order(router):
+    north, south = router.shards
+    for shard in (south, north):
+        with shard.db.borrow() as (cursor, connection):
+            for n in range(3):
+                add_owner(cursor, f"{shard.name} {n}")
+            connection.commit()
+
+    columns, rows = router.owners_in_range(2, 1001)
+    assert columns[0] == "OwnerID"
+    assert [r[0] for r in rows] == [2, 3, 1000, 1001]
+
+    pages = list(router.view_table("Owner", page_size=4))
+    assert [len(p) for p in pages] == [4, 2]
+    assert [r[0] for p in pages for r in p] == [1, 2, 3, 1000, 1001, 1002]
+
+    assert dict(router.list_tables())["Owner"] == ["north", "south"]
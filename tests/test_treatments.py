@@ -0,0 +1,55 @@
+import sqlite3
+
+import services
+from treatments import TreatmentCatalog
+from conftest import add_animal, add_appointment, add_owner, add_vet
+
+
+def test_refresh_reads_only_new_rows(db, clinic):
+    catalog = TreatmentCatalog()
+    with db.borrow() as (cursor, connection):
+        add_appointment(cursor, clinic["animal"], clinic["vet"], "2025-01-01 09:00", "Checkup")
+        add_appointment(cursor, clinic["animal"], clinic["vet"], "2025-01-02 09:00", "Vaccine")
+        connection.commit()
+        assert catalog.refresh(cursor) == 2
+        assert catalog.last_id == 2
+
+        add_appointment(cursor, clinic["animal"], clinic["vet"], "2025-01-03 09:00", "  vaccine ")
+        add_appointment(cursor, clinic["animal"], clinic["vet"], "2025-01-04 09:00", "Dental cleaning")
+        connection.commit()
+        assert catalog.refresh(cursor, batch_size=1) == 1
+        assert catalog.last_id == 4
+
+    # Each type is listed under the first ID that used it
+    assert catalog.entries() == [(1, "Checkup"), (2, "Vaccine"), (4, "Dental cleaning")]
+    assert catalog.type_for_id(4) == "Dental cleaning"
+    assert catalog.type_for_id(3) is None
+    assert catalog.search("DE") == [(4, "Dental cleaning")]
+    assert catalog.search("x") == []
+
+
+def test_catalog_notices_a_reused_treatment_id(make_db, tmp_path):
+    # A file created before Treatment declared AUTOINCREMENT: SQLite hands
+    # the highest TreatmentID out again once that row is deleted
+    conn = sqlite3.connect(tmp_path / "old.db")
+    conn.execute("CREATE TABLE Treatment (TreatmentID INTEGER PRIMARY KEY, AppointmentID INTEGER NOT NULL, "
+                 "TreatmentType VARCHAR(100) NOT NULL)")
+    conn.close()
+    db = make_db("old.db")
+
+    with db.borrow() as (cursor, connection):
+        owner = add_owner(cursor)
+        animal = add_animal(cursor, owner)
+        vet = add_vet(cursor)
+        add_appointment(cursor, animal, vet, "2025-01-01 09:00", "Checkup")
+        last = add_appointment(cursor, animal, vet, "2025-01-02 09:00", "Grooming")
+        connection.commit()
+        assert services.get_existing_treatments(cursor) == [(1, "Checkup"), (2, "Grooming")]
+
+        assert services.cancel_appointment(cursor, connection, last, animal)[0]
+        add_appointment(cursor, animal, vet, "2025-01-03 09:00", "Vaccine")
+        connection.commit()
+        cursor.execute("SELECT TreatmentID FROM Treatment WHERE TreatmentType = 'Vaccine'")
+        assert cursor.fetchone()[0] == 2
+
+        assert services.get_existing_treatments(cursor) == [(1, "Checkup"), (2, "Vaccine")]
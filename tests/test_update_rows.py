@@ -0,0 +1,86 @@
+import services
+from conftest import add_animal, add_owner
+
+
+def owners(cursor):
+    cursor.execute("SELECT OwnerID, Oname, Phone FROM Owner ORDER BY OwnerID")
+    return cursor.fetchall()
+
+
+def test_update_rows_applies_each_key_and_reports_per_key_results(db):
+    with db.borrow() as (cursor, connection):
+        for name in ("Ann", "Bo", "Cy"):
+            add_owner(cursor, name)
+        connection.commit()
+
+        success, report = services.update_rows(cursor, connection, "owner", [
+            (1, {"Phone": "111"}),
+            (2, {"Oname": "Bea", "Phone": "222"}),
+            (1, {"Oname": "Anne"}),        # later changes to the same key win
+            (9, {"Phone": "999"}),
+            (3, {}),
+        ], chunk_size=1)
+        rows = owners(cursor)
+
+    assert success
+    assert rows == [(1, "Anne", "111"), (2, "Bea", "222"), (3, "Cy", None)]
+    assert report["updated"] == 2 and report["failed"] == 2 and report["rows"] == 2
+    assert report["results"] == [
+        {"key": 1, "success": True, "affected": 1},
+        {"key": 2, "success": True, "affected": 1},
+        {"key": 9, "success": False, "affected": 0, "error": "Row not found."},
+        {"key": 3, "success": False, "affected": 0, "error": "Nothing to change."},
+    ]
+
+
+def test_update_rows_can_change_the_primary_key(db):
+    with db.borrow() as (cursor, connection):
+        add_owner(cursor, "Ann")
+        add_owner(cursor, "Bo")
+        connection.commit()
+        assert services.get_owner(cursor, 1)[1] == "Ann"
+
+        success, report = services.update_rows(cursor, connection, "Owner", [
+            (1, {"OwnerID": 10, "Oname": "Ann moved"}),
+            (2, {"Oname": "Bo stayed"}),
+        ])
+        rows = owners(cursor)
+
+        assert success and report["updated"] == 2
+        assert rows == [(2, "Bo stayed", None), (10, "Ann moved", None)]
+        # Both the old and the new key were dropped from the entity cache
+        assert services.get_owner(cursor, 1) is None
+        assert services.get_owner(cursor, 10)[1] == "Ann moved"
+
+
+def test_update_rows_counts_every_row_a_non_unique_key_matches(db, clinic):
+    with db.borrow() as (cursor, connection):
+        add_animal(cursor, clinic["owner"], "Tom")
+        connection.commit()
+
+        success, report = services.update_rows(cursor, connection, "Animal", [
+            (clinic["owner"], {"Species": "Cat"}),
+        ], pk_column="Animal_OwnerID")
+        cursor.execute("SELECT Species FROM Animal")
+        species = [r[0] for r in cursor.fetchall()]
+
+    assert success
+    assert report["results"] == [{"key": clinic["owner"], "success": True, "affected": 2}]
+    assert report["rows"] == 2
+    assert species == ["Cat", "Cat"]
+
+
+def test_update_rows_rolls_back_everything_on_a_failed_statement(db, clinic):
+    with db.borrow() as (cursor, connection):
+        add_owner(cursor, "Bo")
+        connection.commit()
+
+        # Oname is NOT NULL; the first key's change must not survive either
+        success, message = services.update_rows(cursor, connection, "Owner", [
+            (2, {"Phone": "222"}),
+            (clinic["owner"], {"Oname": None}),
+        ], chunk_size=1)
+        rows = owners(cursor)
+
+    assert not success and message.startswith("Invalid input")
+    assert rows == [(1, "Ann", None), (2, "Bo", None)]
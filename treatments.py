@@ -0,0 +1,106 @@
+"""Treatment catalog
+
+The distinct treatment types offered when booking, kept in memory.
+Treatment holds one row per appointment, so instead of re-reading it the
+catalog is built once from a grouped query and then refreshed
+incrementally: each refresh only reads rows above the highest
+TreatmentID it has already seen.
+
+Each type is listed under the first TreatmentID that used it, which is
+also the ID users pick when booking. The first load also reads the
+TreatmentArchive_YYYY tables, so types whose rows were all archived stay
+bookable; later rows always land in Treatment.
+
+Without AUTOINCREMENT (SQLite files created before it was declared),
+SQLite hands the highest TreatmentID out again once that row is deleted.
+Code deleting Treatment rows calls `rows_deleted()` so the catalog does
+not skip the reused ID.
+"""
+
+import bisect
+import threading
+
+import query
+
+
+class TreatmentCatalog:
+    def __init__(self):
+        self.last_id = None
+        self._by_key = {}      # normalised type -> (TreatmentID, TreatmentType)
+        self._by_id = {}       # TreatmentID -> TreatmentType
+        self._keys = []        # sorted normalised types, for prefix search
+        self._lock = threading.Lock()
+
+    # Pull in anything added since the last refresh; returns new type count
+    def refresh(self, cursor, batch_size=10000):
+        if self.last_id is None:
+            rows = query.get_treatment_type_summary(cursor, query.get_archive_years(cursor))
+            with self._lock:
+                self.last_id = max((r[2] for r in rows), default=0)
+                return sum(self._add(first_id, t_type) for t_type, first_id, _ in rows)
+
+        added = 0
+        while True:
+            rows = query.get_treatments_after(cursor, self.last_id, batch_size)
+            with self._lock:
+                for t_id, t_type in rows:
+                    added += self._add(t_id, t_type)
+                if rows:
+                    self.last_id = max(self.last_id, rows[-1][0])
+            if len(rows) < batch_size:
+                return added
+
+    # Treatment rows were deleted. Call inside the deleting transaction: if
+    # the highest ID seen is gone, it may be reused, so rebuild on next use.
+    def rows_deleted(self, cursor):
+        if self.last_id is None:
+            return
+        top = query.get_key_range(cursor, "Treatment", "TreatmentID")[1]
+        if top is None or top < self.last_id:
+            self.reset()
+
+    # Forget everything (e.g. after bulk deletes)
+    def reset(self):
+        with self._lock:
+            self.last_id = None
+            self._by_key = {}
+            self._by_id = {}
+            self._keys = []
+
+    # [(TreatmentID, TreatmentType)] ordered by ID
+    def entries(self):
+        with self._lock:
+            return sorted(self._by_key.values())
+
+    # Types starting with `prefix` (case-insensitive)
+    def search(self, prefix):
+        key = _normalise(prefix)
+        with self._lock:
+            start = bisect.bisect_left(self._keys, key)
+            matches = []
+            for k in self._keys[start:]:
+                if not k.startswith(key):
+                    break
+                matches.append(self._by_key[k])
+        return sorted(matches)
+
+    def type_for_id(self, treatment_id):
+        try:
+            return self._by_id.get(int(treatment_id))
+        except (TypeError, ValueError):
+            return None
+
+    def _add(self, t_id, t_type):
+        if t_type is None:
+            return 0
+        key = _normalise(t_type)
+        if key in self._by_key:
+            return 0
+        self._by_key[key] = (t_id, t_type)
+        self._by_id[t_id] = t_type
+        bisect.insort(self._keys, key)
+        return 1
+
+
+def _normalise(t_type):
+    return " ".join(str(t_type).split()).lower()
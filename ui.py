@@ -3,6 +3,9 @@
 Small helpers for prompting and printing. No SQL or business logic here.
 """
 
+import sys
+import time
+
 import services
 
 # ======================================================
@@ -15,6 +18,32 @@ def prompt(message, default=None):
     return value if value else default
 
 
+def format_cell(value):
+    # Dates print as YYYY-MM-DD; everything else via str()
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d")
+    return str(value)
+
+
+def _column_widths(col_names, formatted_rows):
+    widths = [len(name) for name in col_names]
+    for cells in formatted_rows:
+        for i, cell in enumerate(cells):
+            widths[i] = max(widths[i], len(cell))
+    return widths
+
+
+def _print_header(col_names, col_widths):
+    header = " | ".join(col_names[i].ljust(col_widths[i]) for i in range(len(col_names)))
+    print("\n" + header)
+    print("-" * len(header))
+
+
+def _print_rows(formatted_rows, col_widths):
+    for cells in formatted_rows:
+        print(" | ".join(cell.ljust(col_widths[i]) for i, cell in enumerate(cells)))
+
+
 def print_query_results(cursor, rows):
     # Print SQL query results using column names from cursor.description
     if not rows:
@@ -24,38 +53,54 @@ def print_query_results(cursor, rows):
     # Extract column names from the cursor
     col_names = [desc[0] for desc in cursor.description]
 
-    # Calculate column widths (max of header or any row value)
-    col_widths = []
-    for i, name in enumerate(col_names):
-        longest = len(name)
-        for row in rows:
-            value = row[i]
+    # Format every value once, then size columns to the widest cell
+    formatted = [[format_cell(value) for value in row] for row in rows]
+    col_widths = _column_widths(col_names, formatted)
 
-            # Format datetime → YYYY-MM-DD
-            if hasattr(value, "strftime"):
-                value = value.strftime("%Y-%m-%d")
-
-            longest = max(longest, len(str(value)))
-        col_widths.append(longest)
-
-    # Print header row
-    header = " | ".join(col_names[i].ljust(col_widths[i]) for i in range(len(col_names)))
-    print("\n" + header)
-    print("-" * len(header))
+    _print_header(col_names, col_widths)
+    _print_rows(formatted, col_widths)
+    print()
 
-    # Print each row
-    for row in rows:
-        cells = []
-        for i, value in enumerate(row):
 
-            # Format datetime values
-            if hasattr(value, "strftime"):
-                value = value.strftime("%Y-%m-%d")
+def print_table(headers, rows):
+    # Print plain rows under a header, sized to the widest cell
+    formatted = [[format_cell(value) for value in row] for row in rows]
+    col_widths = _column_widths(headers, formatted)
+    _print_header(headers, col_widths)
+    _print_rows(formatted, col_widths)
 
-            cells.append(str(value).ljust(col_widths[i]))
 
-        print(" | ".join(cells))
+def print_query_pages(cursor, pages, pause=True):
+    # Print a stream of result pages as they arrive. Column widths are
+    # taken from the first page so later pages never force a reprint.
+    pages = iter(pages)
+    page = next(pages, None)
+    if not page:
+        print("No results found.\n")
+        return
 
+    col_names = [desc[0] for desc in cursor.description]
+    col_widths = None
+    shown = 0
+
+    while page:
+        formatted = [[format_cell(value) for value in row] for row in page]
+        if col_widths is None:
+            col_widths = _column_widths(col_names, formatted)
+            _print_header(col_names, col_widths)
+
+        _print_rows(formatted, col_widths)
+        shown += len(page)
+
+        page = next(pages, None)
+        if page and pause:
+            more = input(f"-- {shown} rows shown. Enter for more, q to stop: ")
+            if more.strip().lower() == "q":
+                break
+
+    close = getattr(pages, "close", None)
+    if close:
+        close()
     print()
 
 
@@ -86,9 +131,9 @@ def print_dict_table(data_dict, title=None):
 #                TABLE DISCOVERY & SELECTION
 # ======================================================
 
-def list_tables_ui(cursor):
+def list_tables_ui(cursor, catalog=None):
     # Get and print available tables
-    tables = services.list_tables(cursor)
+    tables = services.list_tables(cursor, catalog)
     if not tables:
         print("No tables found.")
         return []
@@ -99,9 +144,9 @@ def list_tables_ui(cursor):
     return tables
 
 
-def choose_table_ui(cursor):
-    # Let user pick any table from the DB
-    tables = services.list_tables(cursor)
+def choose_table_ui(cursor, catalog=None, extra=()):
+    # Let user pick any table from the DB (plus any `extra` choices)
+    tables = list(services.list_tables(cursor, catalog)) + list(extra)
     if not tables:
         print("No tables available.")
         return None
@@ -121,11 +166,10 @@ def choose_table_ui(cursor):
     print("Invalid choice.")
     return None
 
-def choose_insert_table_ui(cursor):
+def choose_insert_table_ui(cursor, catalog=None):
     # Pick a table for INSERT, excluding restricted tables
-    RESTRICTED_INSERT_TABLES = {"appointment", "treatment"}
-    tables = services.list_tables(cursor)
-    valid_tables = [t for t in tables if t not in RESTRICTED_INSERT_TABLES]
+    tables = services.list_tables(cursor, catalog)
+    valid_tables = [t for t in tables if t.lower() not in services.RESTRICTED_INSERT_TABLES]
 
     if not valid_tables:
         print("No valid tables available for insertion.")
@@ -152,20 +196,25 @@ def choose_insert_table_ui(cursor):
 # ======================================================
 
 def choose_treatment_ui(cursor):
-    # Show treatments and return chosen ID (or '0' for new)
+    # Show treatment types and return chosen ID (or '0' for new).
+    # Typing text instead of an ID narrows the list to matching types.
     treatments = services.get_existing_treatments(cursor)
-    print("\nExisting Treatments:")
-    if not treatments:
-        print("  None found.")
-    else:
-        for t_id, t_type in treatments:
-            print(f"  {t_id} - {t_type}")
 
-    print("\nEnter a TreatmentID from above.")
-    print("Enter 0 to create a new treatment type.")
+    while True:
+        print("\nExisting Treatments:")
+        if not treatments:
+            print("  None found.")
+        else:
+            for t_id, t_type in treatments:
+                print(f"  {t_id} - {t_type}")
+
+        print("\nEnter a TreatmentID from above, or text to search.")
+        print("Enter 0 to create a new treatment type.")
 
-    choice = input("TreatmentID: ")
-    return choice
+        choice = input("TreatmentID: ").strip()
+        if choice.isdigit() or not choice:
+            return choice
+        treatments = services.search_treatments(cursor, choice)
 
 
 def get_new_treatment_type_ui():
@@ -183,11 +232,28 @@ def get_appointment_inputs():
     owner_id = input("OwnerID: ")
     animal_id = input("AnimalID: ")
     vet_id = input("TreatingVetID: ")
-    date_time = input("DateTime (YYYY-MM-DD): ")
+    date_time = input("DateTime (YYYY-MM-DD HH:MM): ")
 
     return owner_id, animal_id, vet_id, date_time
 
 
+def get_batch_appointment_inputs():
+    # Collect inputs for booking several pets and/or a recurring series
+    print("\nBatch Schedule Appointments")
+    owner_id = input("OwnerID: ")
+    animal_ids = [a.strip() for a in input("AnimalIDs (comma-separated): ").split(",") if a.strip()]
+    vet_id = input("TreatingVetID: ")
+    date_time = input("First DateTime (YYYY-MM-DD HH:MM): ")
+
+    try:
+        count = int(input("Number of visits per animal (default 1): ") or 1)
+        every_days = int(input("Days between visits (default 0): ") or 0) if count > 1 else 0
+    except ValueError:
+        count, every_days = 1, 0
+
+    return owner_id, animal_ids, vet_id, date_time, count, every_days
+
+
 def get_treatment_summary_inputs():
     # Prompt for owner and animal IDs for treatment summary
     print("\nReturn Treatment Summary")
@@ -206,6 +272,85 @@ def get_cancel_appt_inputs():
     return appt_id, animal_id
 
 
+def get_batch_cancel_inputs():
+    # Returns keyword arguments for services.cancel_appointments, or None
+    print("\nBatch Cancel Appointments")
+    print("1. By appointment IDs")
+    print("2. A vet's appointments in a date range")
+    print("3. An animal's upcoming appointments")
+    mode = input("Choice: ").strip()
+
+    if mode == "1":
+        appt_ids = [a.strip() for a in input("Appointment IDs (comma-separated): ").split(",") if a.strip()]
+        animal_id = input("AnimalID (blank: any): ").strip()
+        return {"appt_ids": appt_ids, "animal_id": animal_id or None}
+    if mode == "2":
+        vet_id = input("VetID: ").strip()
+        start = input("From (YYYY-MM-DD [HH:MM], blank: now): ").strip()
+        end = input("To (YYYY-MM-DD [HH:MM], blank: no limit): ").strip()
+        return {"vet_id": vet_id, "start": start or None, "end": end or None}
+    if mode == "3":
+        return {"animal_id": input("AnimalID: ").strip()}
+
+    print("Invalid choice.")
+    return None
+
+
+def query_stats_action_ui():
+    # Ask what to do from the stats screen
+    print("\nT = toggle profiling, R = reset stats, Enter = back")
+    return input("Choice: ").strip().lower()
+
+
+def get_import_file_ui():
+    # Prompt for a CSV/JSONL file to bulk import
+    return input("CSV or JSONL file: ").strip()
+
+
+def get_export_inputs_ui():
+    # Returns the output path, or None to cancel
+    path = input("Output file (.csv, .jsonl, .parquet, .arrow; add .gz or .zst to compress): ").strip()
+    return path or None
+
+
+def choose_report_ui(reports):
+    # `reports` maps name -> (title, ...); returns a name or None
+    names = list(reports)
+    print("\nSelect a report:")
+    for i, name in enumerate(names, start=1):
+        print(f"{i}. {reports[name][0]}")
+
+    choice = input("Enter report number: ")
+    try:
+        idx = int(choice) - 1
+        if 0 <= idx < len(names):
+            return names[idx]
+    except ValueError:
+        pass
+
+    print("Invalid choice.")
+    return None
+
+
+def get_report_window_ui():
+    # Returns (start, end) as YYYY-MM-DD strings, None for open-ended
+    start = input("From (YYYY-MM-DD, blank for all history): ").strip()
+    end = input("To (YYYY-MM-DD, blank for all history): ").strip()
+    return start or None, end or None
+
+
+def include_archive_ui():
+    return input("Include archived history? (y/N): ").strip().lower() == "y"
+
+
+def get_availability_inputs():
+    # Returns (vet_id or None for "any vet", date_time)
+    print("\nVet Availability")
+    vet_id = input("VetID (blank: which vets are free at a time): ").strip()
+    date_time = input("DateTime (YYYY-MM-DD HH:MM): ").strip()
+    return vet_id or None, date_time
+
+
 # ======================================================
 #              PRINTING RESULTS FORMATTED
 # ======================================================
@@ -236,3 +381,182 @@ def print_treatment_summary(summary_rows):
     print("\nTreatment Summary:")
     for date, treatment, vet in summary_rows:
         print(f"{date} | {treatment} | {vet}")
+
+
+def print_import_report(report):
+    # Print bulk import totals and any failed batches
+    print(f"\nInserted {report['inserted']} rows, {report['failed']} failed.")
+    for err in report["errors"]:
+        if err["first_row"] is None:
+            print(f"  {err['error']}")
+        elif err["last_row"] is None:
+            print(f"  stopped at row {err['first_row']}: {err['error']}")
+        else:
+            print(f"  rows {err['first_row']}-{err['last_row']}: {err['error']}")
+
+
+def print_update_report(report, seconds=None, limit=20):
+    # Print services.update_rows totals and the first few failed keys
+    took = f" in {seconds:.2f} s" if seconds is not None else ""
+    print(f"\nUpdated {report['rows']} rows ({report['updated']} keys), {report['failed']} keys failed{took}.")
+    failed = [r for r in report["results"] if not r["success"]]
+    for r in failed[:limit]:
+        print(f"  {r['key']}: {r['error']}")
+    if len(failed) > limit:
+        print(f"  ... and {len(failed) - limit} more")
+
+
+class ExportProgress:
+    # Progress callback for exporter: rewrites one stderr line at most
+    # every `interval` seconds
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.started = time.perf_counter()
+        self.last = 0.0
+
+    def __call__(self, rows, total):
+        now = time.perf_counter()
+        if now - self.last < self.interval and rows != total:
+            return
+        self.last = now
+        rate = rows / (now - self.started) if now > self.started else 0
+        done = f"{rows}/{total} rows ({rows * 100 // total}%)" if total else f"{rows} rows"
+        sys.stderr.write(f"\rExported {done}, {rate:,.0f} rows/s ")
+        sys.stderr.flush()
+
+
+def print_export_result(success, result):
+    if not success:
+        print(f"\nExport failed: {result}")
+        return
+    compression = f", {result['compression']}" if result["compression"] else ""
+    where = f"{len(result['parts'])} parts" if result.get("parts") else result["path"]
+    print(f"\nWrote {result['rows']} rows to {where} "
+          f"({result['format']}{compression}) in {result['seconds']} s.")
+    for part in result.get("parts") or []:
+        print(f"  {part}")
+    if result.get("expected") is not None:
+        print(f"Row count verified ({result['expected']}).")
+
+
+def print_report(result):
+    # Print a reports.run_report result
+    window = f"{result['start'] or 'start'} to {result['end'] or 'today'}"
+    cached = " (cached)" if result["cached"] else ""
+    print(f"\n{result['title']}, {window}{cached}")
+    if not result["rows"]:
+        print("No data in this window.")
+    else:
+        print_table(result["columns"], result["rows"])
+    if result["note"]:
+        print(f"Note: {result['note']}")
+
+
+def print_batch_results(results):
+    # Print one line per requested booking
+    if not results:
+        print("Nothing to schedule.")
+        return
+
+    booked = sum(1 for r in results if r["success"])
+    print(f"\nBooked {booked} of {len(results)} appointments:")
+    for r in results:
+        if r["success"]:
+            print(f"  #{r['index'] + 1}: ApptID {r['ApptID']} | {r['DateTime']} | "
+                  f"{r['Animal']} | {r['Vet']} | {r['Treatment']}")
+        else:
+            print(f"  #{r['index'] + 1}: {r['error']}")
+
+
+def print_owner_dashboard(dashboard):
+    # Print services.get_owner_dashboard: owner details, then each animal
+    # with its appointment history
+    owner = dashboard["owner"]
+    print("\n=== " + " | ".join(format_cell(v) for v in owner.values() if v is not None) + " ===")
+
+    if not dashboard["animals"]:
+        print("No animals on file.")
+        return
+
+    for animal in dashboard["animals"]:
+        details = ", ".join(format_cell(animal[k]) for k in ("Species", "Breed") if animal[k])
+        born = f", born {format_cell(animal['DOB'])}" if animal["DOB"] else ""
+        print(f"\n{animal['Aname']} (AnimalID {animal['AnimalID']}; {details}{born})")
+
+        if not animal["appointments"]:
+            print("  No appointments.")
+            continue
+        print_table(["ApptID", "DateTime", "Vet", "Treatments"],
+                    [(a["ApptID"], a["DateTime"], a["Vet"] or "-", ", ".join(a["treatments"]) or "-")
+                     for a in animal["appointments"]])
+
+
+def print_free_slots(vet_id, slots):
+    if not slots:
+        print(f"No free slots found for vet {vet_id}.")
+        return
+    print(f"\nNext free slots for vet {vet_id}:")
+    for slot in slots:
+        print(f"  {slot.strftime('%Y-%m-%d %H:%M')}")
+
+
+def print_free_vets(when, vets):
+    if not vets:
+        print(f"No vet is free at {when}.")
+        return
+    print(f"\nVets free at {when}:")
+    print_table(["VetID", "Vname"], vets)
+
+
+def print_cancel_results(results):
+    # Print one line per appointment from services.cancel_appointments
+    if not results:
+        print("No matching appointments.")
+        return
+
+    cancelled = sum(1 for r in results if r["success"])
+    print(f"\nCancelled {cancelled} of {len(results)} appointments:")
+    for r in results:
+        if r["success"]:
+            print(f"  ApptID {r['ApptID']} | {format_cell(r['DateTime'])} | "
+                  f"AnimalID {r['AnimalID']} | VetID {r['VetID']}")
+        else:
+            print(f"  ApptID {r['ApptID']}: {r['error']}")
+
+
+def print_query_stats(report, enabled):
+    # Print per-query profiling stats (see profiling.Profiler.snapshot)
+    print(f"\nQuery profiling is {'ON' if enabled else 'OFF'}.")
+    if not report:
+        print("No statements recorded.")
+        return
+
+    headers = ["Query", "Calls", "Errors", "Rows", "Total ms", "p50 ms", "p95 ms", "p99 ms", "Max ms"]
+    keys = ["calls", "errors", "rows", "total_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+    print_table(headers, [[tag] + [stats[k] for k in keys] for tag, stats in report.items()])
+
+
+def print_server_stats(report):
+    # Print request rate and per-route latency (see server.ServerStats.snapshot)
+    print(f"\nServed {report['requests']} requests in {report['uptime_s']} s ({report['rps']} req/s).")
+    if not report["routes"]:
+        return
+
+    headers = ["Route", "Calls", "Errors", "Req/s", "Mean ms", "p50 ms", "p95 ms", "p99 ms", "Max ms"]
+    keys = ["calls", "errors", "rps", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+    print_table(headers, [[route] + [stats[k] for k in keys] for route, stats in report["routes"].items()])
+
+
+def print_replica_stats(replicas):
+    # Print read replica health and traffic (see Database.replica_status)
+    headers = ["Replica", "Healthy", "Lag s", "Latency ms", "Reads"]
+    keys = ["healthy", "lag_s", "latency_ms", "reads"]
+    print("\nRead replicas:")
+    print_table(headers, [[r["replica"]] + [r[k] for k in keys] for r in replicas])
+
+
+def print_cache_stats(stats):
+    # Print entity cache counters (see cache.EntityCache.stats)
+    print(f"\nEntity cache: {stats['size']}/{stats['maxsize']} entries, "
+          f"{stats['hits']} hits, {stats['misses']} misses, "
+          f"{stats['evictions']} evictions, hit rate {stats['hit_rate']}")